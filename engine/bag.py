@@ -0,0 +1,186 @@
+__author__ = 'Jacky'
+
+import random
+
+from engine.zobrist import BAG, COUNT_KEYS, MAX_COUNT, RACK_TILES, TILE_INDEX
+
+
+def _tile_counts(tiles):
+    """
+    Returns the number of copies of each tile in an iterable of tiles, by
+    RACK_TILES index. Raises ValueError if one is not a rack tile.
+    """
+    counts = dict()
+    for tile in tiles:
+        i = TILE_INDEX.get(tile)
+        if i is None:
+            raise ValueError('%r is not a tile.' % (tile,))
+        counts[i] = counts.get(i, 0) + 1
+
+    return counts
+
+
+class Bag(object):
+    """
+    The bag of tiles left to draw, stored as a count per tile (RACK_TILES
+    order, the blank last) rather than a list of tiles, so that a draw is a
+    walk over the 27 counts whatever the size of the bag, and copies and
+    snapshots are small.
+
+    Draws use the bag's own random number generator, so games seeded alike
+    draw identical sequences without touching the global random state. The
+    Zobrist key of the tiles in the bag (see engine.zobrist) is kept in key.
+    """
+
+    def __init__(self, tiles=(), rng=None):
+        """
+        Create a bag holding the given tiles, drawing with rng (a
+        random.Random), or a new unseeded generator if none is given.
+        """
+        self.counts = [0] * len(RACK_TILES)
+        self.total = 0
+        self.key = 0
+        self.rng = rng if rng is not None else random.Random()
+        self.put(tiles)
+
+    def put(self, tiles):
+        """
+        Put tiles (back) into the bag. Raises ValueError, leaving the bag
+        unchanged, if a tile is not a rack tile or the bag would hold more
+        than MAX_COUNT copies of it.
+        """
+        needed = _tile_counts(tiles)
+        counts = self.counts
+        for i, n in needed.iteritems():
+            if counts[i] + n > MAX_COUNT:
+                raise ValueError('Too many copies of a tile in the bag.')
+
+        keys = COUNT_KEYS[BAG]
+        for i, n in needed.iteritems():
+            tile_keys = keys[RACK_TILES[i]]
+            for c in xrange(counts[i] + 1, counts[i] + n + 1):
+                self.key ^= tile_keys[c]
+            counts[i] += n
+            self.total += n
+
+    def take(self, tiles):
+        """
+        Remove the given tiles from the bag, e.g. to replay known draws.
+        Raises ValueError, leaving the bag unchanged, if it doesn't hold
+        them.
+        """
+        needed = _tile_counts(tiles)
+        counts = self.counts
+        for i, n in needed.iteritems():
+            if n > counts[i]:
+                raise ValueError('Tiles %r are not in the bag.'
+                                 % ''.join(RACK_TILES[i] * n for i, n in sorted(needed.iteritems())))
+
+        keys = COUNT_KEYS[BAG]
+        for i, n in needed.iteritems():
+            tile_keys = keys[RACK_TILES[i]]
+            for c in xrange(counts[i] - n + 1, counts[i] + 1):
+                self.key ^= tile_keys[c]
+            counts[i] -= n
+            self.total -= n
+
+    def draw(self, count=1):
+        """
+        Draw count tiles at random, or all of the tiles left if there are
+        fewer, each tile in the bag being equally likely.
+
+        Returns:
+            The list of tiles drawn.
+        """
+        drawn = []
+        for _ in xrange(min(count, self.total)):
+            r = self.rng.randrange(self.total)
+            i = 0
+            while r >= self.counts[i]:
+                r -= self.counts[i]
+                i += 1
+            self._remove(i)
+            drawn.append(RACK_TILES[i])
+
+        return drawn
+
+    def exchange(self, tiles):
+        """
+        Draw as many tiles as given, then put the given tiles in the bag.
+
+        Returns:
+            The list of tiles drawn.
+        """
+        drawn = self.draw(len(tiles))
+        self.put(tiles)
+        return drawn
+
+    def _remove(self, i):
+        self.key ^= COUNT_KEYS[BAG][RACK_TILES[i]][self.counts[i]]
+        self.counts[i] -= 1
+        self.total -= 1
+
+    def count(self, tile):
+        return self.counts[TILE_INDEX[tile]]
+
+    def snapshot(self):
+        """
+        Returns the contents of the bag and the state of its random number
+        generator, for restore.
+        """
+        return tuple(self.counts), self.rng.getstate()
+
+    def restore(self, snapshot):
+        """
+        Return the bag to a snapshot, including the draws it will make
+        unless the snapshot has no generator state.
+        """
+        counts, state = snapshot
+        keys = COUNT_KEYS[BAG]
+        self.counts = list(counts)
+        self.total = sum(counts)
+        self.key = 0
+        for tile, n in zip(RACK_TILES, counts):
+            for k in xrange(1, n + 1):
+                self.key ^= keys[tile][k]
+        if state is not None:
+            self.rng.setstate(state)
+
+    def copy(self, rng=None):
+        """
+        Returns a copy of the bag. Without rng the copy gets a generator in
+        the same state, so it makes the same draws as this bag would.
+        """
+        bag = Bag.__new__(Bag)
+        bag.counts = self.counts[:]
+        bag.total = self.total
+        bag.key = self.key
+        if rng is None:
+            rng = random.Random()
+            rng.setstate(self.rng.getstate())
+        bag.rng = rng
+        return bag
+
+    __copy__ = copy
+
+    def __deepcopy__(self, memo):
+        return self.copy()
+
+    def __len__(self):
+        return self.total
+
+    def __contains__(self, tile):
+        return self.counts[TILE_INDEX[tile]] > 0 if tile in TILE_INDEX else False
+
+    def __iter__(self):
+        for tile, n in zip(RACK_TILES, self.counts):
+            for _ in xrange(n):
+                yield tile
+
+    def __eq__(self, other):
+        if isinstance(other, Bag):
+            return self.counts == other.counts
+        return NotImplemented
+
+    def __ne__(self, other):
+        return not self == other
@@ -1,5 +1,7 @@
 __author__ = 'Jacky'
 
+from engine import zobrist
+
 default_board = [
     list('#..2...#...2..#'),
     list('.@...3...3...@.'),
@@ -23,6 +25,422 @@ letter_multipliers = {'3': 3, '2': 2, '.': 1}
 
 empty_locations = {'#', '@', '.', '3', '2', '*'}
 
+# Character codes of the symbols for empty squares
+EMPTY_CODES = frozenset(ord(c) for c in empty_locations)
+
+
+class BoardRow(object):
+    """
+    View of one row of a Board that reads and writes like the list of
+    characters the row used to be: occupied squares hold their letter
+    (lowercase for a blank) and empty squares their premium symbol.
+    """
+
+    def __init__(self, board, x):
+        self.board = board
+        self.x = x
+        self.offset = x * board.width
+
+    def __getitem__(self, y):
+        if isinstance(y, slice):
+            return list(self)[y]
+        if y < 0:
+            y += self.board.width
+        if not 0 <= y < self.board.width:
+            raise IndexError('Board column out of range.')
+
+        return chr(self.board.tiles[self.offset + y])
+
+    def __setitem__(self, y, letter):
+        if letter in empty_locations:
+            self.board.clear(self.x, y)
+        else:
+            self.board.set(self.x, y, letter)
+
+    def __len__(self):
+        return self.board.width
+
+    def __iter__(self):
+        return iter(str(self))
+
+    def __str__(self):
+        return str(self.board.tiles[self.offset:self.offset + self.board.width])
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+
+class Board(object):
+    """
+    A Scrabble board stored in flat byte arrays in row-major order, with
+    square (x, y) at index x * width + y.
+
+    tiles holds the character of each square: the letter of the tile on it
+    (lowercase for a blank), or its premium symbol (see empty_locations) if
+    it is empty. blanks flags the squares holding a blank. The letter and
+    word multipliers of every square are precomputed in letter_mult and
+    word_mult, and shared between copies since they never change.
+
+    Occupancy is also kept as a bitboard, an integer with bit
+    x * width + y set for each occupied square, so that queries about
+    whole regions of the board are a few integer operations.
+
+    The tiles and occupancy are also maintained transposed, in column-major
+    order (tiles_t and occupied_t, with square (x, y) at y * height + x), so
+    that a column is as contiguous as a row. Methods taking a horizontal
+    flag read rows from the row-major arrays and columns from the
+    transposed ones.
+
+    The anchor squares, the empty squares next to an occupied one, are
+    kept as one bitset per row (anchor_rows, bit y for column y) and per
+    column (anchor_columns, bit x for row x). set and clear update them from
+    the neighbours of the square, so they are always current. Occupancy is
+    likewise kept per line (occupied_rows, occupied_columns), from which the
+    extent of the word through any square is a few bit operations.
+
+    key is the Zobrist key of the tiles on the board (see engine.zobrist),
+    also updated by set and clear.
+
+    Indexing a board gives BoardRow views, so board[x][y] reads and writes
+    a square like the list of lists boards used to be.
+    """
+
+    def __init__(self, layout=default_board):
+        """
+        Create a board from a layout given as a list of rows of characters.
+        Empty squares take their premium from the layout; a square holding a
+        letter takes the premium of the same square of default_board, if
+        there is one.
+        """
+        self.height = len(layout)
+        self.width = len(layout[0]) if layout else 0
+
+        # Everything derived from the premiums alone is built once per layout
+        # and shared, like it is between copies
+        (self.squares, squares_t, letters, self.letter_mult, self.word_mult,
+         self.layouts, self.neighbours) = _layout_tables(layout)
+
+        size = self.height * self.width
+        self.full = (1 << size) - 1
+
+        self.tiles = bytearray(self.squares)
+        self.tiles_t = bytearray(squares_t)
+        self.blanks = bytearray(size)
+        self.occupied = 0
+        self.occupied_t = 0
+
+        self.anchor_rows = [0] * self.height
+        self.anchor_columns = [0] * self.width
+        self.occupied_rows = [0] * self.height
+        self.occupied_columns = [0] * self.width
+
+        # Zobrist key of the tiles on the board, see engine.zobrist
+        self.tile_keys = zobrist.square_keys(size)
+        self.key = 0
+
+        for x, y, c in letters:
+            self.set(x, y, c)
+
+    def copy(self):
+        """
+        Returns a copy of the board. Only the per-square tile state is copied;
+        the premium arrays are shared.
+        """
+        board = Board.__new__(Board)
+        board.__dict__.update(self.__dict__)
+        board.tiles = bytearray(self.tiles)
+        board.tiles_t = bytearray(self.tiles_t)
+        board.blanks = bytearray(self.blanks)
+        board.anchor_rows = self.anchor_rows[:]
+        board.anchor_columns = self.anchor_columns[:]
+        board.occupied_rows = self.occupied_rows[:]
+        board.occupied_columns = self.occupied_columns[:]
+        return board
+
+    __copy__ = copy
+
+    def __deepcopy__(self, memo):
+        return self.copy()
+
+    def set(self, x, y, letter):
+        """
+        Place a tile on square (x, y). A lowercase letter is a blank.
+        """
+        i = x * self.width + y
+        t = y * self.height + x
+        keys = self.tile_keys
+        if self.occupied >> i & 1:
+            self.key ^= keys[i << 7 | ord(letter)] ^ keys[i << 7 | self.tiles[i]]
+            self.tiles[i] = self.tiles_t[t] = letter
+            self.blanks[i] = letter.islower()
+            return
+
+        self.key ^= keys[i << 7 | ord(letter)]
+        self.tiles[i] = self.tiles_t[t] = letter
+        self.blanks[i] = letter.islower()
+
+        occupied = self.occupied = self.occupied | 1 << i
+        self.occupied_t |= 1 << t
+        self.occupied_rows[x] |= 1 << y
+        self.occupied_columns[y] |= 1 << x
+
+        # The square is no longer an anchor, its empty neighbours are
+        anchor_rows, anchor_columns = self.anchor_rows, self.anchor_columns
+        anchor_rows[x] &= ~(1 << y)
+        anchor_columns[y] &= ~(1 << x)
+        for nx, ny, n in self.neighbours[i]:
+            if not occupied >> n & 1:
+                anchor_rows[nx] |= 1 << ny
+                anchor_columns[ny] |= 1 << nx
+
+    def clear(self, x, y):
+        """
+        Remove the tile on square (x, y), if any.
+        """
+        i = x * self.width + y
+        t = y * self.height + x
+        if not self.occupied >> i & 1:
+            return
+
+        self.key ^= self.tile_keys[i << 7 | self.tiles[i]]
+        self.tiles[i] = self.tiles_t[t] = self.squares[i]
+        self.blanks[i] = 0
+        self.occupied &= ~(1 << i)
+        self.occupied_t &= ~(1 << t)
+        self.occupied_rows[x] &= ~(1 << y)
+        self.occupied_columns[y] &= ~(1 << x)
+
+        # The square and its empty neighbours are anchors only if they still
+        # have an occupied neighbour
+        self._update_anchor(x, y, i)
+        for nx, ny, n in self.neighbours[i]:
+            if not self.occupied >> n & 1:
+                self._update_anchor(nx, ny, n)
+
+    def _update_anchor(self, x, y, i):
+        occupied = self.occupied
+        if any(occupied >> n & 1 for _, _, n in self.neighbours[i]):
+            self.anchor_rows[x] |= 1 << y
+            self.anchor_columns[y] |= 1 << x
+        else:
+            self.anchor_rows[x] &= ~(1 << y)
+            self.anchor_columns[y] &= ~(1 << x)
+
+    def anchors(self, i, horizontal):
+        """
+        Returns the anchor bitset of row i (horizontal, bit y for column y) or
+        column i (bit x for row x).
+        """
+        return self.anchor_rows[i] if horizontal else self.anchor_columns[i]
+
+    def is_empty(self, x, y):
+        return self.tiles[x * self.width + y] in EMPTY_CODES
+
+    def letter_multiplier(self, x, y):
+        return self.letter_mult[x * self.width + y]
+
+    def word_multiplier(self, x, y):
+        return self.word_mult[x * self.width + y]
+
+    def adjacent(self, horizontal=True):
+        """
+        Returns the bitboard of the empty squares next to (above, below, left
+        or right of) an occupied square, in the row-major layout of occupied
+        if horizontal and in the column-major layout of occupied_t otherwise.
+        """
+        occupied = self.occupied if horizontal else self.occupied_t
+        length, not_first, not_last = self.layouts[horizontal]
+        neighbours = (occupied << length) | (occupied >> length) | \
+            ((occupied << 1) & not_first) | ((occupied >> 1) & not_last)
+
+        return neighbours & self.full & ~occupied
+
+    def line_bits(self, bits, i, horizontal):
+        """
+        Returns the bits of a bitboard for row i (horizontal, bit y for
+        column y) or column i (bit x for row x). The bitboard must be in the
+        matching layout, see adjacent.
+        """
+        length = self.layouts[horizontal][0]
+        return bits >> (i * length) & ((1 << length) - 1)
+
+    def line(self, i, horizontal):
+        """
+        Returns the characters of row i (horizontal) or column i as a string.
+        """
+        if horizontal:
+            return str(self.tiles[i * self.width:(i + 1) * self.width])
+
+        return str(self.tiles_t[i * self.height:(i + 1) * self.height])
+
+    def extent(self, x, y, horizontal):
+        """
+        Returns the bounds (start, end) within its row (horizontal) or column
+        of the word through (x, y): the run of occupied squares containing
+        (x, y), which counts as occupied itself. end is exclusive.
+        """
+        if horizontal:
+            empty, j = ~self.occupied_rows[x], y
+        else:
+            empty, j = ~self.occupied_columns[y], x
+
+        # The highest empty square before j and the lowest one after it;
+        # squares past the end of the line are empty in the complement
+        after = empty >> (j + 1)
+        return (empty & ((1 << j) - 1)).bit_length(), j + (after & -after).bit_length()
+
+    def word(self, x, y, horizontal):
+        """
+        Returns the bounds (see extent) and the characters of the word through
+        (x, y). The character of (x, y) is its premium symbol if it is empty.
+        """
+        start, end = self.extent(x, y, horizontal)
+        if horizontal:
+            offset = x * self.width
+            return start, end, str(self.tiles[offset + start:offset + end])
+
+        offset = y * self.height
+        return start, end, str(self.tiles_t[offset + start:offset + end])
+
+    def prefix(self, x, y, horizontal):
+        """
+        Returns the letters on the squares before (x, y), up to the first
+        empty square. See get_prefix.
+        """
+        if horizontal:
+            empty = ~self.occupied_rows[x] & ((1 << y) - 1)
+            offset = x * self.width
+            return str(self.tiles[offset + empty.bit_length():offset + y])
+
+        empty = ~self.occupied_columns[y] & ((1 << x) - 1)
+        offset = y * self.height
+        return str(self.tiles_t[offset + empty.bit_length():offset + x])
+
+    def suffix(self, x, y, horizontal):
+        """
+        Returns the letters on the squares after (x, y), up to the first empty
+        square. See get_suffix.
+        """
+        if horizontal:
+            after = ~self.occupied_rows[x] >> (y + 1)
+            offset = x * self.width + y + 1
+            return str(self.tiles[offset:offset + (after & -after).bit_length() - 1])
+
+        after = ~self.occupied_columns[y] >> (x + 1)
+        offset = y * self.height + x + 1
+        return str(self.tiles_t[offset:offset + (after & -after).bit_length() - 1])
+
+    def letters(self, x, y, length, horizontal):
+        """
+        Returns the characters of length squares starting at (x, y) and going
+        right (horizontal) or down.
+        """
+        if horizontal:
+            start = x * self.width + y
+            return str(self.tiles[start:start + length])
+
+        start = y * self.height + x
+        return str(self.tiles_t[start:start + length])
+
+    def rows(self):
+        """
+        Returns the board as a list of lists of characters.
+        """
+        return [list(row) for row in self]
+
+    def __getitem__(self, x):
+        if x < 0:
+            x += self.height
+        if not 0 <= x < self.height:
+            raise IndexError('Board row out of range.')
+
+        return BoardRow(self, x)
+
+    def __len__(self):
+        return self.height
+
+    def __iter__(self):
+        for x in xrange(self.height):
+            yield BoardRow(self, x)
+
+    def __eq__(self, other):
+        if isinstance(other, Board):
+            return self.tiles == other.tiles and self.width == other.width
+        try:
+            return self.rows() == [list(row) for row in other]
+        except TypeError:
+            return False
+
+    def __ne__(self, other):
+        return not self == other
+
+
+def _line_masks(lines, length):
+    """
+    Returns the line length and the bitboard masks of the squares that
+    aren't first or last in their line, for lines of the given length laid
+    out one after another.
+    """
+    full = (1 << (lines * length)) - 1
+    first = sum(1 << (i * length) for i in xrange(lines))
+
+    return length, full & ~first, full & ~(first << max(length - 1, 0))
+
+
+_layouts = dict()
+
+
+def _layout_tables(layout):
+    """
+    Returns the tables a board with the given layout is built from: the
+    premium symbol of every square in row-major and column-major order, the
+    (x, y, letter) tiles of the layout, the letter and word multipliers, the
+    line masks (see _line_masks) of both orders and the neighbours of every
+    square. The tables of layouts without tiles, like default_board, are
+    built once and must not be changed.
+    """
+    key = tuple(''.join(row) for row in layout)
+    tables = _layouts.get(key)
+    if tables is not None:
+        return tables
+
+    height = len(layout)
+    width = len(layout[0]) if layout else 0
+
+    squares = bytearray()
+    letters = []
+    for x, row in enumerate(layout):
+        for y, c in enumerate(row):
+            if c in empty_locations:
+                squares.append(c)
+            else:
+                in_default = x < len(default_board) and y < len(default_board[x])
+                squares.append(default_board[x][y] if in_default else '.')
+                letters.append((x, y, c))
+
+    squares_t = bytearray(squares[x * width + y] for y in xrange(width) for x in xrange(height))
+    letter_mult = bytearray(letter_multipliers.get(chr(c), 1) for c in squares)
+    word_mult = bytearray(word_multipliers.get(chr(c), 1) for c in squares)
+
+    # (line length, not first in line, not last in line) bitboard masks of
+    # the row-major (True) and column-major (False) layouts
+    layouts = {True: _line_masks(height, width), False: _line_masks(width, height)}
+
+    # (x, y, index) of the squares next to each square
+    neighbours = [
+        [(nx, ny, nx * width + ny)
+         for nx, ny in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1))
+         if 0 <= nx < height and 0 <= ny < width]
+        for x in xrange(height) for y in xrange(width)]
+
+    tables = squares, squares_t, letters, letter_mult, word_mult, layouts, neighbours
+    if not letters:
+        _layouts[key] = tables
+    return tables
+
 
 class BoardPosition(object):
     def __init__(self, letter, pos):
@@ -54,6 +472,9 @@ def get_prefix(board, x, y, horizontal):
         The prefix leading up to the given position as a string. Will be
         empty if no prefix exists.
     """
+    if isinstance(board, Board):
+        return board.prefix(x, y, horizontal)
+
     return ''.join(__pre_suff_helper(board, x, y, horizontal, True))
 
 
@@ -75,6 +496,9 @@ def get_suffix(board, x, y, horizontal):
         The suffix after the given position as a string. Will be empty
         if no suffix exists.
     """
+    if isinstance(board, Board):
+        return board.suffix(x, y, horizontal)
+
     return ''.join(__pre_suff_helper(board, x, y, horizontal, False))
 
 
@@ -1,11 +1,13 @@
 __author__ = 'Jacky'
 
-import copy
 import random
 
-from engine import letters, board, player, move
-from strategy.cross_sets import redo_crosses
-from lexicon import lexicon_set, gaddag
+from engine import letters, board, player, move, zobrist
+from engine.bag import Bag
+from engine.scoring import NO_CROSS, face_value
+from strategy.cross_sets import redo_crosses, new_cross_grid, new_cross_score_grid
+from lexicon import gaddag, gaddag_file, manager
+from lexicon.letter_masks import LETTER_BITS
 from lexicon.settings import WORDLIST_PATH
 
 
@@ -20,11 +22,47 @@ class StateNode(object):
 
         self.action = MoveTypes.Blank
 
+        # MoveDelta to undo the turn with
+        self.delta = None
+
+
+class MoveDelta(object):
+    """
+    What a turn changed in a game, enough for unmake_move to restore it
+    exactly: the player and their rack and score before the turn, a
+    snapshot of the bag (see Bag.snapshot), the (grid, journal) pairs of
+    the cross-set and cross-score writes, the pass count and game over flag
+    and the lexicon version the cross grids were current for before the
+    turn. The tiles placed are the positions of the turn's move.
+    """
+    __slots__ = ('player', 'rack', 'score', 'bag', 'journals', 'passes', 'game_over',
+                 'crosses_version')
+
+    def __init__(self, game):
+        self.player = game.current_turn
+        self.rack = game.players[game.current_turn].rack[:]
+        self.score = game.players[game.current_turn].score
+        self.bag = game.bag.snapshot()
+        self.journals = []
+        self.passes = game.passes
+        self.game_over = game.game_over
+        self.crosses_version = game._crosses_version
+
 
 class ScrabbleGame(object):
-    def __init__(self, wordlist=WORDLIST_PATH, read_gaddag=False):
-        self.board = copy.deepcopy(board.default_board)
-        self.bag = copy.deepcopy(letters.default_bag)
+    def __init__(self, wordlist=WORDLIST_PATH, read_gaddag=False,
+                 gaddag_path=None, word_set=True, seed=None, lexicon_manager=None):
+        """
+        @param seed: Seed of the game's random number generator, which draws
+        the tiles. Games with the same seed and moves draw the same tiles.
+        Unseeded games draw differently every time.
+        @param lexicon_manager: lexicon.manager.LexiconManager to get the
+        wordlist's lexicon from, the process-wide default one if None.
+        """
+        self.board = board.Board()
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.bag = Bag(letters.default_bag, self.rng)
 
         self.players = []
 
@@ -39,14 +77,83 @@ class ScrabbleGame(object):
         self.passes = 0
 
         # Cross sets
-        self.vertical_crosses = [[None] * len(row) for row in self.board]
-        self.horizontal_crosses = [[None] * len(row) for row in self.board]
-
-        self.lexicon_set = lexicon_set.read_lexicon(wordlist)
+        self.vertical_crosses = new_cross_grid(self.board)
+        self.horizontal_crosses = new_cross_grid(self.board)
+
+        # Sums of the tile values of the perpendicular word each empty square
+        # would join, maintained with the cross sets (see cross_score)
+        self.vertical_cross_scores = new_cross_score_grid(self.board)
+        self.horizontal_cross_scores = new_cross_score_grid(self.board)
+
+        # Lexicon artifacts are shared by every game using the same wordlist.
+        # Without the word set, words are validated against the GADDAG.
+        if lexicon_manager is None:
+            lexicon_manager = manager.default_manager
+        self.lexicon = lexicon_manager.lexicon(wordlist)
+        self.lexicon_set = self.lexicon.words if word_set else None
         self.gaddag = gaddag.Gaddag()
+        self.__lexicon_gaddag = None
+
+        if gaddag_path is not None:
+            # Prebuilt binary GADDAG of the same wordlist, see gaddag_file
+            self.gaddag = gaddag_file.load_gaddag(gaddag_path)
+        elif read_gaddag or not word_set:
+            self.gaddag = self.__lexicon_gaddag = self.lexicon.gaddag
+
+        # Version of the lexicon the cross grids match the board for, or None
+        # if they don't, see crosses_current. The grids of the empty board
+        # are current.
+        self._crosses_version = None
+        self.crosses_current = True
+
+    @property
+    def crosses_current(self):
+        """
+        True while the cross grids match the board and the lexicon has not
+        changed since they were computed (see Lexicon.apply_diff), so that
+        moves can be validated from them. Assigning the board or committing
+        a move without crosses clears it, recompute_all_crosses sets it.
+        """
+        return self._crosses_version is not None and self._crosses_version == self.lexicon.version
+
+    @crosses_current.setter
+    def crosses_current(self, value):
+        self._crosses_version = self.lexicon.version if value else None
+
+    @property
+    def board(self):
+        return self._board
+
+    @board.setter
+    def board(self, value):
+        # Boards given as lists of lists of characters are converted
+        self._board = value if isinstance(value, board.Board) else board.Board(value)
+        self.crosses_current = False
 
-        if read_gaddag:
-            self.gaddag = gaddag.gaddag_from_file(wordlist)
+    @property
+    def bag(self):
+        return self._bag
+
+    @bag.setter
+    def bag(self, value):
+        # Bags given as lists of tiles are converted, drawing with the
+        # game's generator
+        self._bag = value if isinstance(value, Bag) else Bag(value, self.rng)
+
+    def position_key(self):
+        """
+        Returns the Zobrist key of the current position: the tiles on the
+        board, the rack of every player, the tiles in the bag and the player
+        to move. Scores and history are not part of it. The keys of the
+        parts are kept up to date as tiles move, so this is a few XORs.
+
+        @return: The position key as a 64-bit integer.
+        """
+        key = self.board.key ^ self.bag.key ^ zobrist.TURN_KEYS[self.current_turn]
+        for p in self.players:
+            key ^= p.rack.key
+
+        return key
 
     def current_player_info(self):
         """
@@ -68,6 +175,21 @@ class ScrabbleGame(object):
 
         return info
 
+    def is_words(self, words):
+        """
+        Check a batch of words against the game's lexicon, using the word set
+        if the game has one and the GADDAG otherwise. Case is ignored, so
+        words may contain blanks.
+
+        @param words: Iterable of words to check.
+        @return: List of booleans, True for each word in the lexicon.
+        """
+        words = [word.upper() for word in words]
+        if self.lexicon_set is not None:
+            return [word in self.lexicon_set for word in words]
+
+        return self.gaddag.is_words(words)
+
     def get_scores(self):
         """
         Returns a dictionary with scores keyed by player name
@@ -80,7 +202,7 @@ class ScrabbleGame(object):
 
         if len(self.players) > 3:
             return False
-        self.players.append(player.Player(name))
+        self.players.append(player.Player(name, len(self.players)))
         return True
 
     def start_game(self):
@@ -90,7 +212,7 @@ class ScrabbleGame(object):
         n = len(self.players)
         for i in xrange(0, 7 * n):
             self.players[i % n].rack.append(
-                self.bag.pop(random.randint(0, len(self.bag) - 1)))
+                self.bag.draw()[0])
 
         self.game_started = True
         return True
@@ -114,7 +236,8 @@ class ScrabbleGame(object):
             return False
 
         from_rack = self.players[self.current_turn].valid_play(letters)
-        b_height, b_width = len(self.board), len(self.board[0])
+        s_board = self.board
+        b_height, b_width = s_board.height, s_board.width
 
         # Candidate exists already or no letters are being played
         if self.candidate is not None or not letters:
@@ -132,13 +255,13 @@ class ScrabbleGame(object):
         j = 0
         for i, letter in enumerate(from_rack):
             if horizontal:
-                while self.board[x][y + j] not in board.empty_locations:
+                while not s_board.is_empty(x, y + j):
                     j += 1
                     if y + j >= b_width:
                         return False     # Move goes out of the board
                 self.candidate.add_letter(letter, (x, y + j))
             else:
-                while self.board[x + j][y] not in board.empty_locations:
+                while not s_board.is_empty(x + j, y):
                     j += 1
                     if x + j >= b_height:
                         return False    # Move goes out of the board
@@ -175,9 +298,10 @@ class ScrabbleGame(object):
                 return False
 
         # Make sure all letters are placed in-bounds
+        s_board = self.board
         for bp in self.candidate.positions:
-            if any([bp.pos[0] < 0, bp.pos[0] >= len(self.board),
-                    bp.pos[1] < 0, bp.pos[1] >= len(self.board[0])]):
+            if any([bp.pos[0] < 0, bp.pos[0] >= s_board.height,
+                    bp.pos[1] < 0, bp.pos[1] >= s_board.width]):
                 return False
 
         # If it's the first turn, no need to hook for valid moves
@@ -194,7 +318,7 @@ class ScrabbleGame(object):
         for bpos in self.candidate.positions:
             x, y = bpos.pos
             # Position already occupied
-            if self.board[x][y] not in board.empty_locations:
+            if not s_board.is_empty(x, y):
                 return False
 
             # If tiles got skipped in letter placement, make sure they contain
@@ -202,7 +326,7 @@ class ScrabbleGame(object):
             if self.candidate.horizontal and y - ly > 1:
                 hooked = True
                 for i in xrange(ly + 1, y):
-                    existing = self.board[x][i]
+                    existing = s_board[x][i]
                     if existing in board.empty_locations:
                         return False
 
@@ -211,7 +335,7 @@ class ScrabbleGame(object):
             elif not self.candidate.horizontal and x - lx > 1:
                 hooked = True
                 for i in xrange(lx + 1, x):
-                    existing = self.board[i][y]
+                    existing = s_board[i][y]
                     if existing in board.empty_locations:
                         return False
 
@@ -220,21 +344,20 @@ class ScrabbleGame(object):
 
             # Process multipliers for placed letter and add to
             # score of candidate
-            word_multiplier *= board.word_multipliers.get(self.board[x][y], 1)
-            letter_multiplier = board.letter_multipliers.get(
-                self.board[x][y], 1)
+            word_multiplier *= s_board.word_multiplier(x, y)
+            letter_multiplier = s_board.letter_multiplier(x, y)
 
             letter_score = letters.letter_scores.get(bpos.letter, 0)
             self.candidate.score += letter_score * letter_multiplier
 
-            self.board[x][y] = bpos.letter
+            s_board.set(x, y, bpos.letter)
             lx, ly = x, y
 
         x, y = self.candidate.positions[0].pos
-        prefix = board.get_prefix(self.board, x, y, self.candidate.horizontal)
+        prefix = s_board.prefix(x, y, self.candidate.horizontal)
 
         x, y = self.candidate.positions[-1].pos
-        suffix = board.get_suffix(self.board, x, y, self.candidate.horizontal)
+        suffix = s_board.suffix(x, y, self.candidate.horizontal)
 
         # Bridging also counts as hooking
         hooked |= bool(prefix) or bool(suffix)
@@ -252,15 +375,13 @@ class ScrabbleGame(object):
 
         # Construct the word that makes up the play
         if self.candidate.horizontal:
-            body = ''.join(
-                [self.board[x][y + i] for i in xrange(0, ly - y + 1)])
+            body = s_board.letters(x, y, ly - y + 1, True)
         else:
-            body = ''.join(
-                [self.board[x + i][y] for i in xrange(0, lx - x + 1)])
+            body = s_board.letters(x, y, lx - x + 1, False)
         word = '%s%s%s' % (prefix, body, suffix)
 
         # Not a valid play - if 1-letter play, validity depends on crosses
-        if len(word) > 1 and word.upper() not in self.lexicon_set:
+        if len(word) > 1 and not self.is_words([word])[0]:
             return False
 
         # 1-letter play on first move is invalid
@@ -296,7 +417,7 @@ class ScrabbleGame(object):
 
         for bpos in self.candidate.positions:
             x, y = bpos.pos
-            self.board[x][y] = board.default_board[x][y]
+            self.board.clear(x, y)
 
         self.candidate = None
         return True
@@ -305,33 +426,47 @@ class ScrabbleGame(object):
         """
         Commit the candidate move. This updates scores, draws new tiles for
         the player, ends the turn, and adds a new state to the game tree.
+        With crosses, the cross sets and cross-scores are updated for the
+        move as well, so they stay current if they were. Without, they no
+        longer match the board.
         """
         if self.game_over:
             return False
 
+        delta = MoveDelta(self)
+        current = self.players[self.current_turn]
+
         # Use the appropriate tiles from the rack
-        self.players[self.current_turn].use_letters(
-            ''.join([bp.letter for bp in self.candidate.positions]))
-        if len(self.bag) >= len(self.candidate.positions):
-            self.candidate.drawn = [
-                self.bag.pop(random.randint(0, len(self.bag) - 1))
-                for _ in xrange(0, len(self.candidate.positions))]
-        else:   # Put the rest of the bag in the rack
-            self.candidate.drawn = self.bag[:]
-            self.bag = []
-
-        for letter in self.candidate.drawn:
-            self.players[self.current_turn].rack.append(letter)
-        self.players[self.current_turn].score += self.candidate.score
+        current.use_letters([bp.letter for bp in self.candidate.positions])
+        # Takes the rest of the bag if there aren't enough tiles left
+        self.candidate.drawn = self.bag.draw(len(self.candidate.positions))
+
+        rack = current.rack
+        rack.extend(self.candidate.drawn)
+        current.score += self.candidate.score
 
         newstate = StateNode(self.candidate)
         newstate.action = MoveTypes.Placed
+        newstate.delta = delta
 
-        if not len(self.players[self.current_turn].rack) and not len(self.bag):
+        if not len(rack) and not len(self.bag):
             self.game_over = True
 
         if crosses:
-            redo_crosses(self.candidate, self.horizontal_crosses, self.vertical_crosses, self.board, self.gaddag)
+            grids = (self.horizontal_crosses, self.vertical_crosses,
+                     self.horizontal_cross_scores, self.vertical_cross_scores)
+            for grid in grids:
+                grid.journal = []
+                delta.journals.append((grid, grid.journal))
+            try:
+                redo_crosses(self.candidate, self.horizontal_crosses, self.vertical_crosses,
+                             self.board, self.gaddag, self.horizontal_cross_scores,
+                             self.vertical_cross_scores)
+            finally:
+                for grid in grids:
+                    grid.journal = None
+        else:
+            self.crosses_current = False
 
         self.__commit_state(newstate)
         self.passes = 0
@@ -351,6 +486,7 @@ class ScrabbleGame(object):
 
         newstate = StateNode(None)
         newstate.action = MoveTypes.Pass
+        newstate.delta = MoveDelta(self)
 
         self.__commit_state(newstate)
         self.passes += 1
@@ -374,6 +510,7 @@ class ScrabbleGame(object):
                 letters) or self.candidate is not None or self.game_over:
             return False
 
+        delta = MoveDelta(self)
         self.candidate = move.Move()
         holder = []
         rack = self.players[self.current_turn].rack
@@ -385,14 +522,13 @@ class ScrabbleGame(object):
                 self.candidate = None
                 return False
 
-        self.candidate.drawn = [
-            self.bag.pop(random.randint(0, len(self.bag) - 1)) for _ in
-            xrange(0, len(letters))]
+        self.candidate.exchanged = holder
+        self.candidate.drawn = self.bag.exchange(holder)
         self.players[self.current_turn].rack += self.candidate.drawn
-        self.bag += holder
 
         newstate = StateNode(self.candidate)
         newstate.action = MoveTypes.Exchange
+        newstate.delta = delta
 
         self.__commit_state(newstate)
         self.passes += 1
@@ -401,6 +537,67 @@ class ScrabbleGame(object):
 
         return True
 
+    def make_move(self, letters, pos, horizontal, crosses=False):
+        """
+        Play a move in one step: set it as the candidate, validate it and
+        commit it. The turn can be taken back with unmake_move.
+
+        @param letters: string or list of letters to play, see set_candidate.
+        @param pos: x,y position of the first tile of the play.
+        @param horizontal: True if the play is horizontal, False otherwise.
+        @param crosses: True to update the cross sets, see commit_candidate.
+        @return: True if the move was played, False if it is invalid or a
+        candidate is already set, in which case the game is unchanged.
+        """
+        if self.candidate is not None:
+            return False
+
+        if not self.set_candidate(letters, pos, horizontal):
+            self.candidate = None
+            return False
+
+        if not self.validate_candidate():
+            self.remove_candidate()
+            return False
+
+        return self.commit_candidate(crosses)
+
+    def unmake_move(self):
+        """
+        Undo the last turn (a placed move, pass or exchange), restoring the
+        board, cross sets, rack, bag (with the state of the generator it
+        draws with), score, pass count and history exactly as they were
+        before it. The cost is proportional to the tiles the turn placed.
+
+        @return: The StateNode of the undone turn, or None if there is no
+        turn to undo or a candidate is set.
+        """
+        state = self.history
+        if state is None or state.delta is None or self.candidate is not None:
+            return None
+
+        delta = state.delta
+        if state.action == MoveTypes.Placed:
+            for bpos in state.move.positions:
+                x, y = bpos.pos
+                self.board.clear(x, y)
+        for grid, journal in delta.journals:
+            grid.undo(journal)
+
+        current = self.players[delta.player]
+        current.rack[:] = delta.rack
+        current.score = delta.score
+
+        self.bag.restore(delta.bag)
+
+        self.passes = delta.passes
+        self.game_over = delta.game_over
+        self._crosses_version = delta.crosses_version
+        self.current_turn = delta.player
+        self.history = state.previous
+
+        return state
+
     def __commit_state(self, state):
         state.previous = self.history
 
@@ -414,6 +611,9 @@ class ScrabbleGame(object):
         """
         Check that all crosses created by the candidate move are valid. Calling
         this method will also update the score value of the candidate move.
+        While the cross grids are current, cross words are checked against
+        the cross sets and scored from the cross-scores rather than read off
+        the board.
 
         @return: 1 if crosses exist, 0 if no crosses, and -1 if
         invalid crosses exist
@@ -421,34 +621,74 @@ class ScrabbleGame(object):
         if not self.history:    # First turn, no crosses possible
             return 0
 
-        crosses = 0
+        # The cross sets only agree with the words of the lexicon if they
+        # were computed with its GADDAG
+        if self.crosses_current and self.gaddag is self.__lexicon_gaddag:
+            return self.__check_grid_crosses()
+
+        s_board = self.board
+        cross_words = []
+        score = 0
         for bpos in self.candidate.positions:
             x, y = bpos.pos
-            prefix = board.get_prefix(self.board, x, y, not self.candidate.horizontal)
-            suffix = board.get_suffix(self.board, x, y, not self.candidate.horizontal)
+            prefix = s_board.prefix(x, y, not self.candidate.horizontal)
+            suffix = s_board.suffix(x, y, not self.candidate.horizontal)
 
             cross = '%s%s%s' % (prefix, bpos.letter, suffix)
             if len(cross) > 1:
-                if cross.upper() not in self.lexicon_set:
-                    return -1
-
-                crosses = 1
-                subscore = 0
-
-                for l in prefix:
-                    subscore += letters.letter_scores.get(l, 0)
-                for l in suffix:
-                    subscore += letters.letter_scores.get(l, 0)
+                cross_words.append(cross)
+                subscore = face_value(prefix) + face_value(suffix)
 
                 letter_score = letters.letter_scores.get(bpos.letter, 0)
-                letter_multiplier = board.letter_multipliers.get(
-                    board.default_board[x][y], 1)
+                letter_multiplier = s_board.letter_multiplier(x, y)
 
                 subscore += letter_score * letter_multiplier
 
-                subscore *= board.word_multipliers.get(
-                    board.default_board[x][y], 1)
+                subscore *= s_board.word_multiplier(x, y)
+
+                score += subscore
 
-                self.candidate.score += subscore
+        if not cross_words:
+            return 0
+
+        # Check every cross word in one batch
+        if not all(self.is_words(cross_words)):
+            return -1
+
+        self.candidate.score += score
+        return 1
+
+    def __check_grid_crosses(self):
+        """
+        __check_crosses from the cross grids, which hold the cross sets and
+        cross-scores of the board before the move. Each placed tile is on a
+        line of its own across the move, so its square's entries give its
+        cross word.
+        """
+        if self.candidate.horizontal:
+            crosses, scores = self.vertical_crosses, self.vertical_cross_scores
+        else:
+            crosses, scores = self.horizontal_crosses, self.horizontal_cross_scores
+
+        s_board = self.board
+        found = False
+        score = 0
+        for bpos in self.candidate.positions:
+            x, y = bpos.pos
+            cross = scores[x][y]
+            if cross == NO_CROSS:
+                continue
+
+            if not crosses[x][y] & LETTER_BITS.get(bpos.letter.upper(), 0):
+                return -1
+            found = True
+
+            letter_score = letters.letter_scores.get(bpos.letter, 0)
+            subscore = cross + letter_score * s_board.letter_multiplier(x, y)
+            score += subscore * s_board.word_multiplier(x, y)
+
+        if not found:
+            return 0
 
-        return crosses
\ No newline at end of file
+        self.candidate.score += score
+        return 1
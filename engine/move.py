@@ -10,6 +10,8 @@ class Move(object):
         self.score = 0
 
         self.drawn = []
+        # Tiles put back in the bag, for an exchange
+        self.exchanged = []
 
     def add_letter(self, letter, pos):
         self.positions.append(BoardPosition(letter, pos))
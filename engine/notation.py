@@ -0,0 +1,202 @@
+__author__ = 'Jacky'
+
+import re
+from collections import namedtuple
+
+from engine import board
+from engine.bag import Bag
+from engine.game import StateNode
+from engine.zobrist import BLANK, RACK_TILES, TILE_INDEX
+from strategy.cross_sets import recompute_all_crosses
+
+# A position is written as six fields separated by spaces, in the spirit of
+# chess FEN:
+#   board:   the rows from the top, separated by '/', each giving its
+#            tiles (lowercase for a blank) with runs of empty squares as
+#            their length, e.g. '7BaD5'
+#   racks:   the rack of each player, separated by '/'
+#   bag:     the tiles in the bag
+#   turn:    the index of the player to move
+#   scores:  the score of each player, separated by '/'
+#   passes:  the number of consecutive passes and exchanges
+# Racks and the bag are written in alphabetical order, the blank being '?'
+# and last, with the number of copies after each tile held more than once,
+# e.g. 'AE3?2', or '-' when empty. A position therefore has exactly one
+# string, which can serve as a cache key. Premiums are those of
+# default_board and the lexicon is not part of the position.
+BLANK_SYMBOL = '?'
+EMPTY = '-'
+
+# Empty squares of Position.rows
+EMPTY_SQUARE = '.'
+
+_TILES = re.compile(r'([A-Z?])(\d*)')
+_TILES_FIELD = re.compile(r'^([A-Z?]\d*)+$')
+_ROW = re.compile(r'\d+|[A-Za-z]')
+_ROW_FIELD = re.compile(r'^(\d+|[A-Za-z])+$')
+
+# A parsed position: the rows of the board (a string per row, tiles as on
+# the board and EMPTY_SQUARE for empty squares), the racks and the bag as
+# strings of tiles (' ' for a blank), the player to move, the scores and
+# the number of passes
+Position = namedtuple('Position', 'rows, racks, bag, turn, scores, passes')
+
+
+def _tiles_string(counts):
+    """
+    Returns the notation of a multiset of tiles from its count vector,
+    indexed like RACK_TILES.
+    """
+    parts = []
+    for i, n in enumerate(counts):
+        if n:
+            parts.append(BLANK_SYMBOL if i == BLANK else RACK_TILES[i])
+            if n > 1:
+                parts.append(str(n))
+
+    return ''.join(parts) or EMPTY
+
+
+def _parse_tiles(field):
+    """
+    Returns the tiles written in a racks or bag field, ' ' being the blank.
+    """
+    if field == EMPTY:
+        return ''
+    if not _TILES_FIELD.match(field):
+        raise ValueError('Invalid tiles %r.' % field)
+
+    counts = [0] * len(RACK_TILES)
+    for symbol, n in _TILES.findall(field):
+        tile = ' ' if symbol == BLANK_SYMBOL else symbol
+        counts[TILE_INDEX[tile]] += int(n) if n else 1
+
+    return ''.join(tile * n for tile, n in zip(RACK_TILES, counts))
+
+
+def _row_string(line):
+    parts = []
+    empty = 0
+    for c in line:
+        if c in board.empty_locations:
+            empty += 1
+            continue
+        if empty:
+            parts.append(str(empty))
+            empty = 0
+        parts.append(c)
+    if empty:
+        parts.append(str(empty))
+
+    return ''.join(parts)
+
+
+def _parse_row(field, width):
+    if not _ROW_FIELD.match(field):
+        raise ValueError('Invalid board row %r.' % field)
+
+    row = ''.join(EMPTY_SQUARE * int(c) if c.isdigit() else c for c in _ROW.findall(field))
+    if len(row) != width:
+        raise ValueError('Board row %r is not %d squares long.' % (field, width))
+
+    return row
+
+
+def position_string(game):
+    """
+    Returns the notation of the current position of a game: its board,
+    racks, bag, player to move, scores and passes. Positions that are the
+    same have the same string, whatever the order of the tiles in racks.
+    """
+    s_board = game.board
+    rows = '/'.join(_row_string(s_board.line(x, True)) for x in xrange(s_board.height))
+    racks = '/'.join(_tiles_string(p.rack.counts) for p in game.players)
+    scores = '/'.join(str(p.score) for p in game.players)
+
+    return ' '.join((rows, racks, _tiles_string(game.bag.counts), str(game.current_turn),
+                     scores, str(game.passes)))
+
+
+def parse_position(text):
+    """
+    Parse the notation of a position, see position_string.
+
+    Returns:
+        The Position.
+    """
+    fields = text.split()
+    if len(fields) != 6:
+        raise ValueError('A position has 6 fields, not %d.' % len(fields))
+
+    board_field, racks_field, bag_field, turn, scores, passes = fields
+    lines = board_field.split('/')
+    width = len(board.default_board[0])
+    if len(lines) != len(board.default_board):
+        raise ValueError('The board has %d rows, not %d.' % (len(lines), len(board.default_board)))
+
+    rows = tuple(_parse_row(line, width) for line in lines)
+    racks = tuple(_parse_tiles(rack) for rack in racks_field.split('/'))
+    try:
+        scores = tuple(int(score) for score in scores.split('/'))
+        turn, passes = int(turn), int(passes)
+    except ValueError:
+        raise ValueError('Invalid turn, scores or passes in %r.' % text)
+
+    if len(scores) != len(racks):
+        raise ValueError('There are %d racks but %d scores.' % (len(racks), len(scores)))
+    if not 0 <= turn < len(racks):
+        raise ValueError('Player %d to move is not in the game.' % turn)
+
+    return Position(rows, racks, _parse_tiles(bag_field), turn, scores, passes)
+
+
+def load_position(game, text, crosses=False):
+    """
+    Set up a new game in a position.
+
+    Parameters:
+        game:
+            A new engine.game.ScrabbleGame, with no players, on the default
+            board. Players named 'Player 1' and so on are added.
+        text:
+            The notation of the position, see position_string.
+        crosses:
+            True to compute the cross sets and cross-scores of the position
+            (see recompute_all_crosses), which move generation needs.
+
+    Returns:
+        The Position loaded.
+    """
+    if game.players or game.game_started:
+        raise ValueError('Positions can only be loaded in a new game.')
+
+    position = parse_position(text)
+    if (game.board.height, game.board.width) != (len(position.rows), len(position.rows[0])):
+        raise ValueError('Board size does not match the position.')
+
+    for i, (rack, score) in enumerate(zip(position.racks, position.scores)):
+        if not game.add_player('Player %d' % (i + 1)):
+            raise ValueError('Too many players in position.')
+        game.players[i].rack = list(rack)
+        game.players[i].score = score
+
+    for x, row in enumerate(position.rows):
+        for y, c in enumerate(row):
+            if c != EMPTY_SQUARE:
+                game.board.set(x, y, c)
+    if game.board.occupied:
+        # The game is past its first move, though its turns are unknown
+        game.history = StateNode(None)
+
+    game.bag = Bag(position.bag, game.rng)
+    game.current_turn = position.turn
+    game.passes = position.passes
+    game.game_over = game.passes >= 6 or (not position.bag and not all(position.racks))
+    game.game_started = True
+
+    # The tiles were set on the board directly, so the grids are stale
+    game.crosses_current = False
+    if crosses:
+        recompute_all_crosses(game)
+
+    return position
@@ -1,15 +1,31 @@
 __author__ = 'Jacky'
 
-from collections import Counter
+from engine.zobrist import BLANK, KeyedTiles, TILE_INDEX
 
 
 class Player(object):
-    def __init__(self, name):
+    def __init__(self, name, index=0):
+        """
+        Create a player. index is the player's seat in the game, which keys
+        the rack (see engine.zobrist) so that racks of different players
+        hash differently.
+        """
         self.name = name
+        self.index = index
 
         self.score = 0
         self.rack = []
 
+    @property
+    def rack(self):
+        return self._rack
+
+    @rack.setter
+    def rack(self, value):
+        # Racks are kept as KeyedTiles, maintaining their Zobrist key
+        if value is not getattr(self, '_rack', None):
+            self._rack = KeyedTiles(value, self.index)
+
     def valid_play(self, letters):
         """
         Returns the way the given letters to be played are played from the
@@ -21,22 +37,23 @@ class Player(object):
         possible letter.
         """
         llist = list(letters)
-        counter = dict(Counter(self.rack))
+        counts = self.rack.counts[:]
 
         for i, letter in enumerate(letters):
-            if not counter.get(letter, 0) and not counter.get(' ', 0):
-                return []
-            elif not counter.get(letter, 0) and counter[' ']:   # Use a blank
-                counter[' '] -= 1
+            j = TILE_INDEX.get(letter)
+            if j is not None and counts[j]:     # Letter exists on the rack
+                counts[j] -= 1
+            elif counts[BLANK]:     # Use a blank
+                counts[BLANK] -= 1
                 llist[i] = llist[i].lower()
-            else:   # Letter exists on the rack
-                counter[letter] -= 1
+            else:
+                return []
 
         return llist
 
     def use_letters(self, letters):
-        for i, letter in enumerate(letters):
-            if letter not in self.rack:
-                self.rack.pop(self.rack.index(' '))
-            else:
-                self.rack.pop(self.rack.index(letter))
+        rack = self.rack
+        counts = rack.counts
+        for letter in letters:
+            j = TILE_INDEX.get(letter)
+            rack.remove(letter if j is not None and counts[j] else ' ')
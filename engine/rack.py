@@ -0,0 +1,78 @@
+__author__ = 'Jacky'
+
+from engine.zobrist import BLANK, RACK_TILES, TILE_INDEX
+
+
+class Rack(object):
+    """
+    The tiles of a rack as a count per tile (RACK_TILES order, the blank
+    last), for move generation: a tile is taken and returned in place with
+    take and put, so a search can walk down and back up without copying
+    the rack.
+
+    mask has bit i set while the ith letter of the alphabet is on the rack
+    (as in lexicon.letter_masks), so the letters that can go on a square are
+    rack.mask & cross_set. The blank has no bit; see blanks.
+    """
+
+    __slots__ = ('counts', 'mask', 'total')
+
+    def __init__(self, tiles=()):
+        """
+        Create a rack holding the given tiles, ' ' being the blank.
+        """
+        self.counts = [0] * len(RACK_TILES)
+        self.mask = 0
+        self.total = 0
+        for tile in tiles:
+            self.put(TILE_INDEX[tile])
+
+    @classmethod
+    def from_counts(cls, counts):
+        """
+        Create a rack from a count vector, such as KeyedTiles.counts.
+        """
+        rack = cls.__new__(cls)
+        rack.counts = list(counts)
+        rack.total = sum(counts)
+        rack.mask = 0
+        for i in xrange(BLANK):
+            if counts[i]:
+                rack.mask |= 1 << i
+        return rack
+
+    def take(self, i):
+        """
+        Take a copy of the tile with index i off the rack. The rack must
+        hold one.
+        """
+        n = self.counts[i] - 1
+        self.counts[i] = n
+        self.total -= 1
+        if not n and i != BLANK:
+            self.mask &= ~(1 << i)
+
+    def put(self, i):
+        """
+        Put a copy of the tile with index i (back) on the rack.
+        """
+        self.counts[i] += 1
+        self.total += 1
+        if i != BLANK:
+            self.mask |= 1 << i
+
+    @property
+    def blanks(self):
+        return self.counts[BLANK]
+
+    def tiles(self):
+        """
+        Returns the tiles on the rack as a list, in RACK_TILES order.
+        """
+        return [tile for tile, n in zip(RACK_TILES, self.counts) for _ in xrange(n)]
+
+    def __len__(self):
+        return self.total
+
+    def __contains__(self, tile):
+        return self.counts[TILE_INDEX[tile]] > 0 if tile in TILE_INDEX else False
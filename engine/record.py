@@ -0,0 +1,390 @@
+__author__ = 'Jacky'
+
+import struct
+from collections import deque, namedtuple
+
+from engine.bag import Bag
+from engine.board import BoardPosition
+from engine.game import MoveTypes
+from engine.move import Move
+from engine.scoring import score_move
+from engine.zobrist import BLANK, RACK_TILES, TILE_INDEX
+from lexicon.letter_masks import ALPHABET
+
+# Record layout, integers little-endian:
+#   magic 'SGRC', format version, flags, board height, board width, seed
+#   player count, then for each player: name length, UTF-8 name, rack
+#       length, rack tiles
+#   count of each tile in the bag after the racks were dealt (27 bytes)
+#   turns, up to the end of the record
+#
+# Tiles in racks, draws and exchanges take a byte each, their index in
+# RACK_TILES. A turn starts with a byte holding its MoveTypes action in
+# the top two bits and, for a placed move, a direction bit and the number
+# of tiles, or for an exchange the number of tiles:
+#   placed:   action | horizontal | count, the square of the first tile
+#             (x * width + y), the tiles (alphabet index, 0x20 set for a
+#             blank), then the tiles drawn
+#   pass:     action
+#   exchange: action | count, the tiles put back, then the tiles drawn
+# The number of tiles drawn is not stored, as it follows from the number
+# of tiles left in the bag.
+MAGIC = 'SGRC'
+FORMAT_VERSION = 1
+
+HEADER = struct.Struct('<4sBBBBq')
+LENGTH = struct.Struct('<I')
+
+SEEDED = 0x01
+BLANK_TILE = 0x20
+HORIZONTAL = 0x20
+COUNT_MASK = 0x1F
+
+LETTER_INDEX = {letter: i for i, letter in enumerate(ALPHABET)}
+
+# A game as recorded: the seed, board size, player names, racks dealt and
+# bag at the start of the game, and its Turns
+GameRecord = namedtuple('GameRecord', 'seed, height, width, names, racks, bag, turns')
+
+# A turn: its MoveTypes action, the tiles placed (lowercase for blanks) or
+# put back in the bag, the square of the first tile and direction of a
+# placed move, and the tiles drawn
+Turn = namedtuple('Turn', 'action, tiles, pos, horizontal, drawn')
+
+
+class ReplayBag(Bag):
+    """
+    A bag that draws the tiles it is told to rather than random ones, to
+    replay a recorded game. Each draw takes the next entry of draws, which
+    must be as many tiles as the bag would draw and be in the bag.
+    """
+
+    def __init__(self, tiles=(), rng=None):
+        super(ReplayBag, self).__init__(tiles, rng)
+        self.draws = deque()
+
+    def draw(self, count=1):
+        if not self.draws:
+            raise ValueError('No recorded draw left.')
+
+        tiles = self.draws.popleft()
+        if len(tiles) != min(count, self.total):
+            raise ValueError('Recorded draw %r does not draw %d tiles.'
+                             % (tiles, min(count, self.total)))
+
+        self.take(tiles)
+        return list(tiles)
+
+    def snapshot(self):
+        # Draws don't depend on the generator, so its state isn't kept
+        return tuple(self.counts), None
+
+
+def _rack_codes(tiles):
+    return [TILE_INDEX[tile] for tile in tiles]
+
+
+def _rack_tiles(data, start, count):
+    return ''.join(RACK_TILES[c] for c in data[start:start + count])
+
+
+def _start_position(game, states):
+    """
+    Returns the racks and bag counts at the start of a game, before its
+    first turn.
+    """
+    racks = [p.rack[:] for p in game.players]
+    bag = game.bag.counts[:]
+
+    # Nothing but its own turns changes a rack, so each player's rack
+    # before their first turn is the one they were dealt
+    seen = set()
+    for state in states:
+        if state.delta.player not in seen:
+            seen.add(state.delta.player)
+            racks[state.delta.player] = state.delta.rack
+    if states:
+        bag = list(states[0].delta.bag[0])
+
+    return racks, bag
+
+
+def encode_game(game):
+    """
+    Encode a game, from the deal to its current turn, as a game record.
+
+    Parameters:
+        game:
+            The engine.game.ScrabbleGame to encode. Every turn in its
+            history must have been played by it (so that it has a
+            MoveDelta), and its seed must be None or a 64-bit integer.
+
+    Returns:
+        The record as a string of bytes, see decode_game.
+    """
+    seed = game.seed
+    if seed is not None and not (isinstance(seed, (int, long)) and -2 ** 63 <= seed < 2 ** 63):
+        raise ValueError('Seed %r cannot be recorded.' % (seed,))
+
+    height, width = game.board.height, game.board.width
+    if height * width > 256:
+        raise ValueError('Boards of more than 256 squares cannot be recorded.')
+
+    states = []
+    state = game.history
+    while state is not None:
+        if state.delta is None:
+            raise ValueError('Game history has turns that were not played by the game.')
+        states.append(state)
+        state = state.previous
+    states.reverse()
+
+    racks, bag = _start_position(game, states)
+
+    data = bytearray(HEADER.pack(MAGIC, FORMAT_VERSION, SEEDED if seed is not None else 0,
+                                 height, width, seed or 0))
+    data.append(len(game.players))
+    for p, rack in zip(game.players, racks):
+        name = p.name.encode('utf-8')
+        data.append(len(name))
+        data.extend(name)
+        data.append(len(rack))
+        data.extend(_rack_codes(rack))
+    data.extend(bag)
+
+    for state in states:
+        m = state.move
+        if state.action == MoveTypes.Placed:
+            x, y = m.positions[0].pos
+            data.append(MoveTypes.Placed << 6 | (HORIZONTAL if m.horizontal else 0) | len(m.positions))
+            data.append(x * width + y)
+            for bpos in m.positions:
+                letter = bpos.letter
+                data.append(LETTER_INDEX[letter.upper()] | (BLANK_TILE if letter.islower() else 0))
+            data.extend(_rack_codes(m.drawn))
+        elif state.action == MoveTypes.Pass:
+            data.append(MoveTypes.Pass << 6)
+        elif state.action == MoveTypes.Exchange:
+            data.append(MoveTypes.Exchange << 6 | len(m.exchanged))
+            data.extend(_rack_codes(m.exchanged))
+            data.extend(_rack_codes(m.drawn))
+
+    return str(data)
+
+
+def decode_game(data):
+    """
+    Decode a game record made by encode_game.
+
+    Parameters:
+        data:
+            The record, as a string of bytes.
+
+    Returns:
+        The GameRecord.
+    """
+    if len(data) < HEADER.size:
+        raise IOError('Game record is truncated.')
+    magic, version, flags, height, width, seed = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise IOError('Data is not a game record.')
+    if version != FORMAT_VERSION:
+        raise IOError('Game record has format version %d, expected %d.' % (version, FORMAT_VERSION))
+
+    data = bytearray(data)
+    try:
+        i = HEADER.size
+        names, racks = [], []
+        players = data[i]
+        i += 1
+        for _ in xrange(players):
+            n = data[i]
+            names.append(data[i + 1:i + 1 + n].decode('utf-8'))
+            i += 1 + n
+            n = data[i]
+            racks.append(_rack_tiles(data, i + 1, n))
+            i += 1 + n
+
+        bag = tuple(data[i:i + len(RACK_TILES)])
+        if len(bag) != len(RACK_TILES):
+            raise IndexError
+        i += len(RACK_TILES)
+        left = sum(bag)
+
+        turns = []
+        while i < len(data):
+            head = data[i]
+            action, count = head >> 6, head & COUNT_MASK
+            if action == MoveTypes.Placed:
+                pos = divmod(data[i + 1], width)
+                tiles = ''.join(ALPHABET[c & ~BLANK_TILE].lower() if c & BLANK_TILE
+                                else ALPHABET[c] for c in data[i + 2:i + 2 + count])
+                drawn = min(count, left)
+                left -= drawn
+                i += 2 + count
+                turns.append(Turn(action, tiles, pos, bool(head & HORIZONTAL),
+                                  _rack_tiles(data, i, drawn)))
+                i += drawn
+            elif action == MoveTypes.Pass:
+                turns.append(Turn(action, '', None, None, ''))
+                i += 1
+            elif action == MoveTypes.Exchange:
+                turns.append(Turn(action, _rack_tiles(data, i + 1, count), None, None,
+                                  _rack_tiles(data, i + 1 + count, count)))
+                i += 1 + 2 * count
+            else:
+                raise IOError('Game record has an invalid turn.')
+        if i != len(data):
+            raise IndexError
+    except IndexError:
+        raise IOError('Game record is truncated or corrupt.')
+
+    return GameRecord(seed if flags & SEEDED else None, height, width, names, racks, bag, turns)
+
+
+def write_game(stream, game):
+    """
+    Append the record of a game to a binary stream, prefixed with its
+    length so that read_games can read records back one after the other.
+    """
+    data = encode_game(game)
+    stream.write(LENGTH.pack(len(data)))
+    stream.write(data)
+
+
+def read_games(stream):
+    """
+    Yields the GameRecords of the records in a binary stream written with
+    write_game, reading one record at a time.
+    """
+    while True:
+        prefix = stream.read(LENGTH.size)
+        if not prefix:
+            return
+        if len(prefix) < LENGTH.size:
+            raise IOError('Game record stream is truncated.')
+
+        length, = LENGTH.unpack(prefix)
+        data = stream.read(length)
+        if len(data) < length:
+            raise IOError('Game record stream is truncated.')
+
+        yield decode_game(data)
+
+
+def _replay_move(game, tiles, pos, horizontal, crosses):
+    """
+    Play a recorded move like ScrabbleGame.make_move, but without looking up
+    its words. The tiles (lowercase for blanks, as recorded) must still be
+    on the rack and fit on the board, skipping the squares already taken,
+    and the move must touch a tile already on the board, or cover the centre
+    square with more than one tile on the first move. It is scored with
+    engine.scoring.score_move.
+
+    Returns:
+        True if the move was played, False if it cannot be, in which case
+        the game is unchanged.
+    """
+    s_board = game.board
+    x, y = pos
+    if game.game_over or game.candidate is not None or not tiles or \
+            not (0 <= x < s_board.height and 0 <= y < s_board.width):
+        return False
+
+    counts = game.players[game.current_turn].rack.counts
+    needed = [0] * len(RACK_TILES)
+    for tile in tiles:
+        i = TILE_INDEX[tile] if tile.isupper() else BLANK
+        needed[i] += 1
+        if needed[i] > counts[i]:
+            return False
+
+    if horizontal:
+        occupied, j, length = s_board.occupied_rows[x], y, s_board.width
+    else:
+        occupied, j, length = s_board.occupied_columns[y], x, s_board.height
+    squares = []
+    for _ in tiles:
+        while occupied >> j & 1:
+            j += 1
+        if j >= length:
+            return False
+        squares.append((x, j) if horizontal else (j, y))
+        j += 1
+
+    if s_board.occupied:
+        connected = any(s_board.anchor_rows[sx] >> sy & 1 for sx, sy in squares)
+    else:
+        # The centre square, as in validate_candidate
+        connected = len(squares) > 1 and (7, 7) in squares
+    if not connected:
+        return False
+
+    candidate = Move()
+    candidate.horizontal = horizontal
+    candidate.positions = map(BoardPosition, tiles, squares)
+    x, y = squares[0]
+    candidate.score = score_move(s_board, tiles, x, y, horizontal)
+    for tile, (x, y) in zip(tiles, squares):
+        s_board.set(x, y, tile)
+
+    game.candidate = candidate
+    return game.commit_candidate(crosses)
+
+
+def replay(record, game, crosses=False, validate=False):
+    """
+    Replay a recorded game through the engine, one turn at a time.
+
+    Parameters:
+        record:
+            The GameRecord to replay.
+        game:
+            A new engine.game.ScrabbleGame, with no players, to replay the
+            game in. Its players are added and dealt the recorded racks,
+            and its bag draws the recorded tiles.
+        crosses:
+            True to maintain the cross sets as the game is replayed, see
+            ScrabbleGame.commit_candidate.
+        validate:
+            True to validate every move as it is played. By default the
+            words of moves are trusted and not looked up, which is much
+            faster, see _replay_move.
+
+    Yields:
+        Each Turn of the record, after it has been played in game.
+    """
+    if game.players or game.game_started:
+        raise ValueError('Games can only be replayed in a new game.')
+    if (game.board.height, game.board.width) != (record.height, record.width):
+        raise ValueError('Board size does not match the record.')
+
+    for name, rack in zip(record.names, record.racks):
+        game.add_player(name)
+        game.players[-1].rack = list(rack)
+    bag = ReplayBag(''.join(tile * n for tile, n in zip(RACK_TILES, record.bag)), game.rng)
+    game.bag = bag
+    game.seed = record.seed
+    game.game_started = True
+
+    for i, turn in enumerate(record.turns):
+        if turn.action == MoveTypes.Placed:
+            bag.draws.append(turn.drawn)
+            if validate:
+                # The rack assigns blanks the way it did when the move was
+                # first played
+                played = game.make_move(turn.tiles.upper(), turn.pos, turn.horizontal, crosses)
+                played = played and \
+                    ''.join(bp.letter for bp in game.history.move.positions) == turn.tiles
+            else:
+                played = _replay_move(game, turn.tiles, turn.pos, turn.horizontal, crosses)
+        elif turn.action == MoveTypes.Pass:
+            played = game.pass_turn()
+        else:
+            bag.draws.append(turn.drawn)
+            played = game.exchange_tiles(turn.tiles)
+
+        if not played or bag.draws:
+            raise ValueError('Turn %d of the record cannot be replayed.' % i)
+
+        yield turn
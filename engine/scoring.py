@@ -0,0 +1,125 @@
+__author__ = 'Jacky'
+
+from engine import board
+from engine.letters import letter_scores
+
+# Face value of each character code; blanks (lowercase) and premium
+# symbols are worth nothing
+TILE_SCORES = [letter_scores.get(chr(c), 0) for c in xrange(256)]
+
+# Cross-score of a square that no perpendicular word passes through
+NO_CROSS = -1
+
+BINGO_TILES = 7
+BINGO_BONUS = 50
+
+
+def face_value(letters):
+    """
+    Returns the sum of the face values of a string of tiles.
+    """
+    return sum(map(TILE_SCORES.__getitem__, bytearray(letters)))
+
+
+def cross_score(s_board, x, y, horizontal):
+    """
+    Returns the sum of the face values of the tiles of the horizontal (or
+    vertical) word that a tile placed on square (x, y) would join, or
+    NO_CROSS if the square is occupied or has no tile next to it in that
+    direction.
+    """
+    if isinstance(s_board, board.Board):
+        if s_board.occupied >> (x * s_board.width + y) & 1:
+            return NO_CROSS
+        prefix = s_board.prefix(x, y, horizontal)
+        suffix = s_board.suffix(x, y, horizontal)
+    elif s_board[x][y] not in board.empty_locations:
+        return NO_CROSS
+    else:
+        prefix = board.get_prefix(s_board, x, y, horizontal)
+        suffix = board.get_suffix(s_board, x, y, horizontal)
+    if not prefix and not suffix:
+        return NO_CROSS
+
+    return face_value(prefix) + face_value(suffix)
+
+
+def score_move(s_board, tiles, x, y, horizontal, cross_scores=None):
+    """
+    Score a move without placing it on the board, the way
+    ScrabbleGame.validate_candidate does: the main word with its premiums,
+    each cross word formed by a placed tile, and the bingo bonus. The move
+    is assumed to be legal, so no word is looked up.
+
+    Parameters:
+        s_board:
+            The engine.board.Board to play on. It is not changed.
+        tiles:
+            The tiles to place, in order, lowercase for blanks (see
+            Player.valid_play).
+        x:
+            x-coordinate (0-based row) of the first tile.
+        y:
+            y-coordinate (0-based column) of the first tile.
+        horizontal:
+            True if the move is horizontal, False if it is vertical.
+        cross_scores:
+            Optional grid of the cross-scores of the perpendicular words
+            (vertical ones for a horizontal move, see cross_score), kept up to
+            date with the board.
+            Cross words are then scored without reading them off the board.
+
+    Returns:
+        The score of the move.
+    """
+    if horizontal:
+        line, offset, j = s_board.tiles, x * s_board.width, y
+    else:
+        line, offset, j = s_board.tiles_t, y * s_board.height, x
+    occupied = s_board.occupied_rows[x] if horizontal else s_board.occupied_columns[y]
+    letter_mult, word_mult = s_board.letter_mult, s_board.word_mult
+    width = s_board.width
+    # Occupancy of the lines across the move, by the coordinate along it,
+    # and the square of the move on each of them
+    across = s_board.occupied_columns if horizontal else s_board.occupied_rows
+    fixed = x if horizontal else y
+
+    prefix = s_board.prefix(x, y, horizontal)
+    main = face_value(prefix)
+    multiplier = 1
+    crosses = 0
+    for tile in tiles:
+        # Tiles on the board between placed tiles count at face value
+        while occupied >> j & 1:
+            main += TILE_SCORES[line[offset + j]]
+            j += 1
+
+        tx, ty = (x, j) if horizontal else (j, y)
+        i = tx * width + ty
+        value = TILE_SCORES[ord(tile)] * letter_mult[i]
+        main += value
+        multiplier *= word_mult[i]
+
+        if cross_scores is not None:
+            cross = cross_scores[tx][ty]
+        elif not across[j] << 1 >> fixed & 5:
+            # No tile on either side across the move
+            cross = NO_CROSS
+        else:
+            cross = cross_score(s_board, tx, ty, not horizontal)
+        if cross != NO_CROSS:
+            crosses += (cross + value) * word_mult[i]
+        j += 1
+
+    last = (x, j - 1) if horizontal else (j - 1, y)
+    suffix = s_board.suffix(last[0], last[1], horizontal)
+    main = (main + face_value(suffix)) * multiplier
+
+    # A single tile forming no word in the direction of the move only
+    # scores its cross word
+    if len(prefix) + j - (y if horizontal else x) + len(suffix) == 1:
+        main = 0
+    if len(tiles) >= BINGO_TILES:
+        main += BINGO_BONUS
+
+    return main + crosses
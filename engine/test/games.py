@@ -0,0 +1,31 @@
+__author__ = 'Jacky'
+
+from engine.game import ScrabbleGame
+from lexicon.test.managers import temp_manager
+
+WORDLIST = './wordlists/test_list1.txt'
+
+
+def new_game(wordlist=WORDLIST, bag=None, **kwargs):
+    """
+    Returns a started ScrabbleGame between Bob and Jane, with its lexicon
+    from the test manager.
+
+    Parameters:
+        wordlist:
+            The wordlist of the game, test_list1 by default.
+        bag:
+            The tiles to put in the bag before the racks are dealt, e.g.
+            'ABCDE' * 4 for the letters test_list1 has words of. By default
+            the bag is the full, shuffled set of tiles.
+        kwargs:
+            Other arguments of ScrabbleGame, e.g. seed or read_gaddag.
+    """
+    game = ScrabbleGame(wordlist, lexicon_manager=temp_manager, **kwargs)
+    if bag is not None:
+        game.bag = list(bag)
+    game.add_player('Bob')
+    game.add_player('Jane')
+    game.start_game()
+
+    return game
@@ -0,0 +1,103 @@
+__author__ = 'Jacky'
+
+import random
+import unittest
+
+from collections import Counter
+
+from engine.bag import Bag
+from engine.game import ScrabbleGame
+from engine.letters import default_bag
+from lexicon.test.managers import temp_manager
+
+
+class TestBag(unittest.TestCase):
+    def setUp(self):
+        self.bag = Bag(default_bag, random.Random(0))
+
+    def test_contents(self):
+        self.assertEqual(len(default_bag), len(self.bag))
+        self.assertEqual(Counter(default_bag), Counter(self.bag))
+        self.assertEqual(2, self.bag.count(' '))
+        self.assertIn('Q', self.bag)
+        self.assertNotIn('q', self.bag)
+
+    def test_draw(self):
+        drawn = self.bag.draw(7)
+        self.assertEqual(7, len(drawn))
+        self.assertEqual(len(default_bag) - 7, len(self.bag))
+        self.assertEqual(Counter(default_bag), Counter(list(self.bag) + drawn))
+
+        rest = self.bag.draw(200)
+        self.assertEqual(len(default_bag) - 7, len(rest))
+        self.assertEqual(0, len(self.bag))
+        self.assertEqual([], self.bag.draw())
+
+    def test_seeded(self):
+        same = Bag(default_bag, random.Random(0))
+        self.assertEqual(self.bag.draw(20), same.draw(20))
+
+        # A copy draws what the original would, independently of it
+        copy = self.bag.copy()
+        self.assertEqual(copy.draw(5), self.bag.draw(5))
+        copy.draw(5)
+        self.assertNotEqual(copy, self.bag)
+
+    def test_exchange(self):
+        bag = Bag('AAAA', random.Random(0))
+        self.assertEqual(['A', 'A'], bag.exchange('ZZ'))
+        self.assertEqual(Counter('AAZZ'), Counter(bag))
+
+        bag.take('ZA')
+        self.assertEqual(Counter('AZ'), Counter(bag))
+        self.assertRaises(ValueError, bag.take, 'ZZ')
+        self.assertEqual(Counter('AZ'), Counter(bag))
+
+    def test_snapshot(self):
+        snapshot = self.bag.snapshot()
+        key = self.bag.key
+        drawn = self.bag.draw(10)
+        self.bag.put('ZZ')
+
+        self.bag.restore(snapshot)
+        self.assertEqual(key, self.bag.key)
+        self.assertEqual(Bag(default_bag), self.bag)
+        self.assertEqual(drawn, self.bag.draw(10))
+
+    def test_put_take(self):
+        before = Bag(list(self.bag))
+        self.bag.put(tile for tile in 'QZ ')
+        self.assertEqual(len(default_bag) + 3, len(self.bag))
+        self.assertEqual(2, self.bag.count('Q'))
+
+        self.bag.take(tile for tile in 'QZ ')
+        self.assertEqual(before, self.bag)
+        self.assertEqual(before.key, self.bag.key)
+
+        # Invalid tiles leave the bag unchanged
+        for tiles in ('AB?', 'Aa', 'Z' * 100):
+            self.assertRaises(ValueError, self.bag.put, tiles)
+            self.assertEqual(before, self.bag)
+            self.assertEqual(before.total, self.bag.total)
+            self.assertEqual(before.key, self.bag.key)
+        self.assertRaises(ValueError, self.bag.take, 'QQ')
+        self.assertRaises(ValueError, self.bag.take, 'A?')
+        self.assertEqual(before, self.bag)
+
+    def test_key(self):
+        self.bag.draw(30)
+        self.bag.put('  Q')
+        self.assertEqual(Bag(list(self.bag)).key, self.bag.key)
+
+
+class TestGameBag(unittest.TestCase):
+    def test_seeded_games(self):
+        games = [ScrabbleGame(seed=3, lexicon_manager=temp_manager) for _ in xrange(2)]
+        for game in games:
+            game.add_player('Bob')
+            game.add_player('Jane')
+            game.start_game()
+
+        self.assertEqual(games[0].players[1].rack, games[1].players[1].rack)
+        self.assertEqual(games[0].bag, games[1].bag)
+        self.assertEqual(games[0].position_key(), games[1].position_key())
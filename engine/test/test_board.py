@@ -1,6 +1,9 @@
 __author__ = 'Jacky'
 
+import random
 import unittest
+from copy import deepcopy
+
 from engine.board import *
 
 
@@ -101,6 +104,150 @@ class TestPrefixSuffix(unittest.TestCase):
         self.assertEqual('BB', get_suffix(board, 2, 2, False))
 
 
+class TestBoardClass(unittest.TestCase):
+    def setUp(self):
+        self.board = Board()
+
+    def test_default(self):
+        self.assertEqual(default_board, self.board)
+        self.assertEqual(15, len(self.board))
+        self.assertEqual(15, len(self.board[0]))
+        self.assertEqual('#', self.board[0][0])
+        self.assertEqual('*', self.board[7][7])
+        self.assertEqual(0, self.board.occupied)
+
+        self.assertEqual(3, self.board.word_multiplier(0, 0))
+        self.assertEqual(2, self.board.word_multiplier(7, 7))
+        self.assertEqual(1, self.board.letter_multiplier(7, 7))
+        self.assertEqual(3, self.board.letter_multiplier(1, 5))
+        self.assertEqual(2, self.board.letter_multiplier(0, 3))
+
+    def test_set_clear(self):
+        self.board[7][7] = 'A'
+        self.board.set(7, 8, 'b')
+
+        self.assertEqual('A', self.board[7][7])
+        self.assertEqual('b', self.board[7][8])
+        self.assertEqual([0, 1], list(self.board.blanks[7 * 15 + 7:7 * 15 + 9]))
+        self.assert_(not self.board.is_empty(7, 7))
+        self.assertEqual(0b11 << (7 * 15 + 7), self.board.occupied)
+        self.assertNotEqual(default_board, self.board)
+
+        # Premiums are kept under tiles
+        self.assertEqual(2, self.board.word_multiplier(7, 7))
+        self.board[7][7] = '*'
+        self.board.clear(7, 8)
+        self.assertEqual(default_board, self.board)
+        self.assertEqual(0, self.board.occupied)
+        self.assertEqual(0, sum(self.board.blanks))
+
+    def test_layout(self):
+        rows = [list('A.2'), list('.#b')]
+        board = Board(rows)
+
+        self.assertEqual(rows, board.rows())
+        self.assertEqual(rows, board)
+        self.assertEqual((2, 3), (board.height, board.width))
+        self.assertEqual(0b100001, board.occupied)
+        self.assertEqual(2, board.letter_multiplier(0, 2))
+        self.assertEqual(3, board.word_multiplier(1, 1))
+
+        # A tile's square takes the default premium when removed
+        board.clear(0, 0)
+        self.assertEqual('#', board[0][0])
+
+    def test_copy(self):
+        self.board[7][7] = 'A'
+        for board in (self.board.copy(), deepcopy(self.board)):
+            board[7][8] = 'B'
+            self.assertEqual('.', self.board[7][8])
+            self.assertEqual('A', board[7][7])
+            self.assert_(board.letter_mult is self.board.letter_mult)
+
+    def test_adjacent(self):
+        board = Board([list('A....'), list('....B'), list('.....')])
+        expected = Board([list('.X..X'), list('X..X.'), list('....X')]).occupied
+        self.assertEqual(expected, board.adjacent())
+
+        self.assertEqual(0b01001, board.line_bits(board.adjacent(), 1, True))
+        self.assertEqual(0b010, board.line_bits(board.adjacent(False), 0, False))
+        self.assertEqual(0b101, board.line_bits(board.adjacent(False), 4, False))
+
+    def test_anchors(self):
+        rng = random.Random(0)
+        board = Board([list('......')] * 5)
+        for _ in xrange(200):
+            x, y = rng.randrange(5), rng.randrange(6)
+            if rng.random() < 0.6:
+                board.set(x, y, rng.choice('AB'))
+            else:
+                board.clear(x, y)
+
+            for x in xrange(5):
+                self.assertEqual(board.line_bits(board.adjacent(), x, True),
+                                 board.anchors(x, True))
+            for y in xrange(6):
+                self.assertEqual(board.line_bits(board.adjacent(False), y, False),
+                                 board.anchors(y, False))
+
+        copy = board.copy()
+        copy.clear(x, y)
+        copy.set(0, 0, 'A')
+        self.assertEqual(board.line_bits(board.adjacent(), 0, True), board.anchors(0, True))
+
+    def test_extent(self):
+        board = Board([list('AB.CD'), list('..E..'), list('.F...')])
+        self.assertEqual((0, 2, 'AB'), board.word(0, 1, True))
+        self.assertEqual((0, 5, 'AB.CD'), board.word(0, 2, True))
+        self.assertEqual((3, 5), board.extent(0, 4, True))
+        self.assertEqual((1, 3, '.E'), board.word(1, 1, True))
+        self.assertEqual((0, 3, 'B.F'), board.word(1, 1, False))
+        self.assertEqual((0, 2, '.E'), board.word(0, 2, False))
+        self.assertEqual((1, 3), board.extent(2, 2, False))
+
+        board.clear(1, 2)
+        self.assertEqual((2, 3), board.extent(1, 2, True))
+        self.assertEqual((0, 1, '.'), board.word(0, 2, False))
+        self.assertEqual('', board.suffix(0, 2, False))
+        self.assertEqual('B', board.prefix(1, 1, False))
+
+    def test_transposed(self):
+        board = Board([list('A.2'), list('.#b')])
+        self.assertEqual('A.', board.line(0, False))
+        self.assertEqual('2b', board.line(2, False))
+        self.assertEqual('.#b', board.line(1, True))
+        self.assertEqual(0b100001, board.occupied_t)
+
+        board.set(0, 1, 'C')
+        board.clear(1, 2)
+        self.assertEqual('C#', board.line(1, False))
+        self.assertEqual('2.', board.line(2, False))
+        self.assertEqual(0b000101, board.occupied_t)
+
+        copy = board.copy()
+        copy.set(1, 0, 'D')
+        self.assertEqual('AD', copy.line(0, False))
+        self.assertEqual('A.', board.line(0, False))
+
+    def test_prefix_suffix(self):
+        rng = random.Random(0)
+        for _ in xrange(20):
+            rows = [[rng.choice('AB...') for _ in xrange(6)] for _ in xrange(5)]
+            board = Board(rows)
+            for x in xrange(5):
+                for y in xrange(6):
+                    for horizontal in (True, False):
+                        self.assertEqual(get_prefix(rows, x, y, horizontal),
+                                         get_prefix(board, x, y, horizontal))
+                        self.assertEqual(get_suffix(rows, x, y, horizontal),
+                                         get_suffix(board, x, y, horizontal))
+
+        board = Board([list('AB.'), list('C.D')])
+        self.assertEqual('AB.', board.letters(0, 0, 3, True))
+        self.assertEqual('.D', board.letters(1, 1, 2, True))
+        self.assertEqual('B.', board.letters(0, 1, 2, False))
+
+
 class TestBoardPosition(unittest.TestCase):
     def test_equality(self):
         a = BoardPosition('A', (0, 1))
@@ -8,12 +8,15 @@ from engine.game import ScrabbleGame, MoveTypes
 from engine import board, move
 from engine.letters import default_bag
 
+from engine.test.games import new_game
 from engine.test.scenario import parse_scenario
+from strategy.strategies import StaticScoreStrategy
+from lexicon.test.managers import short_wordlist, temp_manager
 
 
 class TestScrabbleGame(unittest.TestCase):
     def setUp(self):
-        self.game = ScrabbleGame('./wordlists/test_list1.txt')
+        self.game = ScrabbleGame('./wordlists/test_list1.txt', lexicon_manager=temp_manager)
 
     def test_add_player(self):
         self.assert_(self.game.add_player('Bob'))
@@ -40,7 +43,7 @@ class TestScrabbleGame(unittest.TestCase):
         self.assertEqual(len(default_bag) - 14, len(self.game.bag))
 
         all_drawn = self.game.players[0].rack + self.game.players[1].rack
-        check_bag = self.game.bag + all_drawn
+        check_bag = list(self.game.bag) + all_drawn
 
         check_counter = Counter(check_bag)
         bag_counter = Counter(default_bag)
@@ -49,7 +52,7 @@ class TestScrabbleGame(unittest.TestCase):
             self.assertEqual(bag_counter[l], check_counter[l])
 
     def test_set_candidate(self):
-        self.game = ScrabbleGame()
+        self.game = ScrabbleGame(lexicon_manager=temp_manager)
 
         self.game.add_player('Bob')
         self.game.players[0].rack = ['H', 'E', 'L', 'L', 'O', ' ', ' ']
@@ -102,9 +105,37 @@ class TestScrabbleGame(unittest.TestCase):
         self.__scenario_tester('./engine/test/scenarios/specific_fake.txt')
 
         # Testing specific scenarios that came up in playtesting
-        self.game = ScrabbleGame()
+        self.game = ScrabbleGame(lexicon_manager=temp_manager)
         self.__scenario_tester('./engine/test/scenarios/specific.txt')
 
+    def test_validate_without_word_set(self):
+        self.game = ScrabbleGame('./wordlists/test_list1.txt', word_set=False,
+                                 lexicon_manager=temp_manager)
+        self.assertIsNone(self.game.lexicon_set)
+
+        self.__scenario_tester('./engine/test/scenarios/opening.txt')
+        self.__scenario_tester('./engine/test/scenarios/crosses.txt')
+        self.__scenario_tester('./engine/test/scenarios/parallel.txt')
+        self.__scenario_tester('./engine/test/scenarios/specific_fake.txt')
+
+    def test_is_words(self):
+        self.assertEqual([True, True, False, False],
+                         self.game.is_words(['BAD', 'bAd', 'BBA', '']))
+
+        self.game = ScrabbleGame('./wordlists/test_list1.txt', word_set=False,
+                                 lexicon_manager=temp_manager)
+        self.assertEqual([True, True, False, False],
+                         self.game.is_words(['BAD', 'bAd', 'BBA', '']))
+
+    def test_board(self):
+        self.assert_(isinstance(self.game.board, board.Board))
+
+        # Boards given as lists are converted
+        rows = [list('.A.'), list('.B.'), list('...')]
+        self.game.board = rows
+        self.assert_(isinstance(self.game.board, board.Board))
+        self.assertEqual(rows, self.game.board)
+
     def test_remove_candidate(self):
         self.game.add_player('Bob')
         self.game.players[0].rack = ['H', 'E', 'L', 'L', 'O', ' ', ' ']
@@ -200,6 +231,93 @@ class TestScrabbleGame(unittest.TestCase):
         # Make sure that exchange works properly after a failed attempt
         self.assert_(self.game.exchange_tiles('AB'))
 
+    def test_make_unmake_move(self):
+        game = new_game(bag='ABCDE' * 4, read_gaddag=True, seed=0)
+        strategy = StaticScoreStrategy(game)
+
+        def snapshot():
+            return (str(game.board.tiles), list(game.board.blanks),
+                    [list(row) for row in game.horizontal_crosses],
+                    [list(row) for row in game.vertical_crosses],
+                    [list(row) for row in game.horizontal_cross_scores],
+                    [list(row) for row in game.vertical_cross_scores],
+                    [(p.rack[:], p.score) for p in game.players], game.bag.snapshot(),
+                    game.passes, game.game_over, game.current_turn, game.history)
+
+        self.assert_(not game.make_move('AB', (0, 0), True))
+        self.assertIsNone(game.candidate)
+        self.assertIsNone(game.unmake_move())
+
+        snapshots = []
+        while not game.game_over:
+            snapshots.append(snapshot())
+            moves = strategy.generate_moves()
+            if len(snapshots) % 4 == 3 and len(game.bag) >= 2:
+                self.assert_(game.exchange_tiles(game.players[game.current_turn].rack[:2]))
+            elif not moves:
+                self.assert_(game.pass_turn())
+            else:
+                m = max(moves, key=lambda m: (m.score, m))
+                self.assert_(game.make_move(m.word, (m.x, m.y), m.horizontal, crosses=True))
+                self.assertEqual(m.score, game.history.move.score)
+
+        board_before = game.board.copy()
+        while snapshots:
+            self.assertIsNotNone(game.unmake_move())
+            self.assertEqual(snapshots.pop(), snapshot())
+
+        self.assertEqual(board.default_board, game.board)
+        self.assertNotEqual(board_before, game.board)
+
+    def test_validate_from_cross_grids(self):
+        game = new_game(short_wordlist(), read_gaddag=True, seed=4)
+        strategy = StaticScoreStrategy(game)
+        s_board = game.board
+
+        def validate(tiles, pos, horizontal, crosses_current):
+            game.crosses_current = crosses_current
+            if not game.set_candidate(tiles, pos, horizontal):
+                game.candidate = None
+                return None
+            result = game.validate_candidate(), game.candidate.score
+            game.remove_candidate()
+            return result
+
+        for _ in xrange(12):
+            self.assert_(game.crosses_current)
+            moves = strategy.generate_moves()
+
+            # Generated moves fit the cross sets, so single tiles next to
+            # the board's tiles are tried as well, legal or not
+            plays = [(m.word, (m.x, m.y), m.horizontal) for m in moves]
+            adjacent = s_board.adjacent()
+            tiles = set(game.players[game.current_turn].rack) - set(' ')
+            for i in xrange(s_board.height * s_board.width):
+                if adjacent >> i & 1:
+                    pos = divmod(i, s_board.width)
+                    plays.extend((tile, pos, horizontal) for tile in tiles
+                                 for horizontal in (True, False))
+
+            for play in plays:
+                self.assertEqual(validate(*play + (False,)), validate(*play + (True,)))
+            game.crosses_current = True
+
+            if not moves:
+                self.assert_(game.pass_turn())
+                continue
+            m = max(moves, key=lambda m: (m.score, m))
+            self.assert_(game.make_move(m.word, (m.x, m.y), m.horizontal, crosses=True))
+
+        # Moves committed without crosses leave the grids stale
+        m = max(strategy.generate_moves(), key=lambda m: (m.score, m))
+        self.assert_(game.make_move(m.word, (m.x, m.y), m.horizontal))
+        self.assert_(not game.crosses_current)
+        game.unmake_move()
+        self.assert_(game.crosses_current)
+
+        game.board = game.board.copy()
+        self.assert_(not game.crosses_current)
+
     def __scenario_tester(self, filename):
         for exp_results in parse_scenario(filename):
             self.game.candidate = None
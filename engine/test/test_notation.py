@@ -0,0 +1,67 @@
+__author__ = 'Jacky'
+
+import unittest
+
+from engine.game import ScrabbleGame
+from engine.notation import load_position, parse_position, position_string
+from engine.test.games import WORDLIST, new_game
+from strategy.strategies import StaticScoreStrategy
+from lexicon.test.managers import temp_manager
+
+EMPTY_ROWS = '/'.join(['15'] * 15)
+
+
+class TestNotation(unittest.TestCase):
+    def setUp(self):
+        self.game = new_game(bag='ABCDE' * 4 + '  ', read_gaddag=True, seed=6)
+        self.game.players[0].rack = list('EBDA CE')
+        self.game.players[1].rack = list('ABBE')
+
+    def test_position_string(self):
+        self.assertEqual('%s ABCDE2?/AB2E A3C2D?2 0 0/0 0' % EMPTY_ROWS,
+                         position_string(self.game))
+
+        self.assert_(self.game.make_move('BAD', (7, 7), True))
+        rows = EMPTY_ROWS.split('/')
+        rows[7] = '7BAD5'
+        self.assertEqual('/'.join(rows), position_string(self.game).split()[0])
+
+        # Rack order doesn't matter
+        before = position_string(self.game)
+        self.game.players[0].rack.reverse()
+        self.assertEqual(before, position_string(self.game))
+
+    def test_parse(self):
+        position = parse_position('%s AE3?2/- - 1 12/7 2' % EMPTY_ROWS.replace('15', '7cA6', 1))
+        self.assertEqual('.......cA......', position.rows[0])
+        self.assertEqual(('AEEE  ', ''), position.racks)
+        self.assertEqual('', position.bag)
+        self.assertEqual((1, (12, 7), 2), position[3:])
+
+        for text in ('%s A - 0 0 0 0' % EMPTY_ROWS,
+                     '%s A - 1 0 0' % EMPTY_ROWS,
+                     '%s a - 0 0 0' % EMPTY_ROWS,
+                     '%s/15 A - 0 0 0' % EMPTY_ROWS,
+                     '%s A - 0 0 0' % EMPTY_ROWS.replace('15', '14', 1)):
+            self.assertRaises(ValueError, parse_position, text)
+
+    def test_load(self):
+        # Without blanks, to keep move generation quick
+        self.game.players[0].rack = list('EBDACEA')
+        self.game.bag = list('ABCDE' * 4)
+        strategy = StaticScoreStrategy(self.game)
+        for _ in xrange(3):
+            m = max(strategy.generate_moves(), key=lambda m: (m.score, m))
+            self.assert_(self.game.make_move(m.word, (m.x, m.y), m.horizontal, crosses=True))
+
+            text = position_string(self.game)
+            loaded = ScrabbleGame(WORDLIST, read_gaddag=True, lexicon_manager=temp_manager)
+            load_position(loaded, text, crosses=True)
+
+            self.assertEqual(text, position_string(loaded))
+            self.assertEqual(self.game.position_key(), loaded.position_key())
+            self.assertEqual(self.game.game_over, loaded.game_over)
+            self.assertEqual(sorted(strategy.generate_moves()),
+                             sorted(StaticScoreStrategy(loaded).generate_moves()))
+
+        self.assertRaises(ValueError, load_position, loaded, text)
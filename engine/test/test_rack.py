@@ -0,0 +1,40 @@
+__author__ = 'Jacky'
+
+import unittest
+
+from engine.rack import Rack
+from engine.zobrist import BLANK, KeyedTiles, TILE_INDEX
+from lexicon.letter_masks import to_mask
+
+
+class TestRack(unittest.TestCase):
+    def test_contents(self):
+        rack = Rack('ABA ')
+        self.assertEqual(4, len(rack))
+        self.assertEqual(to_mask('AB'), rack.mask)
+        self.assertEqual(1, rack.blanks)
+        self.assertEqual(list('AAB '), rack.tiles())
+        self.assertIn('A', rack)
+        self.assertNotIn('C', rack)
+
+        other = Rack.from_counts(KeyedTiles('ABA ').counts)
+        self.assertEqual(rack.counts, other.counts)
+        self.assertEqual(rack.mask, other.mask)
+        self.assertEqual(len(rack), len(other))
+
+    def test_take_put(self):
+        rack = Rack('ABA ')
+        a, b = TILE_INDEX['A'], TILE_INDEX['B']
+
+        rack.take(a)
+        self.assertEqual(to_mask('AB'), rack.mask)
+        rack.take(a)
+        rack.take(b)
+        rack.take(BLANK)
+        self.assertEqual(0, rack.mask)
+        self.assertEqual(0, len(rack))
+
+        for i in (BLANK, b, a, a):
+            rack.put(i)
+        self.assertEqual(Rack('ABA ').counts, rack.counts)
+        self.assertEqual(to_mask('AB'), rack.mask)
@@ -0,0 +1,111 @@
+__author__ = 'Jacky'
+
+import unittest
+
+from StringIO import StringIO
+
+from engine.game import MoveTypes, ScrabbleGame
+from engine.record import decode_game, encode_game, read_games, replay, write_game
+from engine.test.games import WORDLIST, new_game
+from lexicon.test.managers import short_wordlist, temp_manager
+from strategy.cross_sets import recompute_all_crosses
+from strategy.strategies import StaticScoreStrategy
+
+
+class TestRecord(unittest.TestCase):
+    def setUp(self):
+        self.game = new_game(bag='ABCDE' * 4 + ' ', seed=4)
+        self.game.players[0].rack = list('BE CDEE')
+
+        self.assert_(self.game.make_move('BAD', (7, 7), True))
+        self.assert_(self.game.exchange_tiles(''.join(self.game.players[1].rack[:2])))
+        self.assert_(self.game.make_move('EC', (8, 9), False))
+        self.assert_(self.game.pass_turn())
+
+    def test_decode(self):
+        record = decode_game(encode_game(self.game))
+        self.assertEqual(4, record.seed)
+        self.assertEqual([u'Bob', u'Jane'], record.names)
+        self.assertEqual('BE CDEE', record.racks[0])
+
+        actions = [turn.action for turn in record.turns]
+        self.assertEqual([MoveTypes.Placed, MoveTypes.Exchange, MoveTypes.Placed, MoveTypes.Pass],
+                         actions)
+        self.assertEqual(('BaD', (7, 7), True), record.turns[0][1:4])
+        self.assertEqual(2, len(record.turns[1].drawn))
+        self.assertEqual(('EC', (8, 9), False), record.turns[2][1:4])
+
+        self.assertRaises(IOError, decode_game, encode_game(self.game)[:-2])
+        self.assertRaises(IOError, decode_game, 'GDAG' + encode_game(self.game)[4:])
+
+    def test_replay(self):
+        stream = StringIO()
+        write_game(stream, self.game)
+        self.game.unmake_move()
+        write_game(stream, self.game)
+        stream.seek(0)
+
+        records = list(read_games(stream))
+        self.assertEqual([4, 3], [len(r.turns) for r in records])
+
+        for validate in (False, True):
+            game = ScrabbleGame(WORDLIST, seed=records[1].seed, lexicon_manager=temp_manager)
+            turns = list(replay(records[1], game, validate=validate))
+            self.assertEqual(records[1].turns, turns)
+            self.assertEqual(self.game.position_key(), game.position_key())
+            self.assertEqual(self.game.get_scores(), game.get_scores())
+            self.assertEqual(self.game.board, game.board)
+
+        # Replayed games can be recorded and taken back like any other
+        self.assertEqual(encode_game(self.game), encode_game(game))
+        game.unmake_move()
+        self.assert_(game.board.is_empty(8, 9))
+
+    def test_replay_crosses(self):
+        # A whole game on a real wordlist, validated on replay against the
+        # cross sets kept up to date as it goes
+        wordlist = short_wordlist()
+        game = new_game(wordlist, read_gaddag=True, seed=5)
+        strategy = StaticScoreStrategy(game)
+
+        while not game.game_over:
+            moves = strategy.generate_moves()
+            if moves:
+                m = max(moves, key=lambda m: (m.score, m))
+                self.assert_(game.make_move(m.word, (m.x, m.y), m.horizontal, crosses=True))
+            else:
+                self.assert_(game.pass_turn())
+
+        record = decode_game(encode_game(game))
+        replayed = ScrabbleGame(wordlist, read_gaddag=True, seed=record.seed,
+                                lexicon_manager=temp_manager)
+        turns = list(replay(record, replayed, crosses=True, validate=True))
+        self.assertEqual(record.turns, turns)
+        self.assert_(replayed.crosses_current)
+        self.assertEqual(game.get_scores(), replayed.get_scores())
+        self.assertEqual(game.board, replayed.board)
+
+        loaded = ScrabbleGame(wordlist, read_gaddag=True, lexicon_manager=temp_manager)
+        loaded.board = replayed.board.copy()
+        recompute_all_crosses(loaded)
+        for name in ('horizontal_crosses', 'vertical_crosses',
+                     'horizontal_cross_scores', 'vertical_cross_scores'):
+            expected, grid = getattr(loaded, name), getattr(replayed, name)
+            self.assertEqual(map(list, expected.rows), map(list, grid.rows))
+
+    def test_replay_mismatch(self):
+        record = decode_game(encode_game(self.game))
+        record.turns[2] = record.turns[2]._replace(tiles='ED')
+
+        game = ScrabbleGame(WORDLIST, lexicon_manager=temp_manager)
+        self.assertRaises(ValueError, list, replay(record, game))
+
+        # Moves are placed legally even when their words are trusted
+        for i in (0, 2):
+            record = decode_game(encode_game(self.game))
+            record.turns[i] = record.turns[i]._replace(pos=(0, 0))
+
+            game = ScrabbleGame(WORDLIST, lexicon_manager=temp_manager)
+            self.assertRaises(ValueError, list, replay(record, game))
+            self.assert_(game.board.is_empty(0, 0))
+            self.assertIsNone(game.candidate)
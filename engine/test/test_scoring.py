@@ -0,0 +1,64 @@
+__author__ = 'Jacky'
+
+import unittest
+
+from engine.board import Board
+from engine.game import ScrabbleGame
+from engine.scoring import cross_score, face_value, score_move
+from engine.test.games import WORDLIST, new_game
+from strategy.strategies import StaticScoreStrategy
+from lexicon.test.managers import temp_manager
+
+
+class TestScoring(unittest.TestCase):
+    def test_score_move(self):
+        board = Board()
+        self.assertEqual(8, score_move(board, 'AB', 7, 7, True))
+        self.assertEqual(1, score_move(board, 'Ab', 7, 6, False))
+        self.assertEqual(0, face_value('ab'))
+
+        board.set(7, 7, 'A')
+        board.set(7, 8, 'B')
+        # Hooks under B: main word CE with C on a double letter, cross word BC
+        self.assertEqual(7 + 9, score_move(board, 'CE', 8, 8, True))
+        # Through the tiles on the board
+        self.assertEqual(3 + 1 + 3 + 3, score_move(board, 'CC', 7, 6, True))
+        # A lone tile scores only its cross word
+        self.assertEqual(2, score_move(board, 'A', 8, 7, True))
+
+    def test_generated_moves(self):
+        game = new_game(bag='ABCDE' * 4 + ' ', read_gaddag=True, seed=6)
+        strategy = StaticScoreStrategy(game)
+
+        for _ in xrange(3):
+            moves = strategy.generate_moves()
+            for m in moves:
+                self.assert_(game.set_candidate(m.word, (m.x, m.y), m.horizontal))
+                self.assert_(game.validate_candidate())
+                self.assertEqual(game.candidate.score, m.score)
+                game.remove_candidate()
+
+            m = max(moves, key=lambda m: (m.score, m))
+            self.assert_(game.make_move(m.word, (m.x, m.y), m.horizontal, crosses=True))
+
+            # The maintained cross-scores match the board
+            for x in xrange(game.board.height):
+                for y in xrange(game.board.width):
+                    self.assertEqual(cross_score(game.board, x, y, True),
+                                     game.horizontal_cross_scores[x][y])
+                    self.assertEqual(cross_score(game.board, x, y, False),
+                                     game.vertical_cross_scores[x][y])
+
+        # With a board assigned, the grids are stale and cross words are
+        # scored off the board
+        loaded = ScrabbleGame(WORDLIST, read_gaddag=True, lexicon_manager=temp_manager)
+        loaded.add_player('Bob')
+        loaded.board = game.board.copy()
+        loaded.history = game.history
+        loaded.players[0].rack = game.players[game.current_turn].rack
+        self.assert_(not loaded.crosses_current)
+
+        rack = loaded.players[0]
+        for m in StaticScoreStrategy(loaded).generate_moves():
+            self.assertEqual(score_move(loaded.board, rack.valid_play(m.word), m.x, m.y,
+                                        m.horizontal), m.score)
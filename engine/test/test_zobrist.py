@@ -0,0 +1,92 @@
+__author__ = 'Jacky'
+
+import random
+import unittest
+
+from engine.board import Board
+from engine.game import ScrabbleGame
+from engine.zobrist import KeyedTiles, BAG
+from lexicon.test.managers import temp_manager
+
+
+class TestKeyedTiles(unittest.TestCase):
+    def test_multiset(self):
+        tiles = KeyedTiles('ABAC ')
+        self.assertEqual(KeyedTiles(' CBAA').key, tiles.key)
+        self.assertNotEqual(KeyedTiles('ABAC ', BAG).key, tiles.key)
+        self.assertNotEqual(KeyedTiles('ABCC ').key, tiles.key)
+        self.assertNotEqual(KeyedTiles('ABAC').key, tiles.key)
+
+    def test_updates(self):
+        rng = random.Random(0)
+        tiles = KeyedTiles()
+        for _ in xrange(300):
+            op = rng.randrange(6)
+            if op == 0 or not tiles:
+                tiles.append(rng.choice('AB '))
+            elif op == 1:
+                tiles.pop(rng.randrange(len(tiles)))
+            elif op == 2:
+                tiles += [rng.choice('AB '), rng.choice('AB ')]
+            elif op == 3:
+                tiles[rng.randrange(len(tiles))] = rng.choice('AB ')
+            elif op == 4:
+                del tiles[-2:]
+            else:
+                tiles[:1] = 'BA'
+
+            self.assertEqual(KeyedTiles(tiles).key, tiles.key)
+
+        self.assertEqual(list, type(tiles[:]))
+
+
+class TestPositionKey(unittest.TestCase):
+    def test_board(self):
+        board = Board()
+        empty = board.key
+        board.set(7, 7, 'A')
+        board.set(7, 8, 'b')
+        key = board.key
+
+        other = Board()
+        other.set(7, 8, 'b')
+        other.set(7, 7, 'A')
+        self.assertEqual(key, other.key)
+
+        other.set(7, 8, 'B')
+        self.assertNotEqual(key, other.key)
+
+        board.clear(7, 7)
+        board.clear(7, 8)
+        self.assertEqual(empty, board.key)
+
+    def test_game(self):
+        game = ScrabbleGame('./wordlists/test_list1.txt', lexicon_manager=temp_manager)
+        game.add_player('Bob')
+        game.add_player('Jane')
+        game.players[0].rack = list('ABCD')
+        game.players[1].rack = list('ABCD')
+        game.bag = list('EEE')
+        start = game.position_key()
+
+        # Same tiles, but in the other player's rack or to move
+        game.players[0].rack.pop()
+        game.players[1].rack.append('D')
+        self.assertNotEqual(start, game.position_key())
+        game.players[1].rack.remove('D')
+        game.players[0].rack.append('D')
+        self.assertEqual(start, game.position_key())
+
+        self.assert_(game.pass_turn())
+        self.assertNotEqual(start, game.position_key())
+        game.unmake_move()
+        self.assertEqual(start, game.position_key())
+
+        self.assert_(game.make_move('AB', (7, 7), True))
+        played = game.position_key()
+        self.assertNotEqual(start, played)
+        game.unmake_move()
+        self.assertEqual(start, game.position_key())
+
+        self.assert_(game.make_move('AB', (7, 7), True))
+        self.assertEqual(played, game.position_key())
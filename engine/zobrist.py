@@ -0,0 +1,143 @@
+__author__ = 'Jacky'
+
+import random
+
+from lexicon.letter_masks import ALPHABET
+
+# The key tables are drawn from generators with fixed seeds, so that keys
+# are the same in every process and can be stored or compared across runs.
+SEED = 0x5c7a881e
+KEY_BITS = 64
+
+MAX_PLAYERS = 4
+# Owner index of the bag in COUNT_KEYS, after the racks of the players
+BAG = MAX_PLAYERS
+# Most copies of one tile a rack or the bag can hold
+MAX_COUNT = 100
+
+# Tiles held in racks and the bag, the blank being ' '
+RACK_TILES = ALPHABET + ' '
+# Index of each tile in count vectors over RACK_TILES, the blank last
+TILE_INDEX = {tile: i for i, tile in enumerate(RACK_TILES)}
+BLANK = TILE_INDEX[' ']
+
+_random = random.Random(SEED)
+
+# TURN_KEYS[k] marks player k to move
+TURN_KEYS = [_random.getrandbits(KEY_BITS) for _ in xrange(MAX_PLAYERS)]
+
+# COUNT_KEYS[owner][tile][n] is the key of the nth copy of a tile held by
+# an owner (a player index or BAG), so a multiset of tiles is the XOR of
+# the keys of its copies and adding or removing a copy is one XOR.
+COUNT_KEYS = [{tile: [0] + [_random.getrandbits(KEY_BITS) for _ in xrange(MAX_COUNT)]
+               for tile in RACK_TILES}
+              for _ in xrange(MAX_PLAYERS + 1)]
+
+_square_keys = dict()
+
+
+def square_keys(size):
+    """
+    Returns the table of the keys of tiles on a board of size squares. The
+    key of the tile with character c (lowercase for a blank) on square i is
+    at index i << 7 | ord(c). The table of each size is built once.
+    """
+    keys = _square_keys.get(size)
+    if keys is None:
+        rng = random.Random(SEED ^ size)
+        keys = [0] * (size << 7)
+        for i in xrange(size):
+            for c in ALPHABET + ALPHABET.lower():
+                keys[i << 7 | ord(c)] = rng.getrandbits(KEY_BITS)
+        _square_keys[size] = keys
+
+    return keys
+
+
+class KeyedTiles(list):
+    """
+    A list of tiles, such as a rack, that maintains the Zobrist key of its
+    multiset of tiles in key, updated by every method that adds or removes
+    tiles. The order of the tiles doesn't change the key. Slices and copies
+    are plain lists.
+
+    The number of copies of each tile is kept alongside in counts, indexed
+    like RACK_TILES.
+    """
+
+    def __init__(self, tiles=(), owner=0):
+        super(KeyedTiles, self).__init__()
+        self.owner = owner
+        self.key = 0
+        self.counts = [0] * len(RACK_TILES)
+        self.extend(tiles)
+
+    def __reduce__(self):
+        return KeyedTiles, (list(self), self.owner)
+
+    def _add(self, tile):
+        i = TILE_INDEX[tile]
+        n = self.counts[i] + 1
+        self.counts[i] = n
+        self.key ^= COUNT_KEYS[self.owner][tile][n]
+
+    def _remove(self, tile):
+        i = TILE_INDEX[tile]
+        n = self.counts[i]
+        self.counts[i] = n - 1
+        self.key ^= COUNT_KEYS[self.owner][tile][n]
+
+    def append(self, tile):
+        self._add(tile)
+        super(KeyedTiles, self).append(tile)
+
+    def insert(self, index, tile):
+        self._add(tile)
+        super(KeyedTiles, self).insert(index, tile)
+
+    def extend(self, tiles):
+        for tile in list(tiles):
+            self.append(tile)
+
+    def __iadd__(self, tiles):
+        self.extend(tiles)
+        return self
+
+    def pop(self, index=-1):
+        tile = super(KeyedTiles, self).pop(index)
+        self._remove(tile)
+        return tile
+
+    def remove(self, tile):
+        super(KeyedTiles, self).remove(tile)
+        self._remove(tile)
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            removed = self[index]
+            value = added = list(value)
+        else:
+            removed, added = [self[index]], [value]
+        super(KeyedTiles, self).__setitem__(index, value)
+        self._replace(removed, added)
+
+    def __delitem__(self, index):
+        removed = self[index] if isinstance(index, slice) else [self[index]]
+        super(KeyedTiles, self).__delitem__(index)
+        self._replace(removed, ())
+
+    def __setslice__(self, i, j, tiles):
+        removed, tiles = self[i:j], list(tiles)
+        super(KeyedTiles, self).__setslice__(i, j, tiles)
+        self._replace(removed, tiles)
+
+    def __delslice__(self, i, j):
+        removed = self[i:j]
+        super(KeyedTiles, self).__delslice__(i, j)
+        self._replace(removed, ())
+
+    def _replace(self, removed, added):
+        for tile in removed:
+            self._remove(tile)
+        for tile in added:
+            self._add(tile)
@@ -0,0 +1,73 @@
+__author__ = 'Jacky'
+
+from itertools import combinations_with_replacement
+
+from lexicon.letter_masks import ALPHABET, BLANKS
+
+BINGO_LENGTHS = (7, 8)
+
+
+def alphagram(letters):
+    """
+    Returns the letters of a word sorted alphabetically, which is the same
+    for all anagrams of the word.
+    """
+    return ''.join(sorted(letters.upper()))
+
+
+class AnagramIndex(object):
+    """
+    Index of a lexicon from alphagram to every word with that alphagram.
+    """
+
+    def __init__(self, words=()):
+        self.index = dict()
+        for word in words:
+            if word:
+                self.add_word(word)
+
+    def add_word(self, word):
+        key = alphagram(word)
+        entry = self.index.get(key, ())
+        if word not in entry:
+            self.index[key] = tuple(sorted(entry + (word,)))
+
+    def remove_word(self, word):
+        key = alphagram(word)
+        entry = tuple(w for w in self.index.get(key, ()) if w != word)
+        if entry:
+            self.index[key] = entry
+        else:
+            self.index.pop(key, None)
+
+    def anagrams(self, letters):
+        """
+        Returns the words that use exactly the given letters, as a sorted
+        tuple. Each ' ' or '?' is a blank and may stand for any letter.
+        """
+        tiles = [c for c in letters.upper() if c not in BLANKS]
+        blanks = len(letters) - len(tiles)
+        if not blanks:
+            return self.index.get(''.join(sorted(tiles)), ())
+
+        index = self.index
+        words = set()
+        for fill in combinations_with_replacement(ALPHABET, blanks):
+            words.update(index.get(''.join(sorted(tiles + list(fill))), ()))
+
+        return tuple(sorted(words))
+
+    def bingos(self, rack):
+        """
+        Returns the words that use every tile of a 7 tile rack, or of a 7 tile
+        rack and one letter on the board, as a sorted tuple. Blanks are
+        handled as in anagrams.
+        """
+        if len(rack) not in BINGO_LENGTHS:
+            raise ValueError('Bingos are made from %s tiles, not %d.'
+                             % (' or '.join(map(str, BINGO_LENGTHS)), len(rack)))
+
+        return self.anagrams(rack)
+
+    def __len__(self):
+        return len(self.index)
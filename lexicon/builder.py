@@ -0,0 +1,204 @@
+__author__ = 'Jacky'
+
+import multiprocessing
+from array import array
+
+from lexicon.compact_gaddag import CompactGaddag
+from lexicon.gaddag import Gaddag, GaddagState, gaddag_paths
+from lexicon.letter_masks import ALPHABET, LETTER_BITS, LETTER_INDEX, popcount
+from lexicon.settings import WORDLIST_PATH
+from lexicon.wordlist import iter_words
+
+
+def minimal_gaddag(paths):
+    """
+    Build a fully minimized Gaddag from GADDAG paths in sorted order using
+    Daciuk's incremental algorithm: the states of the previous path that
+    the next one no longer shares are merged with an equivalent registered
+    state as soon as they are complete, so the unminimized trie never
+    exists in memory.
+    """
+    return minimal_tagged_gaddag((path[:-1], LETTER_BITS[path[-1]]) for path in paths)
+
+
+def minimal_tagged_gaddag(entries):
+    """
+    Like minimal_gaddag, but for (body, bits) pairs sorted by body: the
+    state at the end of each body gets bits in its letter set. Letter sets
+    may then be wider than 27 bits, which is how MultiGaddag tags terminals
+    with the wordlists they come from.
+    """
+    gaddag = Gaddag()
+    registry = dict()
+
+    def register(parent, char):
+        child = parent.arcs[char]
+        key = (child.letter_set,
+               frozenset((c, id(s)) for c, s in child.arcs.iteritems()))
+        parent.arcs[char] = registry.setdefault(key, child)
+
+    # States along the body (all but the last character) of the last path
+    stack = [gaddag.root]
+    last_body = ''
+    for body, bits in entries:
+        common = 0
+        limit = min(len(body), len(last_body))
+        while common < limit and body[common] == last_body[common]:
+            common += 1
+
+        while len(stack) - 1 > common:
+            stack.pop()
+            register(stack[-1], last_body[len(stack) - 1])
+
+        for char in body[common:]:
+            state = GaddagState()
+            stack[-1].arcs[char] = state
+            stack.append(state)
+
+        stack[-1].letter_set |= bits
+        last_body = body
+
+    while len(stack) > 1:
+        stack.pop()
+        register(stack[-1], last_body[len(stack) - 1])
+
+    gaddag.minimized = True
+    return gaddag
+
+
+def build_partition(args):
+    """
+    Build the part of a GADDAG reached through root arcs for the given
+    letters. Streams the wordlist and returns the tables of the resulting
+    CompactGaddag so it can be sent back from a worker process.
+
+    Parameters:
+        args:
+            Tuple of (filename, letters, minimize).
+    """
+    filename, letters, minimize = args
+    letters = frozenset(letters)
+
+    gaddag = Gaddag()
+    if minimize:
+        paths = []
+        for word in iter_words(filename):
+            if len(word) > 1 and not letters.isdisjoint(word):
+                paths.extend(gaddag_paths(word, letters))
+        paths.sort()
+        gaddag = minimal_gaddag(paths)
+    else:
+        for word in iter_words(filename):
+            if len(word) > 1 and not letters.isdisjoint(word):
+                for path in gaddag_paths(word, letters):
+                    gaddag.add_path(path)
+
+    compact = CompactGaddag.from_gaddag(gaddag)
+    return compact.arc_masks, compact.letter_masks, compact.first_arcs, compact.targets
+
+
+def merge_gaddags(gaddags, minimize=True):
+    """
+    Merge CompactGaddags whose roots have arcs for disjoint sets of
+    characters into a single CompactGaddag. With minimize, equivalent states
+    are merged across (and within) the inputs as they are copied, so the
+    result is fully minimized.
+    """
+    arc_masks = array('I', [0])
+    letter_masks = array('I', [0])
+    first_arcs = array('I', [0])
+    targets = array('I')
+
+    registry = dict()
+    root_arcs = dict()
+    root_letters = 0
+
+    for gaddag in gaddags:
+        def children(node):
+            first = gaddag.first_arcs[node]
+            return [gaddag.targets[first + k]
+                    for k in xrange(popcount(gaddag.arc_masks[node]))]
+
+        new_ids = dict()
+        stack = [(0, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if node in new_ids:
+                continue
+
+            if not expanded:
+                stack.append((node, True))
+                stack.extend((child, False) for child in children(node)
+                             if child not in new_ids)
+                continue
+
+            new_children = tuple(new_ids[child] for child in children(node))
+            if node == 0:
+                mask = gaddag.arc_masks[0]
+                chars = [c for c in xrange(len(LETTER_INDEX)) if mask >> c & 1]
+                for c, child in zip(chars, new_children):
+                    if c in root_arcs:
+                        raise ValueError('GADDAGs to merge share root arcs.')
+                    root_arcs[c] = child
+                root_letters |= gaddag.letter_masks[0]
+                new_ids[0] = 0
+                continue
+
+            key = (gaddag.letter_masks[node], gaddag.arc_masks[node], new_children)
+            new_id = registry.get(key) if minimize else None
+            if new_id is None:
+                new_id = len(arc_masks)
+                arc_masks.append(gaddag.arc_masks[node])
+                letter_masks.append(gaddag.letter_masks[node])
+                first_arcs.append(len(targets))
+                targets.extend(new_children)
+                if minimize:
+                    registry[key] = new_id
+            new_ids[node] = new_id
+
+    first_arcs[0] = len(targets)
+    for c in sorted(root_arcs):
+        arc_masks[0] |= 1 << c
+        targets.append(root_arcs[c])
+    letter_masks[0] = root_letters
+
+    return CompactGaddag(arc_masks, letter_masks, first_arcs, targets)
+
+
+def parallel_gaddag_from_file(filename=WORDLIST_PATH, processes=None, minimize=True):
+    """
+    Create a CompactGaddag from a (possibly gzip or bzip2 compressed)
+    wordlist, building the sub-automaton under each root arc letter as an
+    independent task on a pool of worker processes and merging the results.
+    Each worker streams the wordlist itself, so the word list is never
+    held in memory by the parent.
+
+    Parameters:
+        filename:
+            Wordlist to build from, in the format gaddag_from_file expects.
+        processes:
+            Number of worker processes. Defaults to the number of CPUs; with
+            one process everything is built in the calling process.
+        minimize:
+            If True, the result is fully minimized.
+
+    Returns:
+        The CompactGaddag of the wordlist.
+    """
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+
+    tasks = [(filename, letter, minimize) for letter in ALPHABET]
+    if processes <= 1:
+        return merge_gaddags((CompactGaddag(*build_partition(task)) for task in tasks),
+                             minimize)
+
+    pool = multiprocessing.Pool(processes)
+    try:
+        results = pool.imap(build_partition, tasks)
+        merged = merge_gaddags((CompactGaddag(*tables) for tables in results), minimize)
+    finally:
+        pool.close()
+        pool.join()
+
+    return merged
@@ -0,0 +1,141 @@
+__author__ = 'Jacky'
+
+import threading
+from collections import OrderedDict
+
+from lexicon.settings import QUERY_CACHE_SIZE
+
+EVICTION_POLICIES = ('lru', 'fifo')
+
+
+class BoundedCache(object):
+    """
+    Thread-safe mapping holding at most maxsize entries. When full, adding
+    an entry evicts the least recently used one ('lru' policy) or the oldest
+    one ('fifo' policy). Hits, misses and evictions are counted.
+    """
+
+    def __init__(self, maxsize=QUERY_CACHE_SIZE, policy='lru'):
+        if maxsize < 1:
+            raise ValueError('Cache size must be positive.')
+        if policy not in EVICTION_POLICIES:
+            raise ValueError('Unknown eviction policy %r.' % policy)
+
+        self.maxsize = maxsize
+        self.policy = policy
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                if self.policy == 'lru':
+                    value = self._entries.pop(key)
+                    self._entries[key] = value
+                else:
+                    value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return default
+
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            if key in self._entries:
+                del self._entries[key]
+            elif len(self._entries) >= self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+            self._entries[key] = value
+
+    def clear(self):
+        """
+        Drop every entry. The counters are kept.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Returns a dictionary of the counters and current size of the cache.
+        """
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses,
+                    'evictions': self.evictions, 'size': len(self._entries),
+                    'maxsize': self.maxsize}
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class MemoizedGaddag(object):
+    """
+    Wraps a Gaddag (or CompactGaddag or MultiGaddag) and memoizes its
+    cross_sets and mid_set queries in bounded caches. Everything else is
+    passed through to the wrapped GADDAG, so the wrapper can be used
+    wherever a GADDAG is.
+    """
+
+    def __init__(self, gaddag, maxsize=QUERY_CACHE_SIZE, policy='lru'):
+        self.gaddag = gaddag
+        self.cross_cache = BoundedCache(maxsize, policy)
+        self.mid_cache = BoundedCache(maxsize, policy)
+
+    @property
+    def root(self):
+        return self.gaddag.root
+
+    def cross_sets(self, word, lexicon=None):
+        """
+        Memoized Gaddag.cross_sets. A lexicon selector is passed on to the
+        wrapped GADDAG, e.g. a MultiGaddag, and memoized separately.
+        """
+        word = word.upper()
+        key = (word, lexicon)
+        result = self.cross_cache.get(key)
+        if result is None:
+            if lexicon is None:
+                result = self.gaddag.cross_sets(word)
+            else:
+                result = self.gaddag.cross_sets(word, lexicon)
+            self.cross_cache.put(key, result)
+
+        return result
+
+    def mid_set(self, prefix, suffix, lexicon=None):
+        """
+        Memoized Gaddag.mid_set, with a lexicon selector like cross_sets.
+        """
+        prefix, suffix = prefix.upper(), suffix.upper()
+        key = (prefix, suffix, lexicon)
+        result = self.mid_cache.get(key)
+        if result is None:
+            if lexicon is None:
+                result = self.gaddag.mid_set(prefix, suffix)
+            else:
+                result = self.gaddag.mid_set(prefix, suffix, lexicon)
+            self.mid_cache.put(key, result)
+
+        return result
+
+    def clear(self):
+        """
+        Drop all memoized results, e.g. after the wrapped GADDAG changes.
+        """
+        self.cross_cache.clear()
+        self.mid_cache.clear()
+
+    def stats(self):
+        return {'cross_sets': self.cross_cache.stats(),
+                'mid_set': self.mid_cache.stats()}
+
+    def __getattr__(self, name):
+        return getattr(self.gaddag, name)
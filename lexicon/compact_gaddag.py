@@ -0,0 +1,343 @@
+__author__ = 'Jacky'
+
+import gc
+from array import array
+
+from lexicon.gaddag import Gaddag, GaddagState, gaddag_from_file
+from lexicon.letter_masks import LETTER_BITS, LETTER_INDEX, DELIMITER_INDEX, \
+    SYMBOLS, popcount
+from lexicon.rack_words import words_from_rack
+from lexicon.settings import WORDLIST_PATH
+
+
+class CompactArcs(object):
+    """
+    Read-only mapping view of the arcs leaving a CompactState, keyed by
+    character like GaddagState.arcs.
+    """
+    __slots__ = ('gaddag', 'node')
+
+    def __init__(self, gaddag, node):
+        self.gaddag = gaddag
+        self.node = node
+
+    def get(self, char, default=None):
+        # CompactGaddag.child inlined, as move generation looks arcs up in
+        # its innermost loop
+        gaddag = self.gaddag
+        bit = LETTER_BITS.get(char)
+        mask = gaddag.arc_masks[self.node]
+        if bit is None or not mask & bit:
+            return default
+
+        arc = gaddag.first_arcs[self.node] + popcount(mask & (bit - 1))
+        return CompactState(gaddag, gaddag.targets[arc])
+
+    def __getitem__(self, char):
+        child = self.gaddag.child(self.node, char)
+        if child < 0:
+            raise KeyError(char)
+        return CompactState(self.gaddag, child)
+
+    def __contains__(self, char):
+        return self.gaddag.child(self.node, char) >= 0
+
+    def __len__(self):
+        return popcount(self.gaddag.arc_masks[self.node])
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def keys(self):
+        mask = self.gaddag.arc_masks[self.node]
+        return [SYMBOLS[i] for i in xrange(len(SYMBOLS)) if mask >> i & 1]
+
+    def iteritems(self):
+        for char in self.keys():
+            yield char, self[char]
+
+
+def pack_gaddag(gaddag):
+    """
+    Number the states of an object-based Gaddag breadth first from the root
+    and lay out their arcs as CompactGaddag tables. Returns the arc masks,
+    first arcs and targets as arrays and the letter sets as a list, since
+    they are not necessarily 27-bit masks (see MultiGaddag).
+    """
+    arc_masks = array('I')
+    letter_sets = []
+    first_arcs = array('I')
+    targets = array('I')
+
+    ids = {id(gaddag.root): 0}
+    order = [gaddag.root]
+    i = 0
+    while i < len(order):
+        state = order[i]
+        i += 1
+
+        arcs = sorted(state.arcs.iteritems(),
+                      key=lambda arc: LETTER_INDEX[arc[0]])
+        arc_mask = 0
+        first_arcs.append(len(targets))
+        for char, child in arcs:
+            arc_mask |= 1 << LETTER_INDEX[char]
+
+            child_id = ids.get(id(child))
+            if child_id is None:
+                child_id = len(order)
+                ids[id(child)] = child_id
+                order.append(child)
+            targets.append(child_id)
+
+        arc_masks.append(arc_mask)
+        letter_sets.append(state.letter_set)
+
+    return arc_masks, letter_sets, first_arcs, targets
+
+
+class CompactState(object):
+    """
+    Lightweight handle on a node of a CompactGaddag, exposing the same arcs
+    and letter_set attributes as a GaddagState so that move generators can
+    traverse either kind of GADDAG.
+    """
+    __slots__ = ('gaddag', 'node')
+
+    def __init__(self, gaddag, node):
+        self.gaddag = gaddag
+        self.node = node
+
+    @property
+    def arcs(self):
+        return CompactArcs(self.gaddag, self.node)
+
+    @property
+    def letter_set(self):
+        return self.gaddag.letter_masks[self.node]
+
+    def __eq__(self, other):
+        return isinstance(other, CompactState) and \
+            self.gaddag is other.gaddag and self.node == other.node
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self.node)
+
+
+class CompactGaddag(object):
+    """
+    A GADDAG stored in flat typed arrays instead of one object per state.
+
+    Node n has a 27-bit mask of the characters it has arcs for
+    (arc_masks[n]), a 27-bit mask of its letter set (letter_masks[n]) and the
+    index of its first arc in targets (first_arcs[n]). Arcs of a node are
+    stored contiguously in alphabet order, so the target for a character is
+    found by counting the set bits of the arc mask below it. The root is
+    node 0.
+    """
+
+    def __init__(self, arc_masks, letter_masks, first_arcs, targets):
+        self.arc_masks = arc_masks
+        self.letter_masks = letter_masks
+        self.first_arcs = first_arcs
+        self.targets = targets
+
+    @classmethod
+    def from_gaddag(cls, gaddag):
+        """
+        Pack an object-based Gaddag into a CompactGaddag. States shared in the
+        source (e.g. by force_arc) stay shared in the result.
+        """
+        arc_masks, letter_sets, first_arcs, targets = pack_gaddag(gaddag)
+        return cls(arc_masks, array('I', letter_sets), first_arcs, targets)
+
+    def to_gaddag(self):
+        """
+        Unpack into an object-based Gaddag, e.g. to add or remove words.
+        Shared nodes become shared states, so the result is marked as fully
+        minimized and changes to it copy the states they touch.
+        """
+        # Hundreds of thousands of states are created and none are garbage,
+        # so the cycle collector would only scan them over and over
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            states = [GaddagState() for _ in xrange(self.node_count)]
+            targets = self.targets
+            # Characters of each distinct arc mask, which repeat a lot
+            mask_symbols = dict()
+            for state, letter_set, mask, arc in zip(states, self.letter_masks,
+                                                    self.arc_masks, self.first_arcs):
+                state.letter_set = letter_set
+                if not mask:
+                    continue
+
+                symbols = mask_symbols.get(mask)
+                if symbols is None:
+                    symbols = [SYMBOLS[i] for i in xrange(len(SYMBOLS)) if mask >> i & 1]
+                    mask_symbols[mask] = symbols
+                arcs = state.arcs
+                for char in symbols:
+                    arcs[char] = states[targets[arc]]
+                    arc += 1
+        finally:
+            if collecting:
+                gc.enable()
+
+        gaddag = Gaddag()
+        gaddag.root = states[0]
+        gaddag.minimized = True
+        return gaddag
+
+    def patched(self, added=(), removed=()):
+        """
+        Returns a new, fully minimized CompactGaddag of this lexicon with
+        words removed and then added, without rebuilding it from a wordlist.
+        """
+        gaddag = self.to_gaddag()
+        gaddag.apply_diff(added, removed)
+        gaddag.minimize()
+        return CompactGaddag.from_gaddag(gaddag)
+
+    @property
+    def root(self):
+        return CompactState(self, 0)
+
+    @property
+    def node_count(self):
+        return len(self.arc_masks)
+
+    @property
+    def arc_count(self):
+        return len(self.targets)
+
+    def child(self, node, char):
+        """
+        Returns the node reached from node by the arc for char, or -1 if
+        there is no such arc.
+        """
+        index = LETTER_INDEX.get(char)
+        if index is None:
+            return -1
+
+        mask = self.arc_masks[node]
+        bit = 1 << index
+        if not mask & bit:
+            return -1
+
+        return self.targets[self.first_arcs[node] + popcount(mask & (bit - 1))]
+
+    def walk(self, node, chars):
+        """
+        Follows the arcs for each character of chars in turn starting from
+        node. Returns the node reached, or -1 if the path leaves the GADDAG.
+        """
+        for char in chars:
+            node = self.child(node, char)
+            if node < 0:
+                break
+
+        return node
+
+    def is_word(self, word):
+        """
+        Determines if the given word is in the lexicon represented by the
+        GADDAG. Returns True if the word exists, False otherwise.
+        """
+        if not word:
+            return False
+
+        node = self.walk(0, word[:0:-1])
+        if node < 0:
+            return False
+
+        index = LETTER_INDEX.get(word[0])
+        return index is not None and bool(self.letter_masks[node] >> index & 1)
+
+    def is_words(self, words):
+        """
+        Batch version of is_word. Returns a list with True for each of the
+        given words that is in the lexicon and False for the others.
+        """
+        is_word = self.is_word
+        return [is_word(word) for word in words]
+
+    def words_from_rack(self, rack, min_length=2, max_length=None, required=''):
+        """
+        Returns the set of words that can be made from the tiles in rack. See
+        Gaddag.words_from_rack.
+        """
+        return words_from_rack(self, rack, min_length, max_length, required)
+
+    def cross_sets(self, word):
+        """
+        Returns the left and right cross-sets for the given string or word as
+        a tuple of two letter masks. See Gaddag.cross_sets.
+        """
+        node = self.walk(0, word.upper()[::-1])
+        if node < 0:
+            return 0, 0
+
+        d_node = self.child(node, '|')
+        if d_node < 0:
+            return self.letter_masks[node], 0
+
+        return self.letter_masks[node], self.letter_masks[d_node]
+
+    def mid_set(self, prefix, suffix):
+        """
+        Returns the mask of letters l such that prefix-l-suffix is a word. See
+        Gaddag.mid_set.
+        """
+        prefix = prefix.upper()
+        suffix = suffix.upper()
+        if not prefix:
+            return self.cross_sets(suffix)[0]
+        if not suffix:
+            return self.cross_sets(prefix)[1]
+
+        if len(prefix) <= len(suffix):
+            start, rest, last = suffix[::-1], prefix[:0:-1], prefix[0]
+        else:
+            start, rest, last = prefix[::-1] + '|', suffix[:-1], suffix[-1]
+
+        node = self.walk(0, start)
+        last = LETTER_INDEX.get(last)
+        if node < 0 or last is None:
+            return 0
+
+        # Every letter arc out of node, with the letter it was reached by
+        frontier = []
+        mask = self.arc_masks[node] & ~(1 << DELIMITER_INDEX)
+        arc = self.first_arcs[node]
+        i = 0
+        while mask:
+            if mask & 1:
+                frontier.append((1 << i, self.targets[arc]))
+                arc += 1
+            mask >>= 1
+            i += 1
+
+        child = self.child
+        for letter in rest:
+            frontier = [(bit, n) for bit, n in
+                        ((bit, child(n, letter)) for bit, n in frontier) if n >= 0]
+
+        letter_masks = self.letter_masks
+        letter_set = 0
+        for bit, n in frontier:
+            if letter_masks[n] >> last & 1:
+                letter_set |= bit
+
+        return letter_set
+
+
+def compact_gaddag_from_file(filename=WORDLIST_PATH, minimize=False):
+    """
+    Create a CompactGaddag from a text file of a lexicon, in the same format
+    as gaddag_from_file expects. Returns the CompactGaddag.
+    """
+    return CompactGaddag.from_gaddag(gaddag_from_file(filename, minimize))
@@ -1,19 +1,28 @@
 __author__ = 'Jacky'
 
-from lexicon.settings import WORDLIST_PATH, GADDAG_PICKLE_PATH
-import cPickle as Pickle
+from collections import namedtuple
+
+from lexicon.letter_masks import LETTER_BITS
+from lexicon.rack_words import words_from_rack
+from lexicon.settings import WORDLIST_PATH
+from lexicon.wordlist import iter_words
+
+
+MinimizeStats = namedtuple(
+    'MinimizeStats', 'nodes_before, arcs_before, nodes_after, arcs_after')
 
 
 class GaddagState(object):
     """
     A state (node) in a GADDAG. Each state contains a letter set (the set of
     letters which, if encountered next, make a word) and the arcs leading out
-    of it and their corresponding letters.
+    of it and their corresponding letters. Letter sets are integer masks as
+    described in lexicon.letter_masks.
     """
 
     def __init__(self):
         self.arcs = dict()
-        self.letter_set = set()
+        self.letter_set = 0
 
     def add_arc(self, char):
         """
@@ -39,7 +48,7 @@ class GaddagState(object):
             next_state = GaddagState()
             self.arcs[c1] = next_state
 
-        next_state.letter_set.add(c2)
+        next_state.letter_set |= LETTER_BITS[c2]
         return next_state
 
     def force_arc(self, char, forced_state):
@@ -53,6 +62,16 @@ class GaddagState(object):
 
         self.arcs[char] = forced_state
 
+    def copy(self):
+        """
+        Returns a new state with the same letter set and arcs to the same
+        states as this one.
+        """
+        state = GaddagState()
+        state.arcs = dict(self.arcs)
+        state.letter_set = self.letter_set
+        return state
+
 
 class Gaddag(object):
     """
@@ -62,11 +81,21 @@ class Gaddag(object):
 
     def __init__(self):
         self.root = GaddagState()
+        self.minimized = False
 
     def add_word(self, word):
         """
         Add a word to the GADDAG and partially minimize the resulting structure.
+        On a fully minimized GADDAG, where states may be shared with other
+        words, the states along each path of the word are copied instead
+        before they are changed.
         """
+        if self.minimized:
+            for path in gaddag_paths(word):
+                states = self._path_states(path[:-1], create=True)
+                states[-1].letter_set |= LETTER_BITS[path[-1]]
+            return
+
         n = len(word)
 
         state = self.root   # create path for n...1
@@ -88,18 +117,175 @@ class Gaddag(object):
             state = state.add_arc('|')
             state.force_arc(word[m + 1], forced_state)
 
+    def add_path(self, path):
+        """
+        Add a single GADDAG path, e.g. 'CBA|D' for the split of ABCD after C,
+        creating every state along it. The last character of the path goes
+        into the letter set of the state before it. Unlike add_word, nothing
+        is shared with the other paths of the same word.
+        """
+        state = self.root
+        for char in path[:-2]:
+            state = state.add_arc(char)
+        state.add_final_arc(path[-2], path[-1])
+
+    def remove_word(self, word):
+        """
+        Remove a word from the GADDAG, clearing its letter from the end of
+        each of its paths and unlinking states that are left without letters
+        or arcs. States shared by add_word (force_arc) belong to paths of the
+        same word prefix, so they are changed in place; on a fully minimized
+        GADDAG the states along each path are copied first.
+
+        Returns:
+            True if the word was in the GADDAG, False otherwise.
+        """
+        if len(word) < 2 or not self.is_word(word):
+            return False
+
+        for path in gaddag_paths(word):
+            body = path[:-1]
+            states = self._path_states(body)
+            if states is None:
+                # Already unlinked through a state shared with an earlier path
+                continue
+
+            states[-1].letter_set &= ~LETTER_BITS[path[-1]]
+            for i in xrange(len(body), 0, -1):
+                if states[i].letter_set or states[i].arcs:
+                    break
+                del states[i - 1].arcs[body[i - 1]]
+
+        return True
+
+    def apply_diff(self, added=(), removed=()):
+        """
+        Remove and then add words, e.g. from lexicon.wordlist.read_word_diff.
+        """
+        for word in removed:
+            self.remove_word(word)
+        for word in added:
+            if len(word) > 1:
+                self.add_word(word)
+
+    def _path_states(self, chars, create=False):
+        """
+        Returns the states along the arcs for chars from the root, starting
+        with the root. Missing states are created if create is True;
+        otherwise None is returned if the path leaves the GADDAG. On a fully
+        minimized GADDAG every state after the root is replaced by a copy,
+        so the returned states can be changed without affecting other words.
+        """
+        state = self.root
+        states = [state]
+        for char in chars:
+            child = state.arcs.get(char)
+            if child is None:
+                if not create:
+                    return None
+                child = GaddagState()
+            elif self.minimized:
+                child = child.copy()
+
+            state.arcs[char] = child
+            states.append(child)
+            state = child
+
+        return states
+
+    def size(self):
+        """
+        Counts the distinct states and arcs of the GADDAG. Shared states are
+        only counted once.
+
+        Returns:
+            (nodes, arcs):
+                Tuple of the number of states and the number of arcs.
+        """
+        seen = {id(self.root)}
+        stack = [self.root]
+        arcs = 0
+        while stack:
+            state = stack.pop()
+            arcs += len(state.arcs)
+            for child in state.arcs.itervalues():
+                if id(child) not in seen:
+                    seen.add(id(child))
+                    stack.append(child)
+
+        return len(seen), arcs
+
+    def minimize(self):
+        """
+        Fully minimize the GADDAG by merging every pair of equivalent states,
+        i.e. states with the same letter set and the same arcs to the same
+        (already merged) states. Unlike the partial minimization done by
+        add_word this also shares suffixes between different words.
+
+        Words can still be added and removed afterwards, at the cost of
+        copying the states along the paths they change.
+
+        Returns:
+            MinimizeStats with the node and arc counts before and after.
+        """
+        nodes_before, arcs_before = self.size()
+
+        registry = dict()
+        # Maps id(state) to (state, canonical state). The original state is
+        # kept alive so that its id can't be reused during the pass.
+        canonical = dict()
+
+        def merge(state):
+            if id(state) in canonical:
+                return canonical[id(state)][1]
+
+            for char, child in state.arcs.items():
+                state.arcs[char] = merge(child)
+
+            key = (state.letter_set,
+                   frozenset((char, id(child)) for char, child in state.arcs.iteritems()))
+            merged = registry.setdefault(key, state)
+            canonical[id(state)] = (state, merged)
+            return merged
+
+        self.root = merge(self.root)
+        self.minimized = True
+
+        nodes_after, arcs_after = self.size()
+        return MinimizeStats(nodes_before, arcs_before, nodes_after, arcs_after)
+
     def is_word(self, word):
         """
         Determines if the given word is in the lexicon represented by the
         GADDAG. Returns True if the word exists, False otherwise.
         """
+        if not word:
+            return False
+
         cur_state = self.root
         for letter in word[:0:-1]:
             if not letter in cur_state.arcs:
                 return False
             cur_state = cur_state.arcs[letter]
 
-        return word[0] in cur_state.letter_set
+        return bool(cur_state.letter_set & LETTER_BITS.get(word[0], 0))
+
+    def is_words(self, words):
+        """
+        Batch version of is_word. Returns a list with True for each of the
+        given words that is in the lexicon and False for the others.
+        """
+        is_word = self.is_word
+        return [is_word(word) for word in words]
+
+    def words_from_rack(self, rack, min_length=2, max_length=None, required=''):
+        """
+        Returns the set of words that can be made from the tiles in rack
+        (' ' or '?' for blanks), optionally restricted to the given lengths
+        and to words containing the required letters. See
+        lexicon.rack_words.words_from_rack.
+        """
+        return words_from_rack(self, rack, min_length, max_length, required)
 
     def cross_sets(self, word):
         """
@@ -111,20 +297,20 @@ class Gaddag(object):
 
         Returns:
             (left, right):
-                Tuple of two sets of letters where left is the left
+                Tuple of two letter masks where left is the left
                 cross-set for the word and right is the right cross-set.
         """
         cur_state = self.root
         for letter in word.upper()[::-1]:
             if not letter in cur_state.arcs:
-                return set(), set()
+                return 0, 0
             cur_state = cur_state.arcs[letter]
 
         if '|' in cur_state.arcs:
             d_state = cur_state.arcs['|']
             return cur_state.letter_set, d_state.letter_set
         else:
-            return cur_state.letter_set, set()
+            return cur_state.letter_set, 0
 
     def mid_set(self, prefix, suffix):
         """
@@ -138,43 +324,91 @@ class Gaddag(object):
                 The accompanying suffix for the mid-set.
 
         Returns:
-            The middle crossing-set for the prefix and suffix.
+            The middle crossing-set for the prefix and suffix as a letter
+            mask.
         """
-        # Look for REV(word) in the GADDAG - easiest way to find mid cross
-        # Start by traversing reverse through the suffix
+        prefix = prefix.upper()
+        suffix = suffix.upper()
+        if not prefix:
+            return self.cross_sets(suffix)[0]
+        if not suffix:
+            return self.cross_sets(prefix)[1]
+
+        # Both REV(suffix)-l-REV(prefix) (the REV(word) path) and
+        # REV(prefix)|l-suffix contain the unknown letter l. Walk the fixed
+        # part of whichever has the longer fixed part before l, then follow
+        # all arcs for l at once through the shorter remainder.
+        if len(prefix) <= len(suffix):
+            start, rest, last = suffix[::-1], prefix[:0:-1], prefix[0]
+        else:
+            start, rest, last = prefix[::-1] + '|', suffix[:-1], suffix[-1]
+
         cur_state = self.root
-        for letter in suffix.upper()[::-1]:
+        for letter in start:
             if not letter in cur_state.arcs:
-                return set()
+                return 0
             cur_state = cur_state.arcs[letter]
 
-        # Now for each arc exiting this state, check if the prefix is on it
-        letter_set = set()
-        for k, v in cur_state.arcs.iteritems():
-            for letter in prefix.upper()[:0:-1]:
-                if not letter in v.arcs:
-                    break
-                v = v.arcs[letter]
-            else:
-                # Ignore delimiter: means it's not a REV(word) path
-                if prefix[0] in v.letter_set and k != '|':
-                    letter_set.add(k)
+        # Ignore delimiter: means it's not a REV(word) path
+        frontier = [(LETTER_BITS[k], v) for k, v in cur_state.arcs.iteritems() if k != '|']
+        for letter in rest:
+            frontier = [(bit, v.arcs[letter]) for bit, v in frontier if letter in v.arcs]
+
+        last = LETTER_BITS.get(last, 0)
+        letter_set = 0
+        for bit, v in frontier:
+            if v.letter_set & last:
+                letter_set |= bit
 
         return letter_set
 
 
-def gaddag_from_file(filename=WORDLIST_PATH):
+def gaddag_paths(word, first_letters=None):
+    """
+    Yields every GADDAG path of a word, i.e. REV(x)|y for each split of the
+    word into x and y with x non-empty, and REV(word) when y is empty. If
+    first_letters is given, only paths starting with one of those letters
+    are yielded.
+    """
+    n = len(word)
+    for i in xrange(n):
+        if first_letters is not None and word[i] not in first_letters:
+            continue
+
+        if i == n - 1:
+            yield word[::-1]
+        else:
+            yield word[i::-1] + '|' + word[i + 1:]
+
+
+def gaddag_from_file(filename=WORDLIST_PATH, minimize=False):
     """
     Create a GADDAG from a text file of a lexicon. If no filename is supplied
     then it will default to the WORDLIST_PATH setting. The text file should
     only have the words in the lexicon, one per line, with a blank line
-    at the very end. Returns the GADDAG.
+    at the very end, and may be gzip or bzip2 compressed. If minimize is True
+    the GADDAG is fully minimized after all words are added. Returns the
+    GADDAG.
     """
     gaddag = Gaddag()
-    with open(filename, 'r') as f:
-        for word in f.readlines():
-            stripped = word.rstrip()
-            if len(stripped) > 1:
-                gaddag.add_word(stripped)  # Chop the newline
+    for word in iter_words(filename):
+        if len(word) > 1:
+            gaddag.add_word(word)
+
+    if minimize:
+        gaddag.minimize()
 
     return gaddag
+
+
+def main():
+    import sys
+
+    filename = sys.argv[1] if len(sys.argv) > 1 else WORDLIST_PATH
+    stats = gaddag_from_file(filename).minimize()
+    print 'Before minimization: %d nodes, %d arcs' % (stats.nodes_before, stats.arcs_before)
+    print 'After minimization: %d nodes, %d arcs' % (stats.nodes_after, stats.arcs_after)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+__author__ = 'Jacky'
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from lexicon.compact_gaddag import CompactGaddag
+from lexicon.gaddag import Gaddag
+from lexicon.settings import WORDLIST_PATH, GADDAG_BINARY_PATH
+
+# File layout, all integers little-endian unsigned 32-bit:
+#   magic 'GDAG', format version, node count, arc count
+#   arc_masks[node count]
+#   letter_masks[node count]
+#   first_arcs[node count]
+#   targets[arc count]
+MAGIC = 'GDAG'
+FORMAT_VERSION = 1
+
+HEADER = struct.Struct('<4sIII')
+UINT32 = struct.Struct('<I')
+
+
+class MappedArray(object):
+    """
+    Read-only sequence of little-endian unsigned 32-bit integers stored in a
+    buffer (usually a memory map) starting at offset. Values are unpacked on
+    access, so nothing is copied out of the buffer up front.
+    """
+    __slots__ = ('buf', 'offset', 'length')
+
+    def __init__(self, buf, offset, length):
+        self.buf = buf
+        self.offset = offset
+        self.length = length
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.length
+        if not 0 <= i < self.length:
+            raise IndexError('MappedArray index out of range')
+
+        return UINT32.unpack_from(self.buf, self.offset + 4 * i)[0]
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        for i in xrange(self.length):
+            yield UINT32.unpack_from(self.buf, self.offset + 4 * i)[0]
+
+
+class MappedGaddag(CompactGaddag):
+    """
+    A CompactGaddag whose tables live in a memory-mapped GADDAG file. The
+    mapping is shared and read-only, so every process loading the same file
+    shares the same physical pages.
+    """
+
+    def __init__(self, mapping, node_count, arc_count):
+        offset = HEADER.size
+        tables = []
+        for length in (node_count, node_count, node_count, arc_count):
+            tables.append(MappedArray(mapping, offset, length))
+            offset += 4 * length
+
+        super(MappedGaddag, self).__init__(*tables)
+        self.mapping = mapping
+
+    def close(self):
+        self.mapping.close()
+
+
+def write_gaddag(gaddag, filename):
+    """
+    Write a GADDAG to a binary file that can be loaded with load_gaddag.
+
+    Parameters:
+        gaddag:
+            The Gaddag or CompactGaddag to write.
+        filename:
+            Path of the file to write. Missing directories are created.
+    """
+    if isinstance(gaddag, Gaddag):
+        gaddag = CompactGaddag.from_gaddag(gaddag)
+
+    directory = os.path.dirname(filename)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    with open(filename, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, gaddag.node_count, gaddag.arc_count))
+        for table in (gaddag.arc_masks, gaddag.letter_masks,
+                      gaddag.first_arcs, gaddag.targets):
+            table = array('I', table)
+            if sys.byteorder != 'little':
+                table.byteswap()
+            table.tofile(f)
+
+
+def _check_header(filename, data, size):
+    """
+    Returns the node and arc counts from the header at the start of data,
+    the first bytes of a file of size bytes. Raises IOError if it isn't a
+    GADDAG file of this format version.
+    """
+    if size < HEADER.size:
+        raise IOError('%s is not a GADDAG file.' % filename)
+
+    magic, version, node_count, arc_count = HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise IOError('%s is not a GADDAG file.' % filename)
+    if version != FORMAT_VERSION:
+        raise IOError('%s has GADDAG format version %d, expected %d.' % (
+            filename, version, FORMAT_VERSION))
+    if size != HEADER.size + 4 * (3 * node_count + arc_count):
+        raise IOError('%s is truncated or corrupt.' % filename)
+
+    return node_count, arc_count
+
+
+def load_gaddag(filename=GADDAG_BINARY_PATH):
+    """
+    Memory-map a GADDAG file written by write_gaddag. Raises IOError if the
+    file isn't a GADDAG file, is truncated or was written in another format
+    version.
+
+    Every process mapping the same file shares its pages, but each table
+    access unpacks from the mapping; see read_gaddag for faster traversal.
+
+    Returns:
+        A MappedGaddag traversing the file in place.
+    """
+    with open(filename, 'rb') as f:
+        # Checked before mapping, as empty files can't be mapped at all
+        header = f.read(HEADER.size)
+        node_count, arc_count = _check_header(filename, header, os.fstat(f.fileno()).st_size)
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    return MappedGaddag(mapping, node_count, arc_count)
+
+
+def read_gaddag(filename=GADDAG_BINARY_PATH):
+    """
+    Read a GADDAG file written by write_gaddag into memory. Raises IOError
+    like load_gaddag.
+
+    Returns:
+        A CompactGaddag with its tables in arrays.
+    """
+    with open(filename, 'rb') as f:
+        header = f.read(HEADER.size)
+        node_count, arc_count = _check_header(filename, header, os.fstat(f.fileno()).st_size)
+
+        tables = []
+        for length in (node_count, node_count, node_count, arc_count):
+            table = array('I')
+            table.fromfile(f, length)
+            if sys.byteorder != 'little':
+                table.byteswap()
+            tables.append(table)
+
+    return CompactGaddag(*tables)
+
+
+def main():
+    from lexicon.builder import parallel_gaddag_from_file
+
+    wordlist = sys.argv[1] if len(sys.argv) > 1 else WORDLIST_PATH
+    filename = sys.argv[2] if len(sys.argv) > 2 else GADDAG_BINARY_PATH
+
+    gaddag = parallel_gaddag_from_file(wordlist)
+    write_gaddag(gaddag, filename)
+    print 'Wrote %s to %s' % (wordlist, filename)
+
+
+if __name__ == '__main__':
+    main()
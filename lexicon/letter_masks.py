@@ -0,0 +1,63 @@
+__author__ = 'Jacky'
+
+# Letters are numbered 0-25, with the GADDAG delimiter taking bit 26, so any
+# set of them fits in a 27-bit integer mask.
+ALPHABET = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+DELIMITER = '|'
+SYMBOLS = ALPHABET + DELIMITER
+
+LETTER_INDEX = {c: i for i, c in enumerate(SYMBOLS)}
+LETTER_BITS = {c: 1 << i for i, c in enumerate(SYMBOLS)}
+DELIMITER_INDEX = LETTER_INDEX[DELIMITER]
+
+# Every letter, but not the delimiter. Used as the cross-set of a square that
+# no perpendicular word constrains.
+ALL_LETTERS = (1 << len(ALPHABET)) - 1
+
+# Number of set bits in every 16-bit integer, used for popcounts of masks.
+POPCOUNT_16 = bytearray(bin(i).count('1') for i in xrange(1 << 16))
+
+
+def popcount(mask):
+    """
+    Returns the number of set bits in a mask of at most 32 bits.
+    """
+    return POPCOUNT_16[mask & 0xFFFF] + POPCOUNT_16[mask >> 16]
+
+
+def to_mask(letters):
+    """
+    Returns the mask for an iterable of letters. Characters outside of the
+    alphabet and the delimiter are ignored.
+    """
+    mask = 0
+    for c in letters:
+        i = LETTER_INDEX.get(c)
+        if i is not None:
+            mask |= 1 << i
+
+    return mask
+
+
+def to_letters(mask):
+    """
+    Returns the set of letters (and possibly the delimiter) in a mask.
+    """
+    return {SYMBOLS[i] for i in xrange(len(SYMBOLS)) if mask >> i & 1}
+
+
+def iter_letters(mask):
+    """
+    Yields the letters (and possibly the delimiter) in a mask in alphabet
+    order.
+    """
+    i = 0
+    while mask:
+        if mask & 1:
+            yield SYMBOLS[i]
+        mask >>= 1
+        i += 1
+
+
+# Characters standing for a blank tile in a rack
+BLANKS = ' ?'
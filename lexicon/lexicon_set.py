@@ -1,11 +1,10 @@
 __author__ = 'Jacky'
 
+from lexicon.wordlist import iter_words
+
 
 def read_lexicon(filename):
     """
     Read a lexicon from a file into a native Python set. Returns the set.
     """
-    with open(filename, 'r') as dictionary:
-        lex_set = {word.strip() for word in dictionary.readlines()}
-
-    return lex_set
\ No newline at end of file
+    return set(iter_words(filename))
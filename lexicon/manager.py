@@ -0,0 +1,312 @@
+__author__ = 'Jacky'
+
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import cPickle as Pickle
+
+from lexicon import gaddag_file
+from lexicon.anagrams import AnagramIndex
+from lexicon.builder import parallel_gaddag_from_file
+from lexicon.cache import MemoizedGaddag
+from lexicon.lexicon_set import read_lexicon
+from lexicon.settings import LEXICON_CACHE_DIR
+from lexicon.wordlist import read_word_diff, wordlist_compression, write_words
+
+# Bump whenever the way any cached artifact is derived changes, so that old
+# cache entries are ignored and rebuilt.
+ARTIFACT_VERSION = 1
+
+
+def wordlist_digest(filename):
+    """
+    Returns the SHA-1 hex digest of the contents of a wordlist file.
+    """
+    digest = hashlib.sha1()
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), ''):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+class Lexicon(object):
+    """
+    The derived artifacts of one wordlist: the word set, the GADDAG and the
+    anagram index. Each artifact is loaded from the cache directory, or
+    built and stored there, the first time it is used. The GADDAG is the
+    memory-mapped cache file (see lexicon.gaddag_file.load_gaddag), wrapped
+    in a MemoizedGaddag, so every game sharing the lexicon also shares its
+    cross-set and mid-set caches.
+
+    Word diffs applied with apply_diff change the loaded artifacts in place
+    and are replayed on artifacts loaded later, until rebase moves the
+    lexicon to the cache entry of its updated wordlist.
+    """
+
+    def __init__(self, wordlist, digest, directory):
+        self.wordlist = wordlist
+        self.digest = digest
+        self.directory = directory
+
+        self._words = None
+        self._gaddag = None
+        self._anagrams = None
+        # (added, removed) word lists applied since the cache entry was made
+        self._diffs = []
+        # Number of diffs ever applied, so that anything derived from the
+        # words can tell whether they changed since
+        self.version = 0
+        self._lock = threading.RLock()
+
+    @property
+    def words(self):
+        with self._lock:
+            if self._words is None:
+                words = self._cached_pickle(
+                    'words.pkl', lambda: read_lexicon(self.wordlist))
+                for added, removed in self._diffs:
+                    words.difference_update(removed)
+                    words.update(added)
+                self._words = words
+            return self._words
+
+    @property
+    def gaddag(self):
+        with self._lock:
+            if self._gaddag is None:
+                path = os.path.join(self.directory, 'gaddag.bin')
+                try:
+                    gaddag = gaddag_file.load_gaddag(path)
+                except (IOError, OSError, ValueError):
+                    self._write(path, lambda filename: gaddag_file.write_gaddag(
+                        parallel_gaddag_from_file(self.wordlist), filename))
+                    gaddag = gaddag_file.load_gaddag(path)
+                for added, removed in self._diffs:
+                    gaddag = gaddag.patched(added, removed)
+                self._gaddag = MemoizedGaddag(gaddag)
+            return self._gaddag
+
+    @property
+    def anagrams(self):
+        with self._lock:
+            if self._anagrams is None:
+                if self._diffs and not self._is_cached('anagrams.pkl'):
+                    # Built from the updated words, so nothing to replay
+                    self._anagrams = AnagramIndex(self.words)
+                else:
+                    anagrams = self._cached_pickle(
+                        'anagrams.pkl', lambda: AnagramIndex(self.words))
+                    for added, removed in self._diffs:
+                        _patch_anagrams(anagrams, added, removed)
+                    self._anagrams = anagrams
+            return self._anagrams
+
+    def apply_diff(self, added=(), removed=()):
+        """
+        Remove and then add words in every loaded artifact, e.g. from
+        lexicon.wordlist.read_word_diff. The word set and anagram index are
+        changed in place, so every game sharing them sees the new words. The
+        GADDAG is replaced by a patched copy inside its MemoizedGaddag, whose
+        memoized queries are dropped. Cross-sets already computed by running
+        games are not updated.
+        """
+        added, removed = list(added), list(removed)
+        with self._lock:
+            self._diffs.append((added, removed))
+            self.version += 1
+
+            if self._words is not None:
+                self._words.difference_update(removed)
+                self._words.update(added)
+            if self._anagrams is not None:
+                _patch_anagrams(self._anagrams, added, removed)
+            if self._gaddag is not None:
+                self._gaddag.gaddag = self._gaddag.gaddag.patched(added, removed)
+                self._gaddag.clear()
+
+    def write_wordlist(self):
+        """
+        Rewrite the wordlist file with the current words, sorted, one per
+        line, keeping the compression it had.
+        """
+        with self._lock:
+            words = sorted(self.words)
+            compression = wordlist_compression(self.wordlist)
+
+            def writer(filename):
+                write_words(filename, words, compression)
+                shutil.copymode(self.wordlist, filename)
+
+            self._write(self.wordlist, writer)
+
+    def rebase(self, digest, directory):
+        """
+        Move the lexicon to the cache entry of a new wordlist digest, e.g.
+        after write_wordlist. Artifacts that are loaded or cached under the
+        old entry are brought up to date and stored under the new one, so
+        they aren't rebuilt. The others will be built from the wordlist file
+        when first used.
+        """
+        with self._lock:
+            words = self.words
+            anagrams = gaddag = None
+            if self._anagrams is not None or self._is_cached('anagrams.pkl'):
+                anagrams = self.anagrams
+            if self._gaddag is not None or self._is_cached('gaddag.bin'):
+                gaddag = self.gaddag.gaddag
+
+            self.digest = digest
+            self.directory = directory
+            self._diffs = []
+
+            self._dump('words.pkl', words)
+            if anagrams is not None:
+                self._dump('anagrams.pkl', anagrams)
+            if gaddag is not None:
+                self._write(os.path.join(directory, 'gaddag.bin'),
+                            lambda filename: gaddag_file.write_gaddag(gaddag, filename))
+
+    def _is_cached(self, name):
+        return os.path.exists(os.path.join(self.directory, name))
+
+    def _cached_pickle(self, name, build):
+        path = os.path.join(self.directory, name)
+        try:
+            with open(path, 'rb') as f:
+                return Pickle.load(f)
+        except (IOError, EOFError, Pickle.UnpicklingError):
+            pass
+
+        artifact = build()
+        self._dump(name, artifact)
+        return artifact
+
+    def _dump(self, name, artifact):
+        def dump(filename):
+            with open(filename, 'wb') as f:
+                Pickle.dump(artifact, f, Pickle.HIGHEST_PROTOCOL)
+
+        self._write(os.path.join(self.directory, name), dump)
+
+    def _write(self, path, writer):
+        """
+        Write a file through a temporary file renamed into place, so other
+        processes never see a partially written cache entry or wordlist.
+        """
+        directory = os.path.dirname(path)
+        if directory and not os.path.isdir(directory):
+            try:
+                os.makedirs(directory)
+            except OSError:
+                if not os.path.isdir(directory):
+                    raise
+
+        fd, tmp = tempfile.mkstemp(dir=directory or None)
+        os.close(fd)
+        try:
+            # mkstemp makes the file private to its owner, unlike open
+            os.chmod(tmp, _new_file_mode())
+            writer(tmp)
+            os.rename(tmp, path)
+        except:
+            os.remove(tmp)
+            raise
+
+
+def _new_file_mode():
+    """
+    Returns the mode open gives new files under the current umask.
+    """
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0666 & ~umask
+
+
+def _patch_anagrams(anagrams, added, removed):
+    for word in removed:
+        anagrams.remove_word(word)
+    for word in added:
+        anagrams.add_word(word)
+
+
+class LexiconManager(object):
+    """
+    Hands out one Lexicon per wordlist content, shared by everything in the
+    process, with artifacts cached on disk under cache_dir keyed by the
+    wordlist checksum and ARTIFACT_VERSION.
+    """
+
+    def __init__(self, cache_dir=LEXICON_CACHE_DIR):
+        self.cache_dir = cache_dir
+
+        self._lexicons = dict()
+        # (path, size, mtime) -> digest, to avoid rehashing unchanged files
+        self._digests = dict()
+        self._lock = threading.Lock()
+
+    def lexicon(self, wordlist):
+        """
+        Returns the Lexicon for the given wordlist file.
+        """
+        path = os.path.abspath(wordlist)
+        stat = os.stat(path)
+        file_key = (path, stat.st_size, stat.st_mtime)
+
+        with self._lock:
+            digest = self._digests.get(file_key)
+            if digest is None:
+                digest = wordlist_digest(path)
+                self._digests[file_key] = digest
+
+            lex = self._lexicons.get(digest)
+            if lex is None:
+                lex = Lexicon(path, digest, self._directory(digest))
+                self._lexicons[digest] = lex
+
+            return lex
+
+    def update_wordlist(self, wordlist, diff):
+        """
+        Apply a word diff file (see lexicon.wordlist.read_word_diff) to a
+        wordlist on disk and to its Lexicon, which every user of the
+        lexicon in this process sees immediately. The wordlist file is
+        rewritten and the updated artifacts are cached under its new
+        checksum, so other processes load them instead of rebuilding.
+
+        Returns:
+            The updated Lexicon.
+        """
+        added, removed = read_word_diff(diff)
+        lex = self.lexicon(wordlist)
+
+        with self._lock:
+            old_digest = lex.digest
+            lex.apply_diff(added, removed)
+            lex.write_wordlist()
+
+            digest = wordlist_digest(lex.wordlist)
+            stat = os.stat(lex.wordlist)
+            self._digests[(lex.wordlist, stat.st_size, stat.st_mtime)] = digest
+
+            lex.rebase(digest, self._directory(digest))
+            if self._lexicons.get(old_digest) is lex:
+                del self._lexicons[old_digest]
+            self._lexicons[digest] = lex
+
+        return lex
+
+    def _directory(self, digest):
+        return os.path.join(self.cache_dir, '%s.v%d' % (digest, ARTIFACT_VERSION))
+
+
+default_manager = LexiconManager()
+
+
+def get_lexicon(wordlist):
+    """
+    Returns the Lexicon for a wordlist from the process-wide default manager.
+    """
+    return default_manager.lexicon(wordlist)
@@ -0,0 +1,160 @@
+__author__ = 'Jacky'
+
+import os
+from array import array
+
+from lexicon.builder import minimal_tagged_gaddag
+from lexicon.compact_gaddag import CompactGaddag, pack_gaddag
+from lexicon.gaddag import gaddag_paths
+from lexicon.letter_masks import ALPHABET, LETTER_BITS, LETTER_INDEX, SYMBOLS
+from lexicon.wordlist import iter_words
+
+# Width of the letter mask of one lexicon within a tagged letter set
+LEXICON_SHIFT = len(SYMBOLS)
+LEXICON_MASK = (1 << LEXICON_SHIFT) - 1
+
+
+class MultiGaddag(CompactGaddag):
+    """
+    A CompactGaddag of the union of several wordlists which also records
+    which wordlists each word belongs to. The arcs are shared by all of
+    the lexicons, so memory grows with the union of the lists rather than
+    their sum.
+
+    Every terminal letter carries a bitmask of the lexicons it is a
+    terminal for. The bitmasks are stored transposed, as one table of
+    letter masks per lexicon (lexicon_masks[k]), next to the shared
+    arc_masks, first_arcs and targets. letter_masks is the union of the
+    lexicon tables, so queries made without a lexicon accept a word from
+    any of them.
+
+    Queries take a lexicon selector, which is either the index of the
+    lexicon or its name.
+    """
+
+    def __init__(self, names, arc_masks, first_arcs, targets, lexicon_masks):
+        if len(names) != len(lexicon_masks):
+            raise ValueError('Expected one letter mask table per lexicon.')
+
+        letter_masks = array('I', [0]) * len(arc_masks)
+        for masks in lexicon_masks:
+            for node, mask in enumerate(masks):
+                letter_masks[node] |= mask
+
+        super(MultiGaddag, self).__init__(arc_masks, letter_masks, first_arcs, targets)
+        self.names = tuple(names)
+        self.lexicon_masks = lexicon_masks
+
+        self._union = CompactGaddag(arc_masks, letter_masks, first_arcs, targets)
+        self._views = [CompactGaddag(arc_masks, masks, first_arcs, targets)
+                       for masks in lexicon_masks]
+
+    @classmethod
+    def from_gaddag(cls, names, gaddag):
+        """
+        Pack an object-based Gaddag whose letter sets are tagged, i.e. hold
+        the 27-bit letter mask of lexicon k at bit 27 * k, into a MultiGaddag.
+        """
+        arc_masks, letter_sets, first_arcs, targets = pack_gaddag(gaddag)
+        lexicon_masks = [array('I', (s >> (LEXICON_SHIFT * k) & LEXICON_MASK
+                                     for s in letter_sets))
+                         for k in xrange(len(names))]
+
+        return cls(names, arc_masks, first_arcs, targets, lexicon_masks)
+
+    def lexicon_index(self, lexicon):
+        """
+        Returns the index of a lexicon given by index or name.
+        """
+        if lexicon in self.names:
+            return self.names.index(lexicon)
+        if isinstance(lexicon, (int, long)) and 0 <= lexicon < len(self.names):
+            return lexicon
+
+        raise KeyError('Unknown lexicon %r.' % (lexicon,))
+
+    def select(self, lexicon=None):
+        """
+        Returns a CompactGaddag of a single lexicon, sharing the arcs of this
+        one, or of the union of all of them if lexicon is None. It can be
+        used anywhere a GADDAG is, e.g. as the gaddag of a ScrabbleGame to
+        generate moves under that lexicon.
+        """
+        if lexicon is None:
+            return self._union
+
+        return self._views[self.lexicon_index(lexicon)]
+
+    def lexicons(self, word):
+        """
+        Returns the bitmask of the lexicons containing word, with bit k set
+        for lexicon k.
+        """
+        if not word:
+            return 0
+
+        node = self.walk(0, word[:0:-1])
+        index = LETTER_INDEX.get(word[0])
+        if node < 0 or index is None:
+            return 0
+
+        membership = 0
+        for k, masks in enumerate(self.lexicon_masks):
+            if masks[node] >> index & 1:
+                membership |= 1 << k
+
+        return membership
+
+    def is_word(self, word, lexicon=None):
+        return self.select(lexicon).is_word(word)
+
+    def is_words(self, words, lexicon=None):
+        return self.select(lexicon).is_words(words)
+
+    def cross_sets(self, word, lexicon=None):
+        return self.select(lexicon).cross_sets(word)
+
+    def mid_set(self, prefix, suffix, lexicon=None):
+        return self.select(lexicon).mid_set(prefix, suffix)
+
+    def words_from_rack(self, rack, min_length=2, max_length=None, required='',
+                        lexicon=None):
+        return self.select(lexicon).words_from_rack(rack, min_length, max_length, required)
+
+
+def multi_gaddag_from_files(wordlists, names=None):
+    """
+    Create a fully minimized MultiGaddag from several (possibly gzip or
+    bzip2 compressed) wordlists. The paths under each root arc letter are
+    gathered from every wordlist, tagged with the index of their wordlist
+    and fed to one incremental minimization in sorted order, so only one
+    root letter's worth of paths is in memory at a time.
+
+    Parameters:
+        wordlists:
+            Wordlist files, in the format gaddag_from_file expects.
+        names:
+            Names of the lexicons, used as selectors. Defaults to the file
+            names of the wordlists without their extensions.
+
+    Returns:
+        The MultiGaddag of the wordlists.
+    """
+    if names is None:
+        names = [os.path.splitext(os.path.basename(w))[0] for w in wordlists]
+    if len(names) != len(wordlists) or len(set(names)) != len(names):
+        raise ValueError('Expected a distinct name for each wordlist.')
+
+    def entries():
+        for letter in ALPHABET:
+            paths = []
+            for k, filename in enumerate(wordlists):
+                for word in iter_words(filename):
+                    if len(word) > 1 and letter in word:
+                        paths.extend((path, k) for path in gaddag_paths(word, letter))
+            paths.sort()
+
+            for path, k in paths:
+                yield path[:-1], LETTER_BITS[path[-1]] << (LEXICON_SHIFT * k)
+
+    return MultiGaddag.from_gaddag(names, minimal_tagged_gaddag(entries()))
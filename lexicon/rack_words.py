@@ -0,0 +1,98 @@
+__author__ = 'Jacky'
+
+from lexicon.letter_masks import ALPHABET, BLANKS, LETTER_INDEX, DELIMITER
+
+
+def rack_counts(letters):
+    """
+    Returns the number of tiles of each letter in letters as a list indexed
+    like ALPHABET, and the number of blanks. Other characters are ignored.
+    """
+    counts = [0] * len(ALPHABET)
+    blanks = 0
+    for c in letters.upper():
+        if c in BLANKS:
+            blanks += 1
+        else:
+            i = LETTER_INDEX.get(c)
+            if i is not None and c != DELIMITER:
+                counts[i] += 1
+
+    return counts, blanks
+
+
+def words_from_rack(gaddag, rack, min_length=2, max_length=None, required=''):
+    """
+    Returns the set of words in the lexicon of a GADDAG which can be made
+    from a multiset of tiles. Every word w is found once, on its REV(w)
+    path, by a depth-first search from the root that spends a tile (or,
+    failing that, a blank) on each arc it follows.
+
+    Parameters:
+        gaddag:
+            Gaddag or CompactGaddag to search.
+        rack:
+            String of tiles, with ' ' or '?' for blanks.
+        min_length:
+            Shortest word to return.
+        max_length:
+            Longest word to return. Defaults to the number of tiles.
+        required:
+            Letters every returned word must contain, counting repeats.
+
+    Returns:
+        The set of words, in upper case.
+    """
+    counts, blanks = rack_counts(rack)
+    if max_length is None or max_length > len(rack):
+        max_length = len(rack)
+
+    needed, _ = rack_counts(required)
+    missing = sum(needed)
+
+    words = set()
+    letters = []
+
+    def search(state, blanks, missing):
+        # letters holds the last len(letters) letters of the word, reversed
+        depth = len(letters) + 1
+        if depth >= min_length and missing <= 1:
+            letter_set = state.letter_set
+            for i, c in enumerate(ALPHABET):
+                if letter_set >> i & 1 and (counts[i] or blanks) and \
+                        (missing == 0 or needed[i] > 0):
+                    words.add(c + ''.join(reversed(letters)))
+
+        if depth >= max_length or max_length - depth + 1 < missing:
+            return
+
+        for c, child in state.arcs.iteritems():
+            if c == DELIMITER:
+                continue
+
+            i = LETTER_INDEX[c]
+            if counts[i]:
+                counts[i] -= 1
+                used_blank = 0
+            elif blanks:
+                used_blank = 1
+            else:
+                continue
+
+            took_needed = needed[i] > 0
+            if took_needed:
+                needed[i] -= 1
+
+            letters.append(c)
+            search(child, blanks - used_blank, missing - took_needed)
+            letters.pop()
+
+            if took_needed:
+                needed[i] += 1
+            if not used_blank:
+                counts[i] += 1
+
+    if max_length > 0:
+        search(gaddag.root, blanks, missing)
+
+    return words
@@ -1,6 +1,38 @@
 __author__ = 'Jacky'
 
+import os
+
 WORDLIST_PATH = 'wordlists/OSPD4_stripped.txt'
 WORDLIST_NAME = 'Official Scrabble Players Dictionary 4'
 
-GADDAG_PICKLE_PATH = 'pickles/OSPD4_gaddag.pkl'
+GADDAG_BINARY_PATH = 'pickles/OSPD4_gaddag.bin'
+
+
+def _lexicon_cache_dir():
+    """
+    Returns the directory for lexicon artifacts: $PYSCRABBLE_CACHE_DIR if it
+    is set, else pyscrabble/lexicons in the user's cache directory
+    ($XDG_CACHE_HOME, or ~/.cache), else a cache directory in the package
+    when there is no home directory.
+    """
+    directory = os.environ.get('PYSCRABBLE_CACHE_DIR')
+    if directory:
+        return directory
+
+    user_cache = os.environ.get('XDG_CACHE_HOME')
+    if not user_cache:
+        home = os.path.expanduser('~')
+        if home != '~':
+            user_cache = os.path.join(home, '.cache')
+    if user_cache:
+        return os.path.join(user_cache, 'pyscrabble', 'lexicons')
+
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache')
+
+
+# Directory for lexicon artifacts derived from wordlists, see lexicon.manager.
+# It doesn't depend on the working directory, so runs from anywhere share it.
+LEXICON_CACHE_DIR = _lexicon_cache_dir()
+
+# Maximum number of memoized results per GADDAG query type, see lexicon.cache
+QUERY_CACHE_SIZE = 1 << 16
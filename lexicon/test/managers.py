@@ -0,0 +1,33 @@
+__author__ = 'Jacky'
+
+import atexit
+import os
+import shutil
+import tempfile
+
+from lexicon.manager import LexiconManager
+from lexicon.wordlist import iter_words, write_words
+
+# Lexicon manager for the games of the tests, caching its artifacts in a
+# temporary directory removed when the tests exit, so that test runs leave
+# nothing behind in the user's lexicon cache
+temp_manager = LexiconManager(tempfile.mkdtemp())
+atexit.register(shutil.rmtree, temp_manager.cache_dir, True)
+
+OSPD4_PATH = './wordlists/OSPD4_stripped.txt'
+
+_wordlist_dir = tempfile.mkdtemp()
+atexit.register(shutil.rmtree, _wordlist_dir, True)
+
+
+def short_wordlist(max_length=5):
+    """
+    Returns the path of a wordlist of the OSPD4 words of at most max_length
+    letters: a real lexicon, with its hooks and extensions, that is still
+    quick to build. It is written once per test run.
+    """
+    path = os.path.join(_wordlist_dir, 'ospd4_%d.txt' % max_length)
+    if not os.path.exists(path):
+        write_words(path, (word for word in iter_words(OSPD4_PATH) if len(word) <= max_length))
+
+    return path
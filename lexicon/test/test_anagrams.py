@@ -0,0 +1,45 @@
+__author__ = 'Jacky'
+
+import unittest
+
+from lexicon.anagrams import *
+
+
+class TestAnagramIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = AnagramIndex(['STOP', 'POTS', 'TOPS', 'SPOT', 'POT', 'TOP', ''])
+
+    def test_alphagram(self):
+        self.assertEqual('OPST', alphagram('stop'))
+        self.assertEqual(alphagram('STOP'), alphagram('POTS'))
+
+    def test_anagrams(self):
+        self.assertEqual(('POTS', 'SPOT', 'STOP', 'TOPS'), self.index.anagrams('OPTS'))
+        self.assertEqual(('POT', 'TOP'), self.index.anagrams('top'))
+        self.assertEqual((), self.index.anagrams('XYZ'))
+        self.assertEqual(2, len(self.index))
+
+    def test_remove_word(self):
+        self.index.remove_word('STOP')
+        self.index.remove_word('POT')
+        self.index.remove_word('TOP')
+        self.index.remove_word('ZZZ')
+
+        self.assertEqual(('POTS', 'SPOT', 'TOPS'), self.index.anagrams('OPTS'))
+        self.assertEqual((), self.index.anagrams('OPT'))
+        self.assertEqual(1, len(self.index))
+
+    def test_blanks(self):
+        self.assertEqual(('POTS', 'SPOT', 'STOP', 'TOPS'), self.index.anagrams('OP?S'))
+        self.assertEqual(('POT', 'TOP'), self.index.anagrams(' OT'))
+        self.assertEqual(('POT', 'TOP'), self.index.anagrams('??T'))
+        self.assertEqual(('POTS', 'SPOT', 'STOP', 'TOPS'), self.index.anagrams('P??S'))
+        self.assertEqual((), self.index.anagrams('Q?'))
+
+    def test_bingos(self):
+        index = AnagramIndex(['RETAINS', 'NASTIER', 'RETINAS', 'STAINER', 'RESTRAIN'])
+
+        self.assertEqual(('NASTIER', 'RETAINS', 'RETINAS', 'STAINER'), index.bingos('AEINRST'))
+        self.assertEqual(('RESTRAIN',), index.bingos('AEINRST' + 'R'))
+        self.assertEqual(('RESTRAIN',), index.bingos('AEINRS?R'))
+        self.assertRaises(ValueError, index.bingos, 'AEINST')
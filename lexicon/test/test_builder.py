@@ -0,0 +1,87 @@
+__author__ = 'Jacky'
+
+import bz2
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+from itertools import product
+
+from lexicon.builder import *
+from lexicon.gaddag import gaddag_from_file
+from lexicon.lexicon_set import read_lexicon
+
+
+class TestBuilder(unittest.TestCase):
+    def setUp(self):
+        self.wordlist = './wordlists/test_list1.txt'
+        self.gaddag = gaddag_from_file(self.wordlist)
+        self.fragments = [''.join(p) for i in xrange(1, 4) for p in product('ABCDZ', repeat=i)]
+
+    def assertSameLexicon(self, gaddag):
+        for word in self.fragments:
+            self.assertEqual(self.gaddag.is_word(word), gaddag.is_word(word))
+            self.assertEqual(self.gaddag.cross_sets(word), gaddag.cross_sets(word))
+            self.assertEqual(self.gaddag.mid_set(word, 'B'), gaddag.mid_set(word, 'B'))
+            self.assertEqual(self.gaddag.mid_set('A', word), gaddag.mid_set('A', word))
+
+    def test_gaddag_paths(self):
+        self.assertEqual(['A|BC', 'BA|C', 'CBA'], list(gaddag_paths('ABC')))
+        self.assertEqual(['BA|C'], list(gaddag_paths('ABC', 'B')))
+        self.assertEqual(['A|BA', 'ABA'], list(gaddag_paths('ABA', 'A')))
+
+    def test_minimal_gaddag(self):
+        paths = sorted(path for word in read_lexicon(self.wordlist)
+                       for path in gaddag_paths(word))
+        gaddag = minimal_gaddag(paths)
+
+        self.assertSameLexicon(gaddag)
+        self.assertEqual(self.gaddag.minimize().nodes_after, gaddag.size()[0])
+
+    def test_serial(self):
+        compact = parallel_gaddag_from_file(self.wordlist, processes=1)
+
+        self.assertSameLexicon(compact)
+        self.assertEqual(self.gaddag.minimize().nodes_after, compact.node_count)
+
+    def test_unminimized(self):
+        compact = parallel_gaddag_from_file(self.wordlist, processes=1, minimize=False)
+
+        self.assertSameLexicon(compact)
+        self.assert_(compact.node_count > self.gaddag.size()[0])
+
+    def test_pool(self):
+        serial = parallel_gaddag_from_file(self.wordlist, processes=1)
+        pooled = parallel_gaddag_from_file(self.wordlist, processes=2)
+
+        # Partitions are merged in a fixed order, so the tables are identical
+        self.assertEqual(list(serial.arc_masks), list(pooled.arc_masks))
+        self.assertEqual(list(serial.targets), list(pooled.targets))
+
+    def test_merge(self):
+        parts = [CompactGaddag(*build_partition((self.wordlist, letters, True)))
+                 for letters in ('AB', 'CDE')]
+        self.assertSameLexicon(merge_gaddags(parts))
+
+        self.assertRaises(ValueError, merge_gaddags, [parts[0], parts[0]])
+
+    def test_compressed(self):
+        directory = tempfile.mkdtemp()
+        try:
+            with open(self.wordlist, 'rb') as f:
+                contents = f.read()
+
+            gz = os.path.join(directory, 'words.gz')
+            with gzip.open(gz, 'wb') as f:
+                f.write(contents)
+
+            bz = os.path.join(directory, 'words.bz2')
+            with open(bz, 'wb') as f:
+                f.write(bz2.compress(contents))
+
+            self.assertSameLexicon(parallel_gaddag_from_file(gz, processes=1))
+            self.assertSameLexicon(parallel_gaddag_from_file(bz, processes=1))
+            self.assertEqual(read_lexicon(self.wordlist), read_lexicon(gz))
+        finally:
+            shutil.rmtree(directory)
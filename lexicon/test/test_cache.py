@@ -0,0 +1,109 @@
+__author__ = 'Jacky'
+
+import threading
+import unittest
+
+from lexicon.cache import *
+from lexicon.gaddag import gaddag_from_file
+from lexicon.multi_gaddag import multi_gaddag_from_files
+
+
+class TestBoundedCache(unittest.TestCase):
+    def test_lru(self):
+        cache = BoundedCache(2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+
+        self.assertEqual(1, cache.get('a'))
+        cache.put('c', 3)   # Evicts b, the least recently used
+
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(1, cache.get('a'))
+        self.assertEqual(3, cache.get('c'))
+
+        stats = cache.stats()
+        self.assertEqual(3, stats['hits'])
+        self.assertEqual(1, stats['misses'])
+        self.assertEqual(1, stats['evictions'])
+        self.assertEqual(2, stats['size'])
+
+    def test_fifo(self):
+        cache = BoundedCache(2, 'fifo')
+        cache.put('a', 1)
+        cache.put('b', 2)
+
+        self.assertEqual(1, cache.get('a'))
+        cache.put('c', 3)   # Evicts a, the oldest
+
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(2, cache.get('b'))
+
+    def test_clear(self):
+        cache = BoundedCache(2)
+        cache.put('a', 1)
+        cache.clear()
+
+        self.assertEqual(0, len(cache))
+        self.assertIsNone(cache.get('a'))
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, BoundedCache, 0)
+        self.assertRaises(ValueError, BoundedCache, 2, 'random')
+
+    def test_threads(self):
+        cache = BoundedCache(50)
+
+        def work(offset):
+            for i in xrange(1000):
+                cache.put((offset + i) % 100, i)
+                cache.get((offset + i * 7) % 100)
+
+        threads = [threading.Thread(target=work, args=(n,)) for n in xrange(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        stats = cache.stats()
+        self.assertEqual(4000, stats['hits'] + stats['misses'])
+        self.assert_(len(cache) <= 50)
+
+
+class TestMemoizedGaddag(unittest.TestCase):
+    def setUp(self):
+        self.gaddag = gaddag_from_file('./wordlists/test_list1.txt')
+        self.memo = MemoizedGaddag(self.gaddag, maxsize=4)
+
+    def test_queries(self):
+        for word in ['AB', 'ab', 'CD', 'ZZ', 'AB']:
+            self.assertEqual(self.gaddag.cross_sets(word.upper()), self.memo.cross_sets(word))
+        for prefix, suffix in [('A', 'C'), ('a', 'c'), ('ZZ', 'A')]:
+            self.assertEqual(self.gaddag.mid_set(prefix, suffix), self.memo.mid_set(prefix, suffix))
+
+        stats = self.memo.stats()
+        self.assertEqual(2, stats['cross_sets']['hits'])
+        self.assertEqual(3, stats['cross_sets']['misses'])
+        self.assertEqual(1, stats['mid_set']['hits'])
+        self.assertEqual(2, stats['mid_set']['misses'])
+
+    def test_lexicon(self):
+        multi = multi_gaddag_from_files(['./wordlists/test_list1.txt', './wordlists/ABBA.txt'])
+        memo = MemoizedGaddag(multi)
+
+        # Each lexicon is memoized under its own key
+        for lexicon in ('ABBA', None, 'test_list1', 'ABBA'):
+            self.assertEqual(multi.cross_sets('AB', lexicon), memo.cross_sets('ab', lexicon))
+            self.assertEqual(multi.mid_set('A', 'C', lexicon), memo.mid_set('a', 'c', lexicon))
+        self.assertEqual(1, memo.stats()['cross_sets']['hits'])
+        self.assertEqual(1, memo.stats()['mid_set']['hits'])
+
+    def test_passthrough(self):
+        self.assert_(self.memo.root is self.gaddag.root)
+        self.assert_(self.memo.is_word('BAD'))
+
+    def test_clear(self):
+        self.memo.cross_sets('AB')
+        self.memo.clear()
+        self.memo.cross_sets('AB')
+
+        self.assertEqual(2, self.memo.stats()['cross_sets']['misses'])
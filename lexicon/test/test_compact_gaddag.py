@@ -0,0 +1,116 @@
+__author__ = 'Jacky'
+
+import unittest
+from itertools import product
+
+from lexicon.gaddag import Gaddag, gaddag_from_file
+from lexicon.compact_gaddag import *
+from lexicon.letter_masks import ALPHABET, to_mask
+from lexicon.lexicon_set import read_lexicon
+from engine.game import ScrabbleGame
+from strategy.strategies import StaticScoreStrategy
+from lexicon.test.managers import temp_manager
+
+
+class TestCompactGaddag(unittest.TestCase):
+    def setUp(self):
+        self.gaddag = gaddag_from_file('./wordlists/test_list1.txt')
+        self.compact = CompactGaddag.from_gaddag(self.gaddag)
+
+        self.fragments = [''.join(p) for i in xrange(1, 4)
+                          for p in product('ABCDEZ', repeat=i)]
+
+    def test_root(self):
+        root = self.compact.root
+
+        self.assertEqual(0, root.node)
+        self.assertEqual(set(self.gaddag.root.arcs.keys()), set(root.arcs.keys()))
+        self.assertIn('A', root.arcs)
+        self.assertNotIn('Z', root.arcs)
+        self.assertIsNone(root.arcs.get('Z'))
+        self.assertRaises(KeyError, lambda: root.arcs['Z'])
+
+    def test_traversal(self):
+        # Every path of the object GADDAG exists in the compact one with the
+        # same letter sets
+        stack = [(self.gaddag.root, self.compact.root)]
+        while stack:
+            state, compact_state = stack.pop()
+            self.assertEqual(state.letter_set, compact_state.letter_set)
+            self.assertEqual(set(state.arcs.keys()), set(compact_state.arcs.keys()))
+
+            for char, child in state.arcs.iteritems():
+                stack.append((child, compact_state.arcs[char]))
+
+    def test_shared_states(self):
+        # force_arc sharing survives packing
+        g = Gaddag()
+        g.add_word('ABCDEFG')
+        compact = CompactGaddag.from_gaddag(g)
+
+        self.assertEqual(compact.root.arcs['A'].arcs['|'].arcs['B'],
+                         compact.root.arcs['B'].arcs['A'].arcs['|'])
+        self.assert_(compact.node_count < 2 * len('ABCDEFG') ** 2)
+
+    def test_is_word(self):
+        for word in self.fragments:
+            self.assertEqual(self.gaddag.is_word(word), self.compact.is_word(word))
+
+        self.assert_(self.compact.is_word('BAD'))
+        self.assert_(not self.compact.is_word(''))
+
+    def test_cross_sets(self):
+        for word in self.fragments:
+            self.assertEqual(self.gaddag.cross_sets(word), self.compact.cross_sets(word))
+
+        self.assertEqual((0, 0), self.compact.cross_sets('ZZZZ'))
+
+    def test_mid_set(self):
+        for prefix in self.fragments[:42]:
+            for suffix in self.fragments[:42]:
+                self.assertEqual(self.gaddag.mid_set(prefix, suffix),
+                                 self.compact.mid_set(prefix, suffix))
+
+        self.assertEqual(0, self.compact.mid_set('ZZZ', 'ZZZ'))
+
+    def test_mid_set_brute_force(self):
+        words = read_lexicon('./wordlists/test_list1.txt')
+        for prefix in self.fragments[:42] + ['']:
+            for suffix in self.fragments[:42] + ['']:
+                expected = to_mask(l for l in ALPHABET if prefix + l + suffix in words)
+                self.assertEqual(expected, self.gaddag.mid_set(prefix, suffix))
+                self.assertEqual(expected, self.compact.mid_set(prefix, suffix))
+
+    def test_to_gaddag(self):
+        gaddag = self.compact.to_gaddag()
+
+        self.assert_(gaddag.minimized)
+        self.assertEqual(self.compact.node_count, gaddag.size()[0])
+        for word in self.fragments:
+            self.assertEqual(self.gaddag.cross_sets(word), gaddag.cross_sets(word))
+
+    def test_patched(self):
+        words = read_lexicon('./wordlists/test_list1.txt')
+        patched = self.compact.patched(['ZED', 'ZA'], ['BAD', 'AB'])
+        words = (words - {'BAD', 'AB'}) | {'ZED', 'ZA'}
+
+        for word in self.fragments:
+            self.assertEqual(word in words, patched.is_word(word))
+        self.assert_(self.compact.is_word('BAD'))
+
+        # Same automaton as a rebuild of the new word list
+        g = Gaddag()
+        for word in words:
+            g.add_word(word)
+        self.assertEqual(g.minimize().nodes_after, patched.node_count)
+
+    def test_move_generation(self):
+        game = ScrabbleGame('./wordlists/ABBA.txt', lexicon_manager=temp_manager)
+        game.gaddag = gaddag_from_file('./wordlists/ABBA.txt')
+        game.add_player('Bob')
+        game.players[0].rack = list('AABB BA')
+
+        expected = set(StaticScoreStrategy(game).generate_moves())
+
+        game.gaddag = CompactGaddag.from_gaddag(game.gaddag)
+        self.assertEqual(expected, set(StaticScoreStrategy(game).generate_moves()))
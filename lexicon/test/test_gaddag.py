@@ -3,6 +3,7 @@ __author__ = 'Jacky'
 import unittest
 
 from lexicon.gaddag import *
+from lexicon.letter_masks import to_mask
 
 
 class TestGaddagState(unittest.TestCase):
@@ -21,7 +22,7 @@ class TestGaddagState(unittest.TestCase):
         self.assertIn('A', self.state.arcs)
         self.assertEquals(new_state, self.state.arcs['A'])
 
-        self.assertIn('B', new_state.letter_set)
+        self.assert_(new_state.letter_set & to_mask('B'))
 
     def test_force_arc(self):
         force = GaddagState()
@@ -51,7 +52,7 @@ class TestGaddag(unittest.TestCase):
                 for letter in rev_prefix[:-1]:
                     self.assertIn(letter, cur_state.arcs)
                     cur_state = cur_state.arcs[letter]
-                self.assertIn(rev_prefix[-1], cur_state.letter_set)
+                self.assert_(cur_state.letter_set & to_mask(rev_prefix[-1]))
             else:
                 for letter in rev_prefix:
                     self.assertIn(letter, cur_state.arcs)
@@ -61,12 +62,12 @@ class TestGaddag(unittest.TestCase):
                 cur_state = cur_state.arcs['|']
 
             if len(suffix) == 1:
-                self.assertIn(suffix[0], cur_state.letter_set)
+                self.assert_(cur_state.letter_set & to_mask(suffix[0]))
             elif len(suffix) > 0:
                 for letter in suffix[:-1]:
                     self.assertIn(letter, cur_state.arcs)
                     cur_state = cur_state.arcs[letter]
-                self.assertIn(suffix[-1], cur_state.letter_set)
+                self.assert_(cur_state.letter_set & to_mask(suffix[-1]))
 
     def test_is_word(self):
         self.gaddag.add_word(self.word)
@@ -79,35 +80,119 @@ class TestGaddag(unittest.TestCase):
 
         subword = self.word[1:]
         left, right = self.gaddag.cross_sets(subword)
-        self.assertEqual({self.word[0]}, left)
-        self.assertEqual(set(), right)
+        self.assertEqual(to_mask(self.word[0]), left)
+        self.assertEqual(0, right)
 
         subword = self.word[:-1]
         left, right = self.gaddag.cross_sets(subword)
-        self.assertEqual(set(), left)
-        self.assertEqual({self.word[-1]}, right)
+        self.assertEqual(0, left)
+        self.assertEqual(to_mask(self.word[-1]), right)
 
-        self.assertEqual((set(), set()), self.gaddag.cross_sets('ZZZZ'))
+        self.assertEqual((0, 0), self.gaddag.cross_sets('ZZZZ'))
 
         # Test for lowercase (blank)
         self.word = 'ABcDEFG'
         subword = self.word[1:]
         left, right = self.gaddag.cross_sets(subword)
-        self.assertEqual({self.word[0]}, left)
-        self.assertEqual(set(), right)
+        self.assertEqual(to_mask(self.word[0]), left)
+        self.assertEqual(0, right)
 
         subword = self.word[:-1]
         left, right = self.gaddag.cross_sets(subword)
-        self.assertEqual(set(), left)
-        self.assertEqual({self.word[-1]}, right)
+        self.assertEqual(0, left)
+        self.assertEqual(to_mask(self.word[-1]), right)
 
-        self.assertEqual((set(), set()), self.gaddag.cross_sets('ZZZZ'))
+        self.assertEqual((0, 0), self.gaddag.cross_sets('ZZZZ'))
 
     def test_mid_set(self):
         self.gaddag.add_word(self.word)
 
         for i in xrange(1, len(self.word) - 1):
             s = self.gaddag.mid_set(self.word[0:i], self.word[i+1:])
-            self.assertEqual({self.word[i]}, s)
-
-        self.assertEqual(set(), self.gaddag.mid_set('ZZZ', 'ZZZ'))
\ No newline at end of file
+            self.assertEqual(to_mask(self.word[i]), s)
+
+        self.assertEqual(0, self.gaddag.mid_set('ZZZ', 'ZZZ'))
+
+    def test_size(self):
+        self.assertEqual((1, 0), self.gaddag.size())
+
+        self.gaddag.add_word('AB')
+        # root -B-> {A} and root -A-> -|-> {B}
+        self.assertEqual((4, 3), self.gaddag.size())
+
+    def test_minimize(self):
+        words = ['CARE', 'CARES', 'BARE', 'BARES', 'CAT', 'CATS', 'BAT', 'BATS']
+        for word in words:
+            self.gaddag.add_word(word)
+
+        fragments = set()
+        for word in words:
+            for i in xrange(len(word)):
+                for j in xrange(i + 1, len(word) + 1):
+                    fragments.add(word[i:j])
+
+        expected_words = {w: self.gaddag.is_word(w) for w in fragments}
+        expected_crosses = {w: self.gaddag.cross_sets(w) for w in fragments}
+        expected_mids = {(p, s): self.gaddag.mid_set(p, s) for p in fragments for s in fragments}
+
+        nodes, arcs = self.gaddag.size()
+        stats = self.gaddag.minimize()
+
+        self.assertEqual((nodes, arcs), (stats.nodes_before, stats.arcs_before))
+        self.assertEqual(self.gaddag.size(), (stats.nodes_after, stats.arcs_after))
+        self.assert_(stats.nodes_after < stats.nodes_before)
+        self.assert_(stats.arcs_after < stats.arcs_before)
+        self.assert_(self.gaddag.minimized)
+
+        for w in fragments:
+            self.assertEqual(expected_words[w], self.gaddag.is_word(w))
+            self.assertEqual(expected_crosses[w], self.gaddag.cross_sets(w))
+        for p in fragments:
+            for s in fragments:
+                self.assertEqual(expected_mids[(p, s)], self.gaddag.mid_set(p, s))
+
+        # A second pass has nothing left to merge
+        stats = self.gaddag.minimize()
+        self.assertEqual((stats.nodes_before, stats.arcs_before),
+                         (stats.nodes_after, stats.arcs_after))
+
+    def test_remove_word(self):
+        words = ['CARE', 'CARES', 'CAR', 'BARE', 'AB', 'ABC']
+        for word in words:
+            self.gaddag.add_word(word)
+
+        self.assert_(self.gaddag.remove_word('CARE'))
+        self.assert_(not self.gaddag.remove_word('CARE'))
+        self.assert_(not self.gaddag.remove_word('ZZZ'))
+
+        self.assert_(not self.gaddag.is_word('CARE'))
+        for word in words[1:]:
+            self.assert_(self.gaddag.is_word(word))
+        self.assertEqual(0, self.gaddag.mid_set('CAR', ''))
+        self.assertEqual(to_mask('S'), self.gaddag.mid_set('CARE', ''))
+        self.assertEqual(to_mask('B'), self.gaddag.mid_set('', 'ARE'))
+
+        # Nothing is left of a word that shared no letters with the others
+        self.gaddag = Gaddag()
+        self.gaddag.add_word('AB')
+        self.gaddag.remove_word('AB')
+        self.assertEqual((1, 0), self.gaddag.size())
+
+    def test_minimized_updates(self):
+        words = ['CARE', 'CARES', 'BARE', 'BARES', 'CAT', 'CATS', 'BAT', 'BATS']
+        for word in words:
+            self.gaddag.add_word(word)
+        self.gaddag.minimize()
+
+        # BARE shares its states with CARE after minimization
+        self.gaddag.remove_word('BARE')
+        self.gaddag.add_word('CATE')
+        self.gaddag.apply_diff(['BAA'], ['CAT'])
+
+        expected = set(words + ['CATE', 'BAA']) - {'BARE', 'CAT'}
+        fragments = {w[i:j] for w in words + ['CATE', 'BAA']
+                     for i in xrange(len(w)) for j in xrange(i + 1, len(w) + 1)}
+        for word in fragments:
+            self.assertEqual(word in expected, self.gaddag.is_word(word))
+        self.assertEqual(to_mask('C'), self.gaddag.cross_sets('ARE')[0])
+        self.assertEqual(to_mask('T'), self.gaddag.mid_set('BA', 'S'))
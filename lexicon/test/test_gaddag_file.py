@@ -0,0 +1,79 @@
+__author__ = 'Jacky'
+
+import os
+import shutil
+import tempfile
+import unittest
+from itertools import product
+
+from lexicon.gaddag import gaddag_from_file
+from lexicon.compact_gaddag import CompactGaddag
+from lexicon.gaddag_file import *
+from engine.game import ScrabbleGame
+from lexicon.test.managers import temp_manager
+
+
+class TestGaddagFile(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.dir, 'lexicon', 'test.bin')
+
+        self.compact = CompactGaddag.from_gaddag(
+            gaddag_from_file('./wordlists/test_list1.txt'))
+        write_gaddag(self.compact, self.filename)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_round_trip(self):
+        mapped = load_gaddag(self.filename)
+
+        self.assertEqual(self.compact.node_count, mapped.node_count)
+        self.assertEqual(self.compact.arc_count, mapped.arc_count)
+        self.assertEqual(list(self.compact.arc_masks), list(mapped.arc_masks))
+        self.assertEqual(list(self.compact.letter_masks), list(mapped.letter_masks))
+        self.assertEqual(list(self.compact.first_arcs), list(mapped.first_arcs))
+        self.assertEqual(list(self.compact.targets), list(mapped.targets))
+
+        fragments = [''.join(p) for i in xrange(1, 4) for p in product('ABCEZ', repeat=i)]
+        for word in fragments:
+            self.assertEqual(self.compact.is_word(word), mapped.is_word(word))
+            self.assertEqual(self.compact.cross_sets(word), mapped.cross_sets(word))
+            self.assertEqual(self.compact.mid_set(word, 'A'), mapped.mid_set(word, 'A'))
+
+        mapped.close()
+
+    def test_bad_files(self):
+        # Empty files can't be mapped, truncated headers can't be read
+        for size in (0, HEADER.size - 1):
+            with open(self.filename, 'r+b') as f:
+                f.truncate(size)
+            self.assertRaises(IOError, load_gaddag, self.filename)
+            self.assertRaises(IOError, read_gaddag, self.filename)
+
+        write_gaddag(self.compact, self.filename)
+        with open(self.filename, 'r+b') as f:
+            f.write('XXXX')
+        self.assertRaises(IOError, load_gaddag, self.filename)
+
+        with open(self.filename, 'r+b') as f:
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION + 1, 0, 0))
+        self.assertRaises(IOError, load_gaddag, self.filename)
+
+        write_gaddag(self.compact, self.filename)
+        with open(self.filename, 'r+b') as f:
+            f.truncate(HEADER.size + 4)
+        self.assertRaises(IOError, load_gaddag, self.filename)
+
+    def test_mapped_array(self):
+        mapped = load_gaddag(self.filename)
+
+        self.assertEqual(self.compact.targets[-1], mapped.targets[-1])
+        self.assertRaises(IndexError, lambda: mapped.targets[mapped.arc_count])
+
+    def test_game(self):
+        game = ScrabbleGame('./wordlists/test_list1.txt', gaddag_path=self.filename,
+                            lexicon_manager=temp_manager)
+
+        self.assert_(isinstance(game.gaddag, MappedGaddag))
+        self.assert_(game.gaddag.is_word('BAD'))
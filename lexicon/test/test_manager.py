@@ -0,0 +1,201 @@
+__author__ = 'Jacky'
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from lexicon import manager
+from lexicon.manager import *
+from lexicon.cache import MemoizedGaddag
+from lexicon.compact_gaddag import CompactGaddag
+from lexicon.gaddag_file import MappedGaddag
+from lexicon.letter_masks import to_mask
+from lexicon.wordlist import BZIP2, GZIP, iter_words, wordlist_compression, write_words
+from engine.game import ScrabbleGame
+from strategy.cross_sets import recompute_all_crosses
+
+
+class TestLexiconManager(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.dir, 'cache')
+
+        self.wordlist = os.path.join(self.dir, 'words.txt')
+        with open(self.wordlist, 'w') as f:
+            f.write('AB\nBA\nCAB\n')
+
+        self.manager = LexiconManager(self.cache_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_shared_instance(self):
+        lexicon = self.manager.lexicon(self.wordlist)
+
+        self.assert_(lexicon is self.manager.lexicon(self.wordlist))
+        self.assert_(lexicon.words is self.manager.lexicon(self.wordlist).words)
+
+        # Same content under another name is the same lexicon
+        copy = os.path.join(self.dir, 'copy.txt')
+        shutil.copy(self.wordlist, copy)
+        self.assert_(lexicon is self.manager.lexicon(copy))
+
+    def test_artifacts(self):
+        lexicon = self.manager.lexicon(self.wordlist)
+
+        self.assertEqual({'AB', 'BA', 'CAB'}, lexicon.words)
+        self.assert_(isinstance(lexicon.gaddag, MemoizedGaddag))
+        self.assert_(isinstance(lexicon.gaddag.gaddag, MappedGaddag))
+        self.assert_(lexicon.gaddag.is_word('CAB'))
+        self.assertEqual(('AB', 'BA'), lexicon.anagrams.anagrams('BA'))
+
+        self.assertEqual({'words.pkl', 'gaddag.bin', 'anagrams.pkl'},
+                         set(os.listdir(lexicon.directory)))
+
+        # Cache files get the usual permissions, not mkstemp's
+        umask = os.umask(0)
+        os.umask(umask)
+        for name in os.listdir(lexicon.directory):
+            mode = os.stat(os.path.join(lexicon.directory, name)).st_mode
+            self.assertEqual(0666 & ~umask, mode & 0777)
+
+    def test_reuse(self):
+        lexicon = self.manager.lexicon(self.wordlist)
+        lexicon.words
+        lexicon.gaddag
+
+        # A new manager (e.g. in another process) reads the cached artifacts
+        # instead of building them from the wordlist again
+        def fail(*args):
+            self.fail('Artifact rebuilt')
+
+        build = manager.read_lexicon, manager.parallel_gaddag_from_file
+        manager.read_lexicon = manager.parallel_gaddag_from_file = fail
+        try:
+            cached = LexiconManager(self.cache_dir).lexicon(self.wordlist)
+            self.assert_(cached is not lexicon)
+            self.assertEqual(lexicon.words, cached.words)
+            self.assert_(cached.gaddag.is_word('CAB'))
+        finally:
+            manager.read_lexicon, manager.parallel_gaddag_from_file = build
+
+    def test_rebuild(self):
+        lexicon = self.manager.lexicon(self.wordlist)
+        lexicon.words
+
+        with open(self.wordlist, 'a') as f:
+            f.write('ABC\n')
+        os.utime(self.wordlist, (0, 0))
+
+        changed = self.manager.lexicon(self.wordlist)
+        self.assertNotEqual(lexicon.digest, changed.digest)
+        self.assertIn('ABC', changed.words)
+
+        # Artifacts from another format version aren't reused
+        old_version = manager.ARTIFACT_VERSION
+        manager.ARTIFACT_VERSION += 1
+        try:
+            fresh = LexiconManager(self.cache_dir).lexicon(self.wordlist)
+            self.assertNotEqual(changed.directory, fresh.directory)
+            self.assertIn('ABC', fresh.words)
+        finally:
+            manager.ARTIFACT_VERSION = old_version
+
+    def test_apply_diff(self):
+        game = ScrabbleGame(self.wordlist, read_gaddag=True, lexicon_manager=self.manager)
+        lexicon = game.lexicon
+        self.assert_(game.gaddag.is_word('CAB'))
+        self.assertEqual(to_mask('C'), game.gaddag.cross_sets('AB')[0])
+
+        game.add_player('Bob')
+        game.add_player('Jane')
+        game.start_game()
+        game.players[0].rack = list('AB')
+        game.players[1].rack = list('C')
+        self.assert_(game.make_move('AB', (7, 7), True, crosses=True))
+        self.assert_(game.crosses_current)
+
+        lexicon.apply_diff(['ABC', 'BAA'], ['CAB'])
+
+        # The cross sets computed before the diff are stale: C no longer
+        # hooks AB
+        self.assert_(not game.crosses_current)
+        self.assert_(not game.make_move('C', (7, 6), False))
+        recompute_all_crosses(game)
+        self.assert_(game.crosses_current)
+        self.assertEqual(0, game.horizontal_crosses[7][6])
+
+        # Loaded artifacts are updated in place and memoized queries dropped
+        self.assertEqual({'AB', 'BA', 'ABC', 'BAA'}, game.lexicon_set)
+        self.assert_(game.gaddag is lexicon.gaddag)
+        self.assert_(isinstance(game.gaddag.gaddag, CompactGaddag))
+        self.assert_(not game.gaddag.is_word('CAB'))
+        self.assert_(game.gaddag.is_word('ABC'))
+        self.assertEqual(0, game.gaddag.cross_sets('AB')[0])
+
+        # Artifacts loaded later get the diff as well
+        self.assertEqual(('ABC',), lexicon.anagrams.anagrams('CAB'))
+        fresh = LexiconManager(self.cache_dir).lexicon(self.wordlist)
+        fresh.apply_diff(['ABC', 'BAA'], ['CAB'])
+        self.assert_(fresh.gaddag.is_word('BAA'))
+        self.assert_(not fresh.gaddag.is_word('CAB'))
+
+    def test_update_wordlist(self):
+        lexicon = self.manager.lexicon(self.wordlist)
+        lexicon.words
+        lexicon.gaddag
+        old_directory = lexicon.directory
+
+        diff = os.path.join(self.dir, 'words.diff')
+        with open(diff, 'w') as f:
+            f.write('+ABC\n-CAB\n\n+BAA\n')
+
+        updated = self.manager.update_wordlist(self.wordlist, diff)
+        self.assert_(updated is lexicon)
+        self.assertNotEqual(old_directory, lexicon.directory)
+        self.assertEqual('AB\nABC\nBA\nBAA\n', open(self.wordlist).read())
+        self.assert_(lexicon is self.manager.lexicon(self.wordlist))
+
+        # Another process loads the updated artifacts without rebuilding
+        def fail(*args):
+            self.fail('Artifact rebuilt')
+
+        build = manager.read_lexicon, manager.parallel_gaddag_from_file
+        manager.read_lexicon = manager.parallel_gaddag_from_file = fail
+        try:
+            cached = LexiconManager(self.cache_dir).lexicon(self.wordlist)
+            self.assertEqual(lexicon.digest, cached.digest)
+            self.assertEqual({'AB', 'ABC', 'BA', 'BAA'}, cached.words)
+            self.assert_(cached.gaddag.is_word('BAA'))
+            self.assert_(not cached.gaddag.is_word('CAB'))
+        finally:
+            manager.read_lexicon, manager.parallel_gaddag_from_file = build
+
+        with open(diff, 'w') as f:
+            f.write('*ABC\n')
+        self.assertRaises(ValueError, self.manager.update_wordlist, self.wordlist, diff)
+
+    def test_update_compressed_wordlist(self):
+        diff = os.path.join(self.dir, 'words.diff')
+        with open(diff, 'w') as f:
+            f.write('+ABC\n-CAB\n')
+
+        for name, compression in (('words.gz', GZIP), ('words.bz2', BZIP2)):
+            wordlist = os.path.join(self.dir, name)
+            write_words(wordlist, ['AB', 'BA', 'CAB'], compression)
+            self.assertEqual({'AB', 'BA', 'CAB'}, self.manager.lexicon(wordlist).words)
+
+            lexicon = self.manager.update_wordlist(wordlist, diff)
+            self.assertEqual(compression, wordlist_compression(wordlist))
+            self.assertEqual(['AB', 'ABC', 'BA'], list(iter_words(wordlist)))
+            self.assert_(lexicon is self.manager.lexicon(wordlist))
+
+    def test_game(self):
+        game = ScrabbleGame(self.wordlist, read_gaddag=True, lexicon_manager=self.manager)
+        other = ScrabbleGame(self.wordlist, read_gaddag=True, lexicon_manager=self.manager)
+
+        self.assert_(game.lexicon is other.lexicon)
+        self.assert_(game.lexicon is self.manager.lexicon(self.wordlist))
+        self.assert_(game.lexicon_set is other.lexicon_set)
+        self.assert_(game.gaddag is other.gaddag)
@@ -0,0 +1,85 @@
+__author__ = 'Jacky'
+
+import os
+import shutil
+import tempfile
+import unittest
+from itertools import product
+
+from lexicon.builder import parallel_gaddag_from_file
+from lexicon.compact_gaddag import CompactGaddag
+from lexicon.gaddag import gaddag_from_file
+from lexicon.lexicon_set import read_lexicon
+from lexicon.multi_gaddag import *
+from engine.game import ScrabbleGame
+from strategy.strategies import StaticScoreStrategy
+from lexicon.test.managers import temp_manager
+
+
+class TestMultiGaddag(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.wordlists = ['./wordlists/test_list1.txt', './wordlists/ABBA.txt',
+                          os.path.join(self.directory, 'small.txt')]
+        with open(self.wordlists[2], 'w') as f:
+            f.write('AB\nBAD\nCAB\nZA\n')
+
+        self.multi = multi_gaddag_from_files(self.wordlists)
+        self.words = [read_lexicon(w) for w in self.wordlists]
+        self.gaddags = [CompactGaddag.from_gaddag(gaddag_from_file(w)) for w in self.wordlists]
+
+        self.fragments = [''.join(p) for i in xrange(1, 4) for p in product('ABCDZ', repeat=i)]
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_names(self):
+        self.assertEqual(('test_list1', 'ABBA', 'small'), self.multi.names)
+        self.assertEqual(1, self.multi.lexicon_index('ABBA'))
+        self.assertEqual(2, self.multi.lexicon_index(2))
+        self.assertRaises(KeyError, self.multi.lexicon_index, 'TWL')
+        self.assertRaises(KeyError, self.multi.lexicon_index, 3)
+        self.assertRaises(ValueError, multi_gaddag_from_files, self.wordlists[:2], ['A'])
+
+    def test_membership(self):
+        union = set.union(*self.words)
+        for word in self.fragments + ['ABBA', 'ZA', 'BAAB']:
+            expected = sum(1 << k for k, words in enumerate(self.words) if word in words)
+            self.assertEqual(expected, self.multi.lexicons(word))
+            self.assertEqual(word in union, self.multi.is_word(word))
+
+            for k, name in enumerate(self.multi.names):
+                self.assertEqual(word in self.words[k], self.multi.is_word(word, k))
+                self.assertEqual(word in self.words[k], self.multi.is_word(word, name))
+
+        self.assertEqual(0, self.multi.lexicons(''))
+
+    def test_queries(self):
+        for k, gaddag in enumerate(self.gaddags):
+            for word in self.fragments:
+                self.assertEqual(gaddag.cross_sets(word), self.multi.cross_sets(word, k))
+                self.assertEqual(gaddag.mid_set(word, 'B'), self.multi.mid_set(word, 'B', k))
+                self.assertEqual(gaddag.mid_set('A', word), self.multi.mid_set('A', word, k))
+
+            self.assertEqual(gaddag.words_from_rack('ABCDE?'),
+                             self.multi.words_from_rack('ABCDE?', lexicon=k))
+
+    def test_shared_arcs(self):
+        # A single wordlist gives the same minimal automaton as the builder
+        single = multi_gaddag_from_files(self.wordlists[:1])
+        self.assertEqual(parallel_gaddag_from_file(self.wordlists[0], 1).node_count,
+                         single.node_count)
+
+        # Lexicons share states, so the union is smaller than the sum
+        sizes = [parallel_gaddag_from_file(w, 1).node_count for w in self.wordlists]
+        self.assert_(self.multi.node_count < sum(sizes))
+
+    def test_move_generation(self):
+        game = ScrabbleGame('./wordlists/ABBA.txt', lexicon_manager=temp_manager)
+        game.gaddag = self.gaddags[1]
+        game.add_player('Bob')
+        game.players[0].rack = list('AABB BA')
+        expected = set(StaticScoreStrategy(game).generate_moves())
+
+        game.gaddag = self.multi.select('ABBA')
+        self.assertEqual(expected, set(StaticScoreStrategy(game).generate_moves()))
@@ -0,0 +1,61 @@
+__author__ = 'Jacky'
+
+import unittest
+
+from lexicon.compact_gaddag import CompactGaddag
+from lexicon.gaddag import Gaddag, gaddag_from_file
+from lexicon.lexicon_set import read_lexicon
+from lexicon.rack_words import *
+
+
+def formable(word, rack):
+    counts, blanks = rack_counts(rack)
+    for c in word:
+        i = ord(c) - ord('A')
+        if counts[i]:
+            counts[i] -= 1
+        elif blanks:
+            blanks -= 1
+        else:
+            return False
+
+    return True
+
+
+class TestRackWords(unittest.TestCase):
+    def setUp(self):
+        self.words = read_lexicon('./wordlists/test_list1.txt')
+        self.gaddag = gaddag_from_file('./wordlists/test_list1.txt')
+        self.compact = CompactGaddag.from_gaddag(self.gaddag)
+
+    def test_rack_counts(self):
+        counts, blanks = rack_counts('aAB ?|')
+        self.assertEqual([2, 1] + [0] * 24, counts)
+        self.assertEqual(2, blanks)
+
+    def test_words_from_rack(self):
+        for rack in ['ABC', 'ABCDE', 'AABBE', 'A?', 'AB ', 'E??', 'Z', '']:
+            expected = {w for w in self.words if formable(w, rack)}
+            self.assertEqual(expected, self.gaddag.words_from_rack(rack))
+            self.assertEqual(expected, self.compact.words_from_rack(rack))
+
+    def test_filters(self):
+        rack = 'ABCD?'
+        expected = {w for w in self.words if formable(w, rack) and 3 <= len(w) <= 4}
+        self.assertEqual(expected, self.gaddag.words_from_rack(rack, 3, 4))
+
+        expected = {w for w in self.words if formable(w, rack) and 'E' in w and 'D' in w}
+        self.assertEqual(expected, self.compact.words_from_rack(rack, required='ED'))
+
+        self.assertEqual(set(), self.gaddag.words_from_rack(rack, required='EE'))
+        self.assertEqual(set(), self.gaddag.words_from_rack(rack, 6))
+
+    def test_repeated_letters(self):
+        g = Gaddag()
+        for word in ['CARE', 'CARES', 'BAA', 'BA', 'ABBA']:
+            g.add_word(word)
+
+        self.assertEqual({'BA', 'BAA'}, g.words_from_rack('AAB'))
+        self.assertEqual({'ABBA', 'BA', 'BAA'}, g.words_from_rack('A?B?'))
+        self.assertEqual({'ABBA'}, g.words_from_rack('A?B?', required='BB'))
+        self.assertEqual({'CARE', 'CARES'}, g.words_from_rack('SCARE', required='C'))
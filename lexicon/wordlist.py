@@ -0,0 +1,102 @@
+__author__ = 'Jacky'
+
+import bz2
+import gzip
+
+GZIP_MAGIC = '\x1f\x8b'
+BZ2_MAGIC = 'BZh'
+
+GZIP = 'gzip'
+BZIP2 = 'bzip2'
+
+
+def wordlist_compression(filename):
+    """
+    Returns the compression of a wordlist file, GZIP or BZIP2, or None if
+    it is plain text. The compression is detected from the contents of the
+    file rather than its name.
+    """
+    with open(filename, 'rb') as f:
+        magic = f.read(3)
+
+    if magic.startswith(GZIP_MAGIC):
+        return GZIP
+    elif magic == BZ2_MAGIC:
+        return BZIP2
+    else:
+        return None
+
+
+def open_wordlist(filename):
+    """
+    Open a wordlist file for reading, transparently decompressing it if it
+    is gzip or bzip2 compressed, see wordlist_compression.
+    """
+    compression = wordlist_compression(filename)
+    if compression == GZIP:
+        return gzip.open(filename, 'rb')
+    elif compression == BZIP2:
+        return bz2.BZ2File(filename, 'r')
+    else:
+        return open(filename, 'r')
+
+
+def write_words(filename, words, compression=None):
+    """
+    Write words to a wordlist file, one per line, compressed with GZIP or
+    BZIP2 or as plain text if compression is None.
+    """
+    data = ''.join(word + '\n' for word in words)
+    with open(filename, 'wb') as f:
+        if compression == GZIP:
+            # No file name in the header, as it would be that of a temporary
+            gz = gzip.GzipFile('', 'wb', fileobj=f)
+            gz.write(data)
+            gz.close()
+        elif compression == BZIP2:
+            f.write(bz2.compress(data))
+        else:
+            f.write(data)
+
+
+def iter_words(filename):
+    """
+    Yields the words of a wordlist file one at a time without reading the
+    whole file into memory. Blank lines are skipped.
+    """
+    f = open_wordlist(filename)
+    try:
+        for line in f:
+            word = line.strip()
+            if word:
+                yield word
+    finally:
+        f.close()
+
+
+def read_word_diff(filename):
+    """
+    Reads a word diff file, with one change per line: '+WORD' to add a word
+    to a lexicon and '-WORD' to remove it. Blank lines are skipped.
+
+    Returns:
+        (added, removed):
+            Lists of the words to add and to remove, in file order.
+    """
+    added, removed = [], []
+    f = open_wordlist(filename)
+    try:
+        for n, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+
+            op, word = line[0], line[1:].strip().upper()
+            if op not in '+-' or not word.isalpha():
+                raise ValueError('Improperly formatted word diff, line %d: %r.' % (n, line))
+
+            (added if op == '+' else removed).append(word)
+    finally:
+        f.close()
+
+    return added, removed
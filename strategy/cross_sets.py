@@ -1,9 +1,164 @@
 __author__ = 'Jacky'
 
+from array import array
+
 from engine import board
+from engine.scoring import NO_CROSS, cross_score, face_value
+from lexicon.letter_masks import ALL_LETTERS
+
+
+class CrossGrid(object):
+    """
+    A grid of cross-sets (letter masks), one per square of a board, kept
+    both as one array per row and, transposed, as one array per column, so
+    that move generation reads either direction without copying. The same
+    structure holds cross-scores, with a signed typecode.
+
+    Indexing the grid gives the array of a row, so grid[x][y] reads the
+    cross-set of square (x, y). Writes must go through set, which keeps the
+    two copies in step, and records the old value of the square in journal
+    if there is one, so that undo can take the writes back.
+    """
+
+    def __init__(self, height, width, mask=ALL_LETTERS, typecode='I'):
+        self.rows = [array(typecode, [mask]) * width for _ in xrange(height)]
+        self.columns = [array(typecode, [mask]) * height for _ in xrange(width)]
+
+        # (x, y, old mask) of every write, or None when not recording
+        self.journal = None
+
+    def set(self, x, y, mask):
+        if self.journal is not None:
+            self.journal.append((x, y, self.rows[x][y]))
+        self.rows[x][y] = mask
+        self.columns[y][x] = mask
+
+    def undo(self, journal):
+        """
+        Restore the old values of the writes recorded in a journal, latest
+        first.
+        """
+        for x, y, mask in reversed(journal):
+            self.rows[x][y] = mask
+            self.columns[y][x] = mask
+
+    def load(self, lines, horizontal):
+        """
+        Replace the whole grid with the given arrays of every row
+        (horizontal) or column, deriving the other copy from them. Loads are
+        not journaled.
+        """
+        transposed = [array(lines[0].typecode, [line[j] for line in lines])
+                      for j in xrange(len(lines[0]))] if lines else []
+        if horizontal:
+            self.rows, self.columns = lines, transposed
+        else:
+            self.rows, self.columns = transposed, lines
+
+    def line(self, i, horizontal):
+        """
+        Returns the array of cross-sets of row i (horizontal) or column i.
+        """
+        return self.rows[i] if horizontal else self.columns[i]
+
+    def __getitem__(self, x):
+        return self.rows[x]
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+
+def new_cross_grid(s_board):
+    """
+    Returns a CrossGrid matching the dimensions of the given board. Every
+    square starts out unconstrained (ALL_LETTERS).
+    """
+    return CrossGrid(len(s_board), len(s_board[0]) if len(s_board) else 0)
+
+
+def new_cross_score_grid(s_board):
+    """
+    Returns a CrossGrid of cross-scores matching the dimensions of the given
+    board, see engine.scoring.cross_score. Every square starts out with no
+    cross word (NO_CROSS).
+    """
+    return CrossGrid(len(s_board), len(s_board[0]) if len(s_board) else 0, NO_CROSS, 'i')
 
 
-def redo_crosses(move, h_cross, v_cross, s_board, gaddag):
+def recompute_all_crosses(game):
+    """
+    Derive the cross sets and cross-scores of a game from its board alone,
+    e.g. after loading a position by assigning game.board, replacing
+    whatever the grids held.
+
+    Each row (for the horizontal grids) and column (for the vertical ones)
+    is handled in one pass over its occupancy bits: occupied squares get
+    an empty cross set, empty squares next to a tile in that line get the
+    letters that fit between the tiles around them, and the rest are
+    unconstrained. Squares with the same prefix and suffix share a single
+    GADDAG query.
+
+    Parameters:
+        game:
+            ScrabbleGame whose horizontal_crosses, vertical_crosses,
+            horizontal_cross_scores and vertical_cross_scores are replaced,
+            and which then has crosses_current set.
+    """
+    s_board = game.board
+    gaddag = game.gaddag
+    sets = dict()
+
+    def cross_set(prefix, suffix):
+        key = (prefix.upper(), suffix.upper())
+        mask = sets.get(key)
+        if mask is None:
+            if prefix and suffix:
+                mask = gaddag.mid_set(prefix, suffix)
+            elif prefix:
+                _, mask = gaddag.cross_sets(prefix)
+            else:
+                mask, _ = gaddag.cross_sets(suffix)
+            sets[key] = mask
+
+        return mask
+
+    grids = ((True, game.horizontal_crosses, game.horizontal_cross_scores,
+              s_board.occupied_rows, s_board.width),
+             (False, game.vertical_crosses, game.vertical_cross_scores,
+              s_board.occupied_columns, s_board.height))
+
+    for horizontal, crosses, scores, occupancy, length in grids:
+        full = (1 << length) - 1
+        masks, values = [], []
+        for i, occupied in enumerate(occupancy):
+            line_masks = array('I', [ALL_LETTERS]) * length
+            line_values = array('i', [NO_CROSS]) * length
+            hooks = ((occupied << 1) | (occupied >> 1)) & full & ~occupied
+
+            for j in xrange(length):
+                if occupied >> j & 1:
+                    line_masks[j] = 0
+                elif hooks >> j & 1:
+                    x, y = (i, j) if horizontal else (j, i)
+                    prefix = s_board.prefix(x, y, horizontal)
+                    suffix = s_board.suffix(x, y, horizontal)
+
+                    line_masks[j] = cross_set(prefix, suffix)
+                    line_values[j] = face_value(prefix) + face_value(suffix)
+
+            masks.append(line_masks)
+            values.append(line_values)
+
+        crosses.load(masks, horizontal)
+        scores.load(values, horizontal)
+
+    game.crosses_current = True
+
+
+def redo_crosses(move, h_cross, v_cross, s_board, gaddag, h_scores=None, v_scores=None):
     """
     Given a board and move candidate, generates the changed cross sets
     resulting from the move in-place.
@@ -12,21 +167,37 @@ def redo_crosses(move, h_cross, v_cross, s_board, gaddag):
         move:
             Move object to generate crosses for.
         h_cross:
-            2D array of horizontal cross sets that correspond to the board.
-            This parameter is altered in-place.
+            CrossGrid of horizontal cross sets (letter masks) that correspond
+            to the board. This parameter is altered in-place.
         v_cross:
-            2D array of vertical cross sets that correspond to the board.
-            This parameter is altered in-place.
+            CrossGrid of vertical cross sets (letter masks) that correspond
+            to the board. This parameter is altered in-place.
         s_board:
             Scrabble board to generate cross sets for.
         gaddag:
             GADDAG of the lexicon to use.
+        h_scores:
+            Optional CrossGrid of horizontal cross-scores (see
+            engine.scoring.cross_score), updated in-place on the squares
+            whose cross sets change.
+        v_scores:
+            Optional CrossGrid of vertical cross-scores, likewise.
 
     Returns:
         (h_cross, v_cross):
-            2D arrays of horizontal and vertical cross sets, respectively.
+            CrossGrids of horizontal and vertical cross sets, respectively.
             These are the same objects as passed into the function.
     """
+    def set_h(x, y, mask):
+        h_cross.set(x, y, mask)
+        if h_scores is not None:
+            h_scores.set(x, y, cross_score(s_board, x, y, True))
+
+    def set_v(x, y, mask):
+        v_cross.set(x, y, mask)
+        if v_scores is not None:
+            v_scores.set(x, y, cross_score(s_board, x, y, False))
+
     move.sort_letters()
     fx, fy = move.positions[0].pos
     lx, ly = move.positions[-1].pos
@@ -34,8 +205,8 @@ def redo_crosses(move, h_cross, v_cross, s_board, gaddag):
     # Clear the cross-sets of newly-occupied positions
     for bpos in move.positions:
         x, y = bpos.pos
-        h_cross[x][y] = set()
-        v_cross[x][y] = set()
+        set_h(x, y, 0)
+        set_v(x, y, 0)
 
     # IMPORTANT: assumes move tiles are in sorted order already
     # Build the main body of the move word - FIXED: include skipped
@@ -59,7 +230,7 @@ def redo_crosses(move, h_cross, v_cross, s_board, gaddag):
 
     move_suffix = board.get_suffix(s_board, lx, ly, move.horizontal)
     move_prefix = board.get_prefix(s_board, fx, fy, move.horizontal)
-    word = move_word + move_suffix + move_prefix
+    word = move_prefix + move_word + move_suffix
 
     # Parallel letter sets off first/last letters in move
     # ---------------------------------------------------
@@ -81,14 +252,14 @@ def redo_crosses(move, h_cross, v_cross, s_board, gaddag):
 
     if move.horizontal:
         if fy - len(move_prefix) > 0:
-            h_cross[fx][fy - len(move_prefix) - 1] = left
+            set_h(fx, fy - len(move_prefix) - 1, left)
         if ly + len(move_suffix) < len(s_board[lx]) - 1:
-            h_cross[lx][ly + len(move_suffix) + 1] = right
+            set_h(lx, ly + len(move_suffix) + 1, right)
     else:
         if fx - len(move_prefix) > 0:
-            v_cross[fx - len(move_prefix) - 1][fy] = left
+            set_v(fx - len(move_prefix) - 1, fy, left)
         if lx + len(move_suffix) < len(s_board) - 1:
-            v_cross[lx + len(move_suffix) + 1][ly] = right
+            set_v(lx + len(move_suffix) + 1, ly, right)
 
     for bp in move.positions:
         x, y = bp.pos
@@ -114,19 +285,19 @@ def redo_crosses(move, h_cross, v_cross, s_board, gaddag):
         if move.horizontal:
             if x - len(prefix) > 0:
                 if s_board[x - len(prefix) - 1][y] in board.empty_locations:
-                    v_cross[x - len(prefix) - 1][y] = left
+                    set_v(x - len(prefix) - 1, y, left)
 
             if x + len(suffix) < len(s_board) - 1:
                 if s_board[x + len(suffix) + 1][y] in board.empty_locations:
-                    v_cross[x + len(suffix) + 1][y] = right
+                    set_v(x + len(suffix) + 1, y, right)
         else:
             if y - len(prefix) > 0:
                 if s_board[x][y - len(prefix) - 1] in board.empty_locations:
-                    h_cross[x][y - len(prefix) - 1] = left
+                    set_h(x, y - len(prefix) - 1, left)
 
             if y + len(suffix) < len(s_board[x]) - 1:
                 if s_board[x][y + len(suffix) + 1] in board.empty_locations:
-                    h_cross[x][y + len(suffix) + 1] = right
+                    set_h(x, y + len(suffix) + 1, right)
 
 
 def mid_cross(bp, prefix, suffix, horizontal, s_board, gaddag):
@@ -152,7 +323,7 @@ def mid_cross(bp, prefix, suffix, horizontal, s_board, gaddag):
     Returns:
         (left_cross, right_cross):
             None if there is no mid-cross associated with the position
-            and direction, or the cross-set if there is.
+            and direction, or the cross-set letter mask if there is.
     """
     x, y = bp.pos
     left_cross, right_cross = None, None
@@ -1,12 +1,15 @@
 __author__ = 'Jacky'
 
-from copy import deepcopy
 from collections import namedtuple
 
 from engine.game import ScrabbleGame
 from engine import board
+from engine.rack import Rack
+from engine.scoring import score_move
+from engine.zobrist import BLANK
 
 from lexicon.gaddag import GaddagState
+from lexicon.letter_masks import ALPHABET, LETTER_BITS
 
 
 MoveAlias = namedtuple('MoveAlias', 'word, x, y, horizontal, score')
@@ -35,45 +38,17 @@ class StrategyBase(object):
         :returns: Anchor squares on the given row/column as a list of
         integers as indexes of the anchors within the row/column.
         """
-        # TODO: BROKEN. Imagine empty row below a filled row.
-        if horizontal:
-            line = ''.join(self.game.board[coord])
-        else:
-            line = ''.join([row[coord] for row in self.game.board])
-
-        def is_anchor(j):
-            if line[j] not in board.empty_locations:
-                return False
-
-            # Look left/up, if possible
-            if j > 0:
-                if line[j - 1] not in board.empty_locations:
-                    return True
-
-            # Look right/down, if possible
-            if j < len(line) - 1:
-                if line[j + 1] not in board.empty_locations:
-                    return True
-
-            # Look up/left, if possible
-            if horizontal and coord > 0:
-                if self.game.board[coord - 1][j] not in board.empty_locations:
-                    return True
-            elif not horizontal and coord > 0:
-                if self.game.board[j][coord - 1] not in board.empty_locations:
-                    return True
-
-            # Look down/right, if possible
-            if horizontal and coord < len(self.game.board) - 1:
-                if self.game.board[coord + 1][j] not in board.empty_locations:
-                    return True
-            elif not horizontal and coord < len(self.game.board[j]) - 1:
-                if self.game.board[j][coord + 1] not in board.empty_locations:
-                    return True
-
-            return False
-
-        anchors = [i for i in xrange(0, len(line)) if is_anchor(i)]
+        # The board keeps the anchor bitsets up to date as tiles are placed
+        # and removed, so this only lists the bits
+        bits = self.game.board.anchors(coord, horizontal)
+
+        anchors = []
+        j = 0
+        while bits:
+            if bits & 1:
+                anchors.append(j)
+            bits >>= 1
+            j += 1
 
         return anchors
 
@@ -108,77 +83,59 @@ class StaticScoreStrategy(StrategyBase):
         self.row = []
         self.anchors = []
         self.cross_sets = []
+        self.cross_scores = None
 
     def generate_moves(self):
-        def move_mapper(move):
-            check = self.game.set_candidate(move.word, (move.x, move.y), move.horizontal)
-            if not check:   # This line is just for hooking breakpoints to
-                assert check    # sanity check
-
-            check = self.game.validate_candidate()
-            if not check:
-                assert check    # sanity check
-
-            score = self.game.candidate.score
-            self.game.remove_candidate()
-
-            return move._replace(score=score)
-
         self.moves = set()
+        s_board = self.game.board
+        # The generator takes tiles off and puts them back on this one rack
+        # as it searches, rather than copying the rack at every step
+        rack = Rack.from_counts(self.game.players[self.game.current_turn].rack.counts)
+
+        # Rows are generated against the vertical cross-sets, columns against
+        # the horizontal ones; both come from the maintained line views, so
+        # neither direction copies the board
+        directions = ((True, self.game.vertical_crosses, s_board.height),
+                      (False, self.game.horizontal_crosses, s_board.width))
+        cross_scores = {True: self.game.vertical_cross_scores,
+                        False: self.game.horizontal_cross_scores}
+        if not self.game.crosses_current:
+            # Stale cross-scores, e.g. after the board was assigned: cross
+            # words are read off the board instead
+            cross_scores = {True: None, False: None}
+
         if self.game.history is None:
             # Special case for first move
-            self.horizontal = True
-            self.row = self.game.board[7]
-            self.coord = 7
-
-            self.anchors = [7]
-            self.cross_sets = self.game.vertical_crosses[7]
-
-            rack = self.game.players[self.game.current_turn].rack
-            self.cur_anchor = 0
+            for horizontal, crosses, _ in directions:
+                self.horizontal = horizontal
+                self.cross_scores = cross_scores[horizontal]
+                self.row = s_board.line(7, horizontal)
+                self.coord = 7
 
-            self.gen(7, 0, '', rack, self.game.gaddag.root)
+                self.anchors = [7]
+                self.cross_sets = crosses.line(7, horizontal)
+                self.cur_anchor = 0
 
-            self.horizontal = False
-            self.row = [row[7] for row in self.game.board]
-            self.cross_sets = [row[7] for row in self.game.horizontal_crosses]
+                self.gen(7, 0, '', rack, self.game.gaddag.root)
 
-            self.gen(7, 0, '', rack, self.game.gaddag.root)
+            return list(self.moves)
 
-            return map(move_mapper, self.moves)
-
-        self.horizontal = True
-        for i, row in enumerate(self.game.board):
-            self.row = row
-            self.coord = i
+        for horizontal, crosses, lines in directions:
+            self.horizontal = horizontal
+            self.cross_scores = cross_scores[horizontal]
+            for i in xrange(lines):
+                self.row = s_board.line(i, horizontal)
+                self.coord = i
 
-            self.anchors = self.find_anchors(i, True)
-            self.cross_sets = self.game.vertical_crosses[i]
+                self.anchors = self.find_anchors(i, horizontal)
+                self.cross_sets = crosses.line(i, horizontal)
 
-            rack = self.game.players[self.game.current_turn].rack
+                for j, anchor in enumerate(self.anchors):
+                    self.cur_anchor = j
 
-            for j, anchor in enumerate(self.anchors):
-                self.cur_anchor = j
+                    self.gen(anchor, 0, '', rack, self.game.gaddag.root)
 
-                self.gen(anchor, 0, '', rack, self.game.gaddag.root)
-
-        self.horizontal = False
-        columns = [[row[i] for row in self.game.board] for i in xrange(0, len(self.game.board[0]))]
-        for i, col in enumerate(columns):
-            self.row = col
-            self.coord = i
-
-            self.anchors = self.find_anchors(i, False)
-            self.cross_sets = [row[i] for row in self.game.horizontal_crosses]
-
-            rack = self.game.players[self.game.current_turn].rack
-
-            for j, anchor in enumerate(self.anchors):
-                self.cur_anchor = j
-
-                self.gen(anchor, 0, '', rack, self.game.gaddag.root)
-
-        return map(move_mapper, self.moves)
+        return list(self.moves)
 
     def record_play(self, leftmost, word):
         """
@@ -188,13 +145,16 @@ class StaticScoreStrategy(StrategyBase):
         :param int coord: The leftmost coordinate of the move.
         """
         if self.horizontal:
-            move = MoveAlias(word=word, x=self.coord,
-                             y=leftmost, horizontal=self.horizontal, score=0)
-            self.moves.add(move)
+            x, y = self.coord, leftmost
         else:
-            move = MoveAlias(word=word, x=leftmost,
-                             y=self.coord, horizontal=self.horizontal, score=0)
-            self.moves.add(move)
+            x, y = leftmost, self.coord
+
+        # The move is legal by construction, so it is scored straight from
+        # the board, with blanks assigned the way set_candidate would
+        tiles = self.game.players[self.game.current_turn].valid_play(word)
+        score = score_move(self.game.board, tiles, x, y, self.horizontal, self.cross_scores)
+
+        self.moves.add(MoveAlias(word=word, x=x, y=y, horizontal=self.horizontal, score=score))
 
     def gen(self, leftmost, pos, word, rack, state):
         """
@@ -206,42 +166,43 @@ class StaticScoreStrategy(StrategyBase):
         """
         coord = self.anchors[self.cur_anchor] + pos
         cur_letter = self.row[coord].upper()
+        # Compact GADDAGs make a view of the arcs of a state on every access
+        arcs = state.arcs
 
         if cur_letter not in board.empty_locations:
-            self.go_on(leftmost, pos, cur_letter, word, rack, state.arcs.get(cur_letter), state)
-        elif len(rack) > 0:
+            self.go_on(leftmost, pos, cur_letter, word, rack, arcs.get(cur_letter), state)
+        elif rack.total:
             # Because of the way the algorithm is implemented, the letters
             # we can put on this square is just the intersection of the
             # orthogonal cross set and the rack. Outgoing arcs from the
             # GADDAG state don't matter
-            valid_letters = set(rack)
             cross_set = self.cross_sets[coord]
+            valid_letters = rack.mask & cross_set
 
-            if cross_set is not None:
-                valid_letters &= cross_set
-
-            for letter in valid_letters:
-                new_rack = deepcopy(rack)
-                new_rack.remove(letter)
+            for i, letter in enumerate(ALPHABET):
+                if not valid_letters >> i & 1:
+                    continue
 
-                self.go_on(leftmost, pos, letter, word, new_rack, state.arcs.get(letter), state)
+                rack.take(i)
+                self.go_on(leftmost, pos, letter, word, rack, arcs.get(letter), state)
+                rack.put(i)
 
-            if ' ' in rack:
+            if rack.counts[BLANK]:
                 # A blank tile can be any letter in the orthogonal cross set
-                if cross_set is None:
-                    cross_set = set('ABCDEFGHIJKLMNOPQRSTUVWXYZ')
+                rack.take(BLANK)
+                for i, letter in enumerate(ALPHABET):
+                    if not cross_set >> i & 1:
+                        continue
 
-                for letter in cross_set:
-                    new_rack = deepcopy(rack)
-                    new_rack.remove(' ')
-                    self.go_on(leftmost, pos, letter, word, new_rack, state.arcs.get(letter), state)
+                    self.go_on(leftmost, pos, letter, word, rack, arcs.get(letter), state)
+                rack.put(BLANK)
 
     def go_on(self, leftmost, pos, letter, word, rack, new_arc, old_arc):
         """
         :param pos:
         :param str letter:
         :param str word:
-        :param list rack:
+        :param Rack rack:
         :param new_arc:
         :param old_arc:
 
@@ -260,7 +221,7 @@ class StaticScoreStrategy(StrategyBase):
                     leftmost = coord
 
             left_unoccupied = coord - 1 < 0 or self.row[coord - 1] in board.empty_locations
-            if letter in old_arc.letter_set and left_unoccupied:
+            if old_arc.letter_set & LETTER_BITS[letter] and left_unoccupied:
                 # To commit a move here, we must make sure that this
                 # prefix-only move doesn't hook onto a suffix that
                 # at this point hasn't been checked for validity
@@ -272,8 +233,9 @@ class StaticScoreStrategy(StrategyBase):
             if new_arc is not None:
                 # Shift direction if possible
                 r_coord = self.anchors[self.cur_anchor] + 1
-                if '|' in new_arc.arcs and left_unoccupied and r_coord < len(self.row):
-                    self.gen(leftmost, 1, word, rack, new_arc.arcs['|'])
+                shifted = new_arc.arcs.get('|')
+                if shifted is not None and left_unoccupied and r_coord < len(self.row):
+                    self.gen(leftmost, 1, word, rack, shifted)
 
                 if coord > 0:
                     # Keep going left, only if we don't overrun previous
@@ -291,7 +253,7 @@ class StaticScoreStrategy(StrategyBase):
                 word = '%s%s' % (word, letter)
             unoccupied = coord + 1 >= len(self.row) or self.row[coord + 1] in board.empty_locations
 
-            if letter in old_arc.letter_set and unoccupied:
+            if old_arc.letter_set & LETTER_BITS[letter] and unoccupied:
                 self.record_play(leftmost, word)
             if new_arc is not None and coord + 1 < len(self.row):
                 self.gen(leftmost, pos + 1, word, rack, new_arc)
@@ -0,0 +1,111 @@
+__author__ = 'Jacky'
+
+import sys
+import timeit
+
+from lexicon.builder import parallel_gaddag_from_file
+from lexicon.compact_gaddag import CompactGaddag
+from lexicon.gaddag import gaddag_from_file
+from lexicon.letter_masks import LETTER_BITS
+from strategy.cross_sets import new_cross_grid, redo_crosses
+
+from strategy.test.scenario import parse_cross_set
+
+SCENARIOS = ['./strategy/test/scenarios/mids.txt',
+             './strategy/test/scenarios/parallel_mids.txt']
+
+REPEAT = 200
+
+
+def legacy_mid_set(gaddag, prefix, suffix):
+    """
+    The previous Gaddag.mid_set: walk REV(suffix), then walk the reversed
+    prefix again under every arc leaving that state.
+    """
+    cur_state = gaddag.root
+    for letter in suffix.upper()[::-1]:
+        if not letter in cur_state.arcs:
+            return 0
+        cur_state = cur_state.arcs[letter]
+
+    first = LETTER_BITS.get(prefix[0].upper(), 0)
+    letter_set = 0
+    for k, v in cur_state.arcs.iteritems():
+        for letter in prefix.upper()[:0:-1]:
+            if not letter in v.arcs:
+                break
+            v = v.arcs[letter]
+        else:
+            if v.letter_set & first and k != '|':
+                letter_set |= LETTER_BITS[k]
+
+    return letter_set
+
+
+class RecordingGaddag(object):
+    """
+    Passes queries through to a GADDAG, recording every mid_set query.
+    """
+
+    def __init__(self, gaddag):
+        self.gaddag = gaddag
+        self.queries = []
+
+    def mid_set(self, prefix, suffix):
+        self.queries.append((prefix, suffix))
+        return self.gaddag.mid_set(prefix, suffix)
+
+    def __getattr__(self, name):
+        return getattr(self.gaddag, name)
+
+
+def scenario_queries(gaddag):
+    """
+    Returns the (prefix, suffix) mid_set queries made while updating the
+    cross-sets of every scenario in SCENARIOS.
+    """
+    recorder = RecordingGaddag(gaddag)
+    for filename in SCENARIOS:
+        for scenario in parse_cross_set(filename):
+            board = scenario['board']
+            redo_crosses(scenario['candidate'], new_cross_grid(board),
+                         new_cross_grid(board), board, recorder)
+
+    return recorder.queries
+
+
+def bench(name, fn, queries):
+    for prefix, suffix in queries:
+        fn(prefix, suffix)
+
+    seconds = min(timeit.repeat(lambda: [fn(p, s) for p, s in queries],
+                                number=REPEAT, repeat=3))
+    print '%-28s %8.2f us/query' % (name, seconds / REPEAT / len(queries) * 1e6)
+
+
+def main():
+    """
+    Time the previous and current mid_set implementations on the mid-set
+    scenarios, using test_list1 or the wordlist given on the command line.
+    """
+    if len(sys.argv) > 1:
+        compact = parallel_gaddag_from_file(sys.argv[1])
+        gaddags = [('CompactGaddag', compact)]
+    else:
+        gaddag = gaddag_from_file('./wordlists/test_list1.txt')
+        compact = CompactGaddag.from_gaddag(gaddag)
+        gaddags = [('Gaddag', gaddag), ('CompactGaddag', compact)]
+
+    queries = scenario_queries(compact)
+    print '%d mid_set queries from %d scenario files' % (len(queries), len(SCENARIOS))
+
+    for name, g in gaddags:
+        for prefix, suffix in queries:
+            assert legacy_mid_set(g, prefix, suffix) == g.mid_set(prefix, suffix)
+
+        bench('%s legacy' % name, lambda p, s: legacy_mid_set(g, p, s), queries)
+        bench('%s mid_set' % name, g.mid_set, queries)
+
+
+if __name__ == '__main__':
+    main()
@@ -4,8 +4,7 @@ import pdb
 from string import letters
 
 from engine.game import ScrabbleGame
-from lexicon.lexicon_set import read_lexicon
-from lexicon.gaddag import gaddag_from_file
+from lexicon.manager import get_lexicon
 
 from strategy.strategies import StaticScoreStrategy
 
@@ -118,15 +117,19 @@ def get_move():
 def main():
     if TEST:
         WORDLIST = './wordlists/test_list1.txt'
-        game.lexicon_set = read_lexicon(WORDLIST)
-        game.gaddag = gaddag_from_file(WORDLIST)
+        lexicon = get_lexicon(WORDLIST)
+        game.lexicon = lexicon
+        game.lexicon_set = lexicon.words
+        game.gaddag = lexicon.gaddag
         game.bag = list('AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAABBBBBBBBBBBBBBBBBBBBBBBBBBBBBBBBB'
                         'CCCCCCCCCCCCCCCCCCCCCCCCCCCCCCCDDDDDDDDDDDDDDDDDDDDDDDDDDDDDDDDD'
                         'EEEEEEEEEEEEEEEEEEEEEEEEEEEEEEE')
     else:
         WORDLIST = './wordlists/OSPD4_stripped.txt'
-        game.lexicon_set = read_lexicon(WORDLIST)
-        game.gaddag = gaddag_from_file(WORDLIST)
+        lexicon = get_lexicon(WORDLIST)
+        game.lexicon = lexicon
+        game.lexicon_set = lexicon.words
+        game.gaddag = lexicon.gaddag
 
     start_game()
     while not game.game_over:
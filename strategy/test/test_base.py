@@ -5,11 +5,13 @@ from copy import deepcopy
 
 from strategy.strategies import StrategyBase
 from engine.game import ScrabbleGame
+from lexicon.test.managers import temp_manager
 
 
 class TestStrategyBase(unittest.TestCase):
     def setUp(self):
-        self.game = ScrabbleGame(wordlist='./wordlists/empty_list.txt')
+        self.game = ScrabbleGame(wordlist='./wordlists/empty_list.txt',
+                                 lexicon_manager=temp_manager)
         self.board = [
             list('.....'),
             list('.....'),
@@ -5,8 +5,13 @@ import unittest
 from lexicon.gaddag import gaddag_from_file
 from strategy.cross_sets import *
 from engine.board import BoardPosition
+from engine.game import ScrabbleGame
+from engine.test.games import new_game
+from lexicon.letter_masks import to_mask
+from strategy.strategies import StaticScoreStrategy
 
 from strategy.test.scenario import parse_cross_set
+from lexicon.test.managers import short_wordlist, temp_manager
 
 
 class TestCrossSets(unittest.TestCase):
@@ -28,8 +33,8 @@ class TestCrossSets(unittest.TestCase):
             # move_letters = ''.join([bp.letter for bp in scenario['candidate'].positions])
             # print 'Move candidate letters: %s' % move_letters
 
-            vertical_crosses = [[None] * len(row) for row in board]
-            horizontal_crosses = [[None] * len(row) for row in board]
+            vertical_crosses = new_cross_grid(board)
+            horizontal_crosses = new_cross_grid(board)
             move = scenario['candidate']
 
             redo_crosses(move, horizontal_crosses, vertical_crosses, board, self.gaddag)
@@ -37,9 +42,69 @@ class TestCrossSets(unittest.TestCase):
             for cross in scenario['crosses']:
                 x, y = cross['x'], cross['y']
                 if cross['horizontal']:
-                    self.assertEqual(cross['letters'], horizontal_crosses[x][y])
+                    self.assertEqual(to_mask(cross['letters']), horizontal_crosses[x][y])
                 else:
-                    self.assertEqual(cross['letters'], vertical_crosses[x][y])
+                    self.assertEqual(to_mask(cross['letters']), vertical_crosses[x][y])
+
+            # The transposed copies agree with the rows
+            for grid in (horizontal_crosses, vertical_crosses):
+                for y in xrange(len(board[0])):
+                    self.assertEqual([row[y] for row in grid], list(grid.line(y, False)))
+
+
+class TestRecomputeAllCrosses(unittest.TestCase):
+    def assertMatchesRecomputed(self, game, wordlist):
+        loaded = ScrabbleGame(wordlist, read_gaddag=True, lexicon_manager=temp_manager)
+        loaded.board = game.board.copy()
+        recompute_all_crosses(loaded)
+
+        for name in ('horizontal_crosses', 'vertical_crosses',
+                     'horizontal_cross_scores', 'vertical_cross_scores'):
+            expected, grid = getattr(game, name), getattr(loaded, name)
+            self.assertEqual(map(list, expected.rows), map(list, grid.rows))
+            self.assertEqual(map(list, expected.columns), map(list, grid.columns))
+
+    def test_matches_incremental(self):
+        game = new_game(bag='ABCDE' * 4 + ' ', read_gaddag=True, seed=6)
+        strategy = StaticScoreStrategy(game)
+
+        for _ in xrange(3):
+            m = max(strategy.generate_moves(), key=lambda m: (m.score, m))
+            self.assert_(game.make_move(m.word, (m.x, m.y), m.horizontal, crosses=True))
+            self.assertMatchesRecomputed(game, './wordlists/test_list1.txt')
+
+    def test_real_wordlist(self):
+        wordlist = short_wordlist()
+        for seed in (1, 5):
+            game = new_game(wordlist, read_gaddag=True, seed=seed)
+            strategy = StaticScoreStrategy(game)
+
+            while not game.game_over:
+                moves = strategy.generate_moves()
+                if not moves:
+                    self.assert_(game.pass_turn())
+                    continue
+                m = max(moves, key=lambda m: (m.score, m))
+                self.assert_(game.make_move(m.word, (m.x, m.y), m.horizontal, crosses=True))
+                self.assertMatchesRecomputed(game, wordlist)
+
+    def test_prefix_extension(self):
+        # AGE extends AG, which becomes the prefix of the move, with hooks
+        # (CAGE, AGED...) that neither AG nor EAG has
+        wordlist = short_wordlist()
+        for horizontal in (True, False):
+            game = new_game(wordlist, read_gaddag=True)
+            game.players[0].rack = list('AG')
+            game.players[1].rack = list('E')
+
+            self.assert_(game.make_move('AG', (7, 7), horizontal, crosses=True))
+            self.assert_(game.make_move('E', (7, 9) if horizontal else (9, 7), horizontal,
+                                        crosses=True))
+            self.assertMatchesRecomputed(game, wordlist)
+
+            crosses = game.horizontal_crosses if horizontal else game.vertical_crosses
+            self.assertEqual(to_mask('CGMPRSW'), crosses[7][6] if horizontal else crosses[6][7])
+            self.assertEqual(to_mask('DERS'), crosses[7][10] if horizontal else crosses[10][7])
 
 
 class TestMidCross(unittest.TestCase):
@@ -59,11 +124,11 @@ class TestMidCross(unittest.TestCase):
         ]
 
         bp = BoardPosition('A', (2, 2))
-        expected = (set('CDE'), set('CDE'))
+        expected = (to_mask('CDE'), to_mask('CDE'))
 
         self.assertEqual(expected, mid_cross(bp, '', '', True, board, self.gaddag))
 
-        expected = (set('BDE'), set('BDE'))
+        expected = (to_mask('BDE'), to_mask('BDE'))
         self.assertEqual(expected, mid_cross(bp, '', '', False, board, self.gaddag))
 
         board = [
@@ -93,11 +158,11 @@ class TestMidCross(unittest.TestCase):
         ]
 
         bp = BoardPosition('A', (4, 4))
-        expected = (set('DE'), set('CE'))
+        expected = (to_mask('DE'), to_mask('CE'))
 
         self.assertEqual(expected, mid_cross(bp, 'B', '', True, board, self.gaddag))
 
-        expected = (set('CE'), set('DE'))
+        expected = (to_mask('CE'), to_mask('DE'))
         self.assertEqual(expected, mid_cross(bp, 'B', '', False, board, self.gaddag))
 
     def test_suffix(self):
@@ -115,11 +180,11 @@ class TestMidCross(unittest.TestCase):
         ]
 
         bp = BoardPosition('A', (2, 2))
-        expected = (set('CE'), set('DE'))
+        expected = (to_mask('CE'), to_mask('DE'))
 
         self.assertEqual(expected, mid_cross(bp, '', 'B', True, board, self.gaddag))
 
-        expected = (set('DE'), set('CE'))
+        expected = (to_mask('DE'), to_mask('CE'))
         self.assertEqual(expected, mid_cross(bp, '', 'B', False, board, self.gaddag))
 
     def test_prefix_suffix(self):
@@ -138,8 +203,8 @@ class TestMidCross(unittest.TestCase):
 
         bp = BoardPosition('A', (3, 4))
 
-        expected = (set('C'), set('C'))
+        expected = (to_mask('C'), to_mask('C'))
         self.assertEqual(expected, mid_cross(bp, 'D', 'E', True, board, self.gaddag))
 
-        expected = (set('E'), set('E'))
+        expected = (to_mask('E'), to_mask('E'))
         self.assertEqual(expected, mid_cross(bp, 'B', 'C', False, board, self.gaddag))
@@ -4,9 +4,11 @@ import unittest
 
 from strategy.strategies import StaticScoreStrategy, MoveAlias
 from engine.game import ScrabbleGame
+from lexicon.test.managers import temp_manager
 
 
 class StaticScoreTest(unittest.TestCase):
     def setUp(self):
-        game = ScrabbleGame(wordlist='./wordlists/ABBA.txt', read_gaddag=True)
+        game = ScrabbleGame(wordlist='./wordlists/ABBA.txt', read_gaddag=True,
+                            lexicon_manager=temp_manager)
         self.strategy = StaticScoreStrategy(game)
@@ -2,8 +2,7 @@ __author__ = 'jacky'
 
 from string import letters
 from engine.game import ScrabbleGame
-from lexicon.lexicon_set import read_lexicon
-from lexicon.gaddag import gaddag_from_file
+from lexicon.manager import get_lexicon
 
 game = ScrabbleGame()
 columns = letters[:len(game.board[0])].upper()
@@ -89,8 +88,10 @@ def get_move():
 def main():
     if TEST:
         WORDLIST = './engine/test/wordlists/wordlist1.txt'
-        game.lexicon_set = read_lexicon(WORDLIST)
-        game.gaddag = gaddag_from_file(WORDLIST)
+        lexicon = get_lexicon(WORDLIST)
+        game.lexicon = lexicon
+        game.lexicon_set = lexicon.words
+        game.gaddag = lexicon.gaddag
         game.bag = list('AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAABBBBBBBBBBBBBBBBBBBBBBBBBBBBBBBBB'
                         'CCCCCCCCCCCCCCCCCCCCCCCCCCCCCCCDDDDDDDDDDDDDDDDDDDDDDDDDDDDDDDDD'
                         'EEEEEEEEEEEEEEEEEEEEEEEEEEEEEEE')